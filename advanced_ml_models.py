@@ -2,60 +2,115 @@
 
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split, GridSearchCV, cross_val_score
-from sklearn.ensemble import RandomForestClassifier, VotingClassifier, StackingClassifier
+from sklearn.model_selection import train_test_split, cross_val_score
+from sklearn.ensemble import RandomForestClassifier
 from sklearn.linear_model import LogisticRegression
 from sklearn.svm import SVC
 from sklearn.metrics import classification_report, confusion_matrix, accuracy_score, roc_auc_score
-from sklearn.preprocessing import StandardScaler, LabelEncoder
+from sklearn.preprocessing import StandardScaler, LabelEncoder, FunctionTransformer
+from sklearn.pipeline import make_pipeline
 import xgboost as xgb
 import lightgbm as lgb
 import joblib
+import json
+import time
 import warnings
 warnings.filterwarnings('ignore')
 
+from hyperparameter_search import DEFAULT_SEARCH, run_search
+from ensemble_cache import OutOfFoldCache, PrefitStackingClassifier, PrefitVotingClassifier
+from training_scheduler import TrainingScheduler
+from model_registry import LazyModelEntry, ModelRegistry, data_fingerprint
+from incremental_training import DEFAULT_UPDATE, continue_training, split_update_days
+from feature_store import FEATURE_STORE_DIR
+from ml_features import (
+    CATEGORICAL_FEATURES, CLASS_LABELS, DERIVED_FEATURE_COLUMNS, FEATURE_COLUMNS, FEATURE_SET_VERSION,
+    NUMERIC_FEATURES, build_feature_matrix, feature_categories, open_feature_store, prepare_advanced_features
+)
+
+TRAINING_FAMILIES = ['XGBoost', 'LightGBM', 'BaseLearners']
+
+# Ensemble members taken from the tuned search winners instead of being refitted
+TUNED_BASE_LEARNERS = [('xgb', 'XGBoost'), ('lgb', 'LightGBM')]
+
+def category_codes(X):
+    X = X.copy()
+    for column in X.select_dtypes('category').columns:
+        X[column] = X[column].cat.codes.astype(np.int16)
+    return X
+
+def make_base_learners(n_jobs=None):
+    return [
+        ('rf', make_pipeline(
+            FunctionTransformer(category_codes),
+            RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=n_jobs)
+        ))
+    ]
+
+def run_training_family(ml_models, family, X_train, y_train, X_test, y_test, n_jobs=None):
+    ml_models.n_jobs = n_jobs
+    if family == 'XGBoost':
+        ml_models.train_xgboost_model(X_train, y_train, X_test, y_test)
+    elif family == 'LightGBM':
+        ml_models.train_lightgbm_model(X_train, y_train, X_test, y_test)
+    else:
+        ml_models.get_base_learner_cache(X_train, y_train)
+
+    return {
+        'models': ml_models.models,
+        'feature_importance': ml_models.feature_importance,
+        'search_reports': ml_models.search_reports,
+        'base_learner_cache': ml_models.base_learner_cache
+    }
+
 class AdvancedMLModels:
-    def __init__(self):
+    def __init__(self, search=None, parallel=True, feature_store_dir=FEATURE_STORE_DIR):
         self.models = {}
         self.scalers = {}
         self.feature_importance = {}
-        self.best_model = None
+        self.best_model_name = None
+        self.model_version = None
+        self.model_paths = {}
+        self.training_data = None
+        self.update_report = None
+        self.search = {
+            model_name: {**DEFAULT_SEARCH, **(search or {}).get(model_name, {})}
+            for model_name in ['XGBoost', 'LightGBM']
+        }
+        self.search_reports = {}
+        self.base_learner_cache = None
+        self.n_jobs = None
+        self.parallel = parallel
+        self.training_report = {}
+        self.categories = {column: [] for column in CATEGORICAL_FEATURES}
+        self.feature_store = open_feature_store(feature_store_dir)
+
+    @property
+    def best_model(self):
+        if self.best_model_name not in self.models:
+            return None
+        return self.models[self.best_model_name]['model']
 
     def prepare_advanced_features(self, data):
 
-        df = data.copy()
-
-        df['departure_hour'] = pd.to_datetime(df['scheduled_departure_datetime_local']).dt.hour
-        df['departure_dayofweek'] = pd.to_datetime(df['scheduled_departure_date_local']).dt.dayofweek
-        df['departure_month'] = pd.to_datetime(df['scheduled_departure_date_local']).dt.month
-
-        df['is_peak_morning'] = df['departure_hour'].between(6, 9).astype(int)
-        df['is_peak_evening'] = df['departure_hour'].between(16, 19).astype(int)
-        df['is_weekend'] = df['departure_dayofweek'].isin([5, 6]).astype(int)
+        return prepare_advanced_features(data)
 
-        df['seats_per_bag'] = df['total_seats'] / (df['total_bags'] + 1)
-        df['passengers_per_bag'] = df['total_passengers'] / (df['total_bags'] + 1)
+    def get_advanced_features(self, data):
 
-        df['has_special_needs'] = (df['unique_special_requests'] > 0).astype(int)
-        df['high_load_factor'] = (df['load_factor'] > 1.0).astype(int)
-        df['tight_schedule'] = (df['ground_time_pressure'] > 2.0).astype(int)
+        if self.feature_store is None:
+            return self.prepare_advanced_features(data)
 
-        df['load_x_ground_pressure'] = df['load_factor'] * df['ground_time_pressure']
-        df['bags_x_transfer_ratio'] = df['total_bags'] * df['transfer_bag_ratio']
-        df['passengers_x_ssr'] = df['total_passengers'] * df['ssr_intensity']
+        try:
+            features = self.feature_store.features_for(data)
+        except (ValueError, OSError) as e:
+            print(f"Feature store unavailable ({e}); computing features in memory")
+            self.feature_store = None
+            return self.prepare_advanced_features(data)
+        return pd.concat([data.drop(columns=DERIVED_FEATURE_COLUMNS, errors='ignore'), features], axis=1)
 
-        fleet_mapping = {
-            'B787-8': 4, 'B787-9': 4, 'B787-10': 4,
-            'B777-300': 4, 'B777-2HD': 4,
-            'B767-300': 3, 'B767-400': 3,
-            'B757-200': 3, 'B757-300': 3,
-            'B737-800': 2, 'B737-900': 2, 'B737-MAX8': 2, 'B737-MAX9': 2,
-            'A319-100': 2, 'A320-200': 2, 'A321-2NX': 2,
-            'ERJ-175': 1, 'ERJ-170': 1, 'CRJ-200': 1, 'CRJ-550': 1
-        }
-        df['fleet_complexity_score'] = df['fleet_type'].map(fleet_mapping).fillna(1)
+    def build_feature_matrix(self, data):
 
-        return df
+        return build_feature_matrix(data, self.categories)
 
     def train_xgboost_model(self, X_train, y_train, X_test, y_test):
 
@@ -68,13 +123,13 @@ class AdvancedMLModels:
             'subsample': [0.8, 0.9, 1.0]
         }
 
-        xgb_model = xgb.XGBClassifier(random_state=42, eval_metric='mlogloss')
-        grid_search = GridSearchCV(
-            xgb_model, param_grid, cv=5, scoring='accuracy', n_jobs=-1
+        xgb_model = xgb.XGBClassifier(
+            random_state=42, eval_metric='mlogloss', tree_method='hist', enable_categorical=True, n_jobs=self.n_jobs
         )
-        grid_search.fit(X_train, y_train)
+        search = run_search(xgb_model, param_grid, X_train, y_train, {**self.search['XGBoost'], 'n_jobs': self.n_jobs})
+        self.search_reports['XGBoost'] = search.report_
 
-        best_xgb = grid_search.best_estimator_
+        best_xgb = search.best_estimator_
         y_pred = best_xgb.predict(X_test)
         accuracy = accuracy_score(y_test, y_pred)
 
@@ -83,7 +138,9 @@ class AdvancedMLModels:
             'accuracy': accuracy,
             'predictions': y_pred,
             'y_test': y_test,
-            'best_params': grid_search.best_params_
+            'best_params': search.best_params_,
+            'search': search.report_,
+            'oof_probabilities': getattr(search, 'oof_probabilities_', None)
         }
 
         self.feature_importance['XGBoost'] = dict(zip(
@@ -103,13 +160,11 @@ class AdvancedMLModels:
             'num_leaves': [31, 62, 93]
         }
 
-        lgb_model = lgb.LGBMClassifier(random_state=42, verbose=-1)
-        grid_search = GridSearchCV(
-            lgb_model, param_grid, cv=5, scoring='accuracy', n_jobs=-1
-        )
-        grid_search.fit(X_train, y_train)
+        lgb_model = lgb.LGBMClassifier(random_state=42, verbose=-1, n_jobs=self.n_jobs)
+        search = run_search(lgb_model, param_grid, X_train, y_train, {**self.search['LightGBM'], 'n_jobs': self.n_jobs})
+        self.search_reports['LightGBM'] = search.report_
 
-        best_lgb = grid_search.best_estimator_
+        best_lgb = search.best_estimator_
         y_pred = best_lgb.predict(X_test)
         accuracy = accuracy_score(y_test, y_pred)
 
@@ -118,7 +173,9 @@ class AdvancedMLModels:
             'accuracy': accuracy,
             'predictions': y_pred,
             'y_test': y_test,
-            'best_params': grid_search.best_params_
+            'best_params': search.best_params_,
+            'search': search.report_,
+            'oof_probabilities': getattr(search, 'oof_probabilities_', None)
         }
 
         self.feature_importance['LightGBM'] = dict(zip(
@@ -127,24 +184,25 @@ class AdvancedMLModels:
 
         return best_lgb, accuracy
 
+    def get_base_learner_cache(self, X_train, y_train):
+        if self.base_learner_cache is None or not self.base_learner_cache.fitted_on(X_train, y_train):
+            print("Fitting base learners with out-of-fold predictions...")
+            self.base_learner_cache = OutOfFoldCache(make_base_learners(self.n_jobs), cv=5).fit(X_train, y_train)
+
+        cache = self.base_learner_cache
+        for name, model_name in TUNED_BASE_LEARNERS:
+            if model_name in self.models and name not in cache.fitted_estimators:
+                model_data = self.models[model_name]
+                cache.include(name, model_data['model'], X_train, y_train, model_data.get('oof_probabilities'))
+        return cache
+
     def train_ensemble_model(self, X_train, y_train, X_test, y_test):
 
         print("Training Ensemble model...")
 
-        rf = RandomForestClassifier(n_estimators=100, random_state=42)
-        xgb_model = xgb.XGBClassifier(random_state=42, eval_metric='mlogloss')
-        lgb_model = lgb.LGBMClassifier(random_state=42, verbose=-1)
-
-        voting_clf = VotingClassifier(
-            estimators=[
-                ('rf', rf),
-                ('xgb', xgb_model),
-                ('lgb', lgb_model)
-            ],
-            voting='soft'
-        )
+        cache = self.get_base_learner_cache(X_train, y_train)
+        voting_clf = PrefitVotingClassifier(cache.estimators())
 
-        voting_clf.fit(X_train, y_train)
         y_pred = voting_clf.predict(X_test)
         accuracy = accuracy_score(y_test, y_pred)
 
@@ -161,21 +219,11 @@ class AdvancedMLModels:
 
         print("Training Stacking model...")
 
-        base_models = [
-            ('rf', RandomForestClassifier(n_estimators=100, random_state=42)),
-            ('xgb', xgb.XGBClassifier(random_state=42, eval_metric='mlogloss')),
-            ('lgb', lgb.LGBMClassifier(random_state=42, verbose=-1))
-        ]
-
+        cache = self.get_base_learner_cache(X_train, y_train)
         meta_learner = LogisticRegression(random_state=42)
+        meta_learner.fit(cache.oof_meta_features(), y_train)
 
-        stacking_clf = StackingClassifier(
-            estimators=base_models,
-            final_estimator=meta_learner,
-            cv=5
-        )
-
-        stacking_clf.fit(X_train, y_train)
+        stacking_clf = PrefitStackingClassifier(cache.estimators(), meta_learner)
         y_pred = stacking_clf.predict(X_test)
         accuracy = accuracy_score(y_test, y_pred)
 
@@ -191,41 +239,44 @@ class AdvancedMLModels:
     def train_all_models(self, data):
 
         print("Preparing advanced features...")
-        df_advanced = self.prepare_advanced_features(data)
-
-        feature_columns = [
-            'load_factor', 'ground_time_pressure', 'transfer_bag_ratio',
-            'ssr_intensity', 'is_international', 'has_children', 'has_strollers',
-            'fleet_complexity', 'time_complexity', 'total_passengers',
-            'total_bags', 'children_count', 'lap_children_count',
-            'departure_hour', 'departure_dayofweek', 'departure_month',
-            'is_peak_morning', 'is_peak_evening', 'is_weekend',
-            'seats_per_bag', 'passengers_per_bag', 'has_special_needs',
-            'high_load_factor', 'tight_schedule', 'load_x_ground_pressure',
-            'bags_x_transfer_ratio', 'passengers_x_ssr', 'fleet_complexity_score'
-        ]
-
-        X = df_advanced[feature_columns].fillna(0)
-        y = df_advanced['difficulty_classification'].map({
-            'Easy': 0, 'Medium': 1, 'Difficult': 2
-        })
+        dates = data['scheduled_departure_date_local']
+        self.training_data = {
+            'rows': len(data),
+            'fingerprint': data_fingerprint(data),
+            'first_date': str(dates.min()),
+            'last_date': str(dates.max())
+        }
+        df_advanced = self.get_advanced_features(data)
+
+        self.categories = feature_categories(df_advanced)
+        X = self.build_feature_matrix(df_advanced)
+        y = self.labels_for(df_advanced)
 
         X_train, X_test, y_train, y_test = train_test_split(
             X, y, test_size=0.2, random_state=42, stratify=y
         )
 
         scaler = StandardScaler()
-        X_train_scaled = scaler.fit_transform(X_train)
-        X_test_scaled = scaler.transform(X_test)
+        X_train_scaled = scaler.fit_transform(X_train[NUMERIC_FEATURES])
+        X_test_scaled = scaler.transform(X_test[NUMERIC_FEATURES])
         self.scalers['standard'] = scaler
 
         results = {}
 
-        xgb_model, xgb_acc = self.train_xgboost_model(X_train, y_train, X_test, y_test)
-        results['XGBoost'] = xgb_acc
-
-        lgb_model, lgb_acc = self.train_lightgbm_model(X_train, y_train, X_test, y_test)
-        results['LightGBM'] = lgb_acc
+        scheduler = TrainingScheduler(parallel=self.parallel)
+        families = scheduler.run([
+            (family, run_training_family, (AdvancedMLModels(search=self.search, feature_store_dir=None), family, X_train, y_train, X_test, y_test))
+            for family in TRAINING_FAMILIES
+        ])
+        for state in families.values():
+            self.models.update(state['models'])
+            self.feature_importance.update(state['feature_importance'])
+            self.search_reports.update(state['search_reports'])
+            self.base_learner_cache = state['base_learner_cache'] or self.base_learner_cache
+        self.training_report = scheduler.report
+
+        results['XGBoost'] = self.models['XGBoost']['accuracy']
+        results['LightGBM'] = self.models['LightGBM']['accuracy']
 
         ensemble_model, ensemble_acc = self.train_ensemble_model(X_train, y_train, X_test, y_test)
         results['Ensemble'] = ensemble_acc
@@ -234,15 +285,147 @@ class AdvancedMLModels:
         results['Stacking'] = stacking_acc
 
         best_model_name = max(results, key=results.get)
-        self.best_model = self.models[best_model_name]['model']
+        self.best_model_name = best_model_name
 
         print(f"\nModel Performance Summary:")
         for model_name, accuracy in results.items():
             print(f"{model_name}: {accuracy:.4f}")
         print(f"\nBest Model: {best_model_name} with accuracy {results[best_model_name]:.4f}")
 
+        print(f"\nHyperparameter Search:")
+        for model_name, report in self.search_reports.items():
+            time_to_best = f", best found after {report['time_to_best_seconds']:.1f}s" if report['time_to_best_seconds'] is not None else ""
+            print(f"{model_name} ({report['mode']}): {report['fits']} fits, {report['boosting_rounds']} boosting rounds, "
+                  f"{report['seconds']:.1f}s{time_to_best}, CV accuracy {report['cv_score']:.4f}")
+
+        if self.base_learner_cache is not None:
+            print(f"Ensemble/Stacking base learners: {', '.join(self.base_learner_cache.names)} with "
+                  f"{self.base_learner_cache.fits} fits beyond the searches "
+                  f"({sum(self.base_learner_cache.seconds.values()):.1f}s)")
+
+        total = self.training_report['_total']
+        print(f"\nTraining Schedule: {total['workers']} worker(s) on {total['cores']} physical core(s), "
+              f"{total['wall_seconds']:.1f}s wall for {total['task_seconds']:.1f}s of model training")
+        for family in TRAINING_FAMILIES:
+            report = self.training_report[family]
+            print(f"{family}: {report['wall_seconds']:.1f}s wall, {report['cpu_seconds']:.1f}s CPU on "
+                  f"{report['threads']} thread(s) ({report['cpu_utilization']:.0%} utilization)")
+
         return results, X_test, y_test
 
+    def labels_for(self, data):
+
+        return data['difficulty_classification'].map({
+            label: code for code, label in enumerate(CLASS_LABELS)
+        })
+
+    def update_models(self, data, filepath_prefix="models/", config=None):
+
+        config = {**DEFAULT_UPDATE, **(config or {})}
+        started = time.perf_counter()
+        if not self.load_models(filepath_prefix):
+            return None
+
+        baseline_version = self.model_version
+        split = split_update_days(data, self.training_data['last_date'], config['holdout_days'])
+        if split is None:
+            print(f"Need more than {config['holdout_days']} new day(s) after {self.training_data['last_date']} "
+                  f"to update {baseline_version}")
+            return None
+        update_rows, holdout_rows, update_days, holdout_days = split
+
+        X_update = self.build_feature_matrix(self.get_advanced_features(update_rows))
+        y_update = self.labels_for(update_rows)
+        X_holdout = self.build_feature_matrix(self.get_advanced_features(holdout_rows))
+        y_holdout = self.labels_for(holdout_rows)
+        if y_update.nunique() < len(CLASS_LABELS):
+            print(f"New days {update_days[0]}..{update_days[-1]} do not cover every class; run a full retrain")
+            return None
+
+        print(f"Updating {baseline_version} with {len(update_rows)} rows from {len(update_days)} new day(s), "
+              f"validating on {len(holdout_rows)} rows from {', '.join(holdout_days)}...")
+        baseline = {}
+        candidates = {}
+        for model_name, model_data in self.models.items():
+            model = model_data['model']
+            baseline[model_name] = accuracy_score(y_holdout, model.predict(X_holdout))
+            candidate = continue_training(model, X_update, y_update, config['extra_rounds'], config['extra_trees'])
+            y_pred = candidate.predict(X_holdout)
+            candidates[model_name] = {
+                'model': candidate,
+                'accuracy': accuracy_score(y_holdout, y_pred),
+                'predictions': y_pred,
+                'y_test': y_holdout,
+                'best_params': model_data.get('best_params'),
+                'search': model_data.get('search')
+            }
+
+        serving_model_name = self.best_model_name
+        best_model_name = max(candidates, key=lambda model_name: candidates[model_name]['accuracy'])
+        baseline_best_name = max(baseline, key=baseline.get)
+        required_accuracy = max(baseline[baseline_best_name], baseline[best_model_name]) - config['tolerance']
+        promote = candidates[best_model_name]['accuracy'] >= required_accuracy
+        selection = {
+            'rule': 'best updated model must match the best baseline model and its own baseline on the holdout',
+            'serving_model': serving_model_name,
+            'candidate_model': best_model_name,
+            'candidate_accuracy': candidates[best_model_name]['accuracy'],
+            'baseline_best_model': baseline_best_name,
+            'baseline_best_accuracy': baseline[baseline_best_name],
+            'same_model_baseline_accuracy': baseline[best_model_name],
+            'tolerance': config['tolerance'],
+            'ranking': sorted(candidates, key=lambda model_name: -candidates[model_name]['accuracy'])
+        }
+        seconds = time.perf_counter() - started
+
+        self.models = candidates
+        self.best_model_name = best_model_name
+        self.feature_importance = {
+            model_name: dict(zip(X_update.columns, self.models[model_name]['model'].feature_importances_))
+            for model_name in ['XGBoost', 'LightGBM'] if model_name in self.models
+        }
+        trained = data[data['scheduled_departure_date_local'].astype(str) <= update_days[-1]]
+        self.training_data = {
+            'rows': self.training_data['rows'] + len(update_rows),
+            'fingerprint': data_fingerprint(trained),
+            'first_date': self.training_data['first_date'],
+            'last_date': update_days[-1]
+        }
+        self.update_report = {
+            'base_version': baseline_version,
+            'update_days': update_days,
+            'holdout_days': holdout_days,
+            'update_rows': len(update_rows),
+            'holdout_rows': len(holdout_rows),
+            'baseline_accuracy': baseline,
+            'candidate_accuracy': {model_name: entry['accuracy'] for model_name, entry in candidates.items()},
+            'baseline_model': serving_model_name,
+            'candidate_model': best_model_name,
+            'selection': selection,
+            'promoted': bool(promote),
+            'seconds': round(seconds, 3)
+        }
+        self.training_report = {'incremental': {'wall_seconds': round(seconds, 3), **config}}
+        self.search_reports = {}
+
+        version = self.save_models(filepath_prefix, promote=promote)
+
+        print(f"\nIncremental Update ({seconds:.1f}s):")
+        for model_name in candidates:
+            print(f"{model_name}: holdout accuracy {baseline[model_name]:.4f} -> {candidates[model_name]['accuracy']:.4f}")
+        comparison = (
+            f"{best_model_name} {candidates[best_model_name]['accuracy']:.4f} (selected from {len(candidates)} updated models) "
+            f"vs best baseline {baseline_best_name} {baseline[baseline_best_name]:.4f} and "
+            f"{best_model_name} baseline {baseline[best_model_name]:.4f}"
+        )
+        if promote:
+            print(f"Promoted {version}: {comparison}")
+        else:
+            print(f"Kept {baseline_version}: {comparison}; {version} saved unpromoted")
+            self.models = {}
+            self.load_models(filepath_prefix, baseline_version)
+        return self.update_report
+
     def get_feature_importance_analysis(self):
 
         importance_df = pd.DataFrame(self.feature_importance).fillna(0)
@@ -252,19 +435,13 @@ class AdvancedMLModels:
 
         return importance_df
 
-    def save_models(self, filepath_prefix="models/"):
-
-        import os
-        os.makedirs(filepath_prefix, exist_ok=True)
-
-        for model_name, model_data in self.models.items():
-            joblib.dump(model_data['model'], f"{filepath_prefix}{model_name.lower()}_model.pkl")
-
-        joblib.dump(self.scalers['standard'], f"{filepath_prefix}scaler.pkl")
+    def save_models(self, filepath_prefix="models/", promote=True):
 
-        print(f"Models saved to {filepath_prefix}")
+        self.model_version = ModelRegistry(filepath_prefix).register(self, promote=promote)
+        print(f"Models saved to {filepath_prefix} as version {self.model_version}")
+        return self.model_version
 
-    def load_models(self, filepath_prefix="models/"):
+    def load_models(self, filepath_prefix="models/", version=None):
 
         import os
 
@@ -273,18 +450,34 @@ class AdvancedMLModels:
             return False
 
         try:
-            for model_name in ['XGBoost', 'LightGBM', 'Ensemble', 'Stacking']:
-                model_path = f"{filepath_prefix}{model_name.lower()}_model.pkl"
-                if os.path.exists(model_path):
-                    self.models[model_name] = {
-                        'model': joblib.load(model_path)
-                    }
-
-            scaler_path = f"{filepath_prefix}scaler.pkl"
-            if os.path.exists(scaler_path):
-                self.scalers['standard'] = joblib.load(scaler_path)
-
-            print("Models loaded successfully!")
+            registered = ModelRegistry(filepath_prefix).get(version)
+            if registered is None:
+                print(f"No registered model version in {filepath_prefix}; train and save models first")
+                return False
+
+            manifest = registered.manifest
+            if manifest['feature_set_version'] != FEATURE_SET_VERSION:
+                print(f"Model version {registered.version} was trained on feature set "
+                      f"{manifest['feature_set_version']}, expected {FEATURE_SET_VERSION}; retrain it")
+                return False
+
+            for model_name, info in manifest['models'].items():
+                self.models[model_name] = LazyModelEntry(
+                    lambda model_name=model_name: registered.model(model_name),
+                    accuracy=info['accuracy'], best_params=info['best_params'], search=info['search']
+                )
+                self.model_paths[model_name] = registered.file_path(info['file'])
+
+            scaler = registered.scaler()
+            if scaler is not None:
+                self.scalers['standard'] = scaler
+
+            self.categories = manifest['categories']
+            self.training_data = manifest['training_data']
+            self.best_model_name = manifest['best_model']
+            self.model_version = registered.version
+
+            print(f"Models loaded from version {registered.version}")
             return True
         except Exception as e:
             print(f"Error loading models: {e}")
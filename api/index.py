@@ -1,8 +1,10 @@
 from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 import json
+import hashlib
+import time
 from datetime import datetime
 import os
 
@@ -16,7 +18,7 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 
 templates = Jinja2Templates(directory="templates")
 
-SAMPLE_DATA = {
+FALLBACK_DATA = {
     "total_flights": 8155,
     "avg_delay": 6.8,
     "delayed_pct": 34.8,
@@ -68,43 +70,101 @@ SAMPLE_DATA = {
     ]
 }
 
+DASHBOARD_DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dashboard_data.json")
+ARTIFACT_FORMAT_VERSION = 1
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, max-age=0, must-revalidate"
+
+def compute_content_hash(payload):
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]
+
+def load_dashboard_data(path=DASHBOARD_DATA_PATH):
+    try:
+        with open(path) as f:
+            artifact = json.load(f)
+        if artifact.get("format_version") != ARTIFACT_FORMAT_VERSION:
+            raise ValueError(f"unsupported format_version {artifact.get('format_version')}")
+        return artifact["data"], artifact["content_hash"], False
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Dashboard data artifact unavailable ({e}), serving fallback data")
+        return FALLBACK_DATA, compute_content_hash(FALLBACK_DATA), True
+
+_load_started = time.perf_counter()
+DASHBOARD_DATA, DATA_VERSION, USING_FALLBACK_DATA = load_dashboard_data()
+DATA_LOAD_SECONDS = round(time.perf_counter() - _load_started, 4)
+
+def versioned_response(request: Request, content, immutable=False):
+    etag = f'"{DATA_VERSION}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL
+    }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(content=content, headers=headers)
+
 @app.get("/", response_class=HTMLResponse)
 async def dashboard(request: Request):
 
-    return  + json.dumps(SAMPLE_DATA["destinations"][:8]) +  + json.dumps(SAMPLE_DATA["fleet"]) +
+    return  + json.dumps(DASHBOARD_DATA["destinations"][:8]) +  + json.dumps(DASHBOARD_DATA["fleet"]) +
     return {
-        "total_flights": SAMPLE_DATA["total_flights"],
-        "avg_delay": SAMPLE_DATA["avg_delay"],
-        "delayed_pct": SAMPLE_DATA["delayed_pct"],
-        "avg_difficulty": SAMPLE_DATA["avg_difficulty"],
-        "difficulty_distribution": SAMPLE_DATA["difficulty_distribution"]
+        "total_flights": DASHBOARD_DATA["total_flights"],
+        "avg_delay": DASHBOARD_DATA["avg_delay"],
+        "delayed_pct": DASHBOARD_DATA["delayed_pct"],
+        "avg_difficulty": DASHBOARD_DATA["avg_difficulty"],
+        "difficulty_distribution": DASHBOARD_DATA["difficulty_distribution"]
     }
 
 @app.get("/api/destinations")
-async def get_destinations():
+async def get_destinations(request: Request):
 
-    return SAMPLE_DATA["destinations"]
+    return versioned_response(request, DASHBOARD_DATA["destinations"])
 
 @app.get("/api/fleet")
-async def get_fleet():
+async def get_fleet(request: Request):
 
-    return SAMPLE_DATA["fleet"]
+    return versioned_response(request, DASHBOARD_DATA["fleet"])
 
 @app.get("/api/time-data")
-async def get_time_data():
+async def get_time_data(request: Request):
+
+    return versioned_response(request, DASHBOARD_DATA["time_data"])
+
+@app.get("/api/data")
+async def get_data_version():
+
+    return JSONResponse(
+        content={"version": DATA_VERSION, "url": f"/api/data/{DATA_VERSION}"},
+        headers={"Cache-Control": REVALIDATE_CACHE_CONTROL}
+    )
+
+@app.get("/api/data/{version}")
+async def get_versioned_data(version: str, request: Request):
 
-    return SAMPLE_DATA["time_data"]
+    if version != DATA_VERSION:
+        return JSONResponse(status_code=404, content={"error": f"Unknown data version {version}", "current": DATA_VERSION})
+    return versioned_response(request, DASHBOARD_DATA, immutable=True)
 
 @app.get("/api/health")
 async def health_check():
 
     return {
-        'status': 'healthy',
+        'status': 'degraded' if USING_FALLBACK_DATA else 'healthy',
+        'ready': True,
         'timestamp': datetime.now().isoformat(),
         'framework': 'FastAPI',
         'version': '1.0.0',
         'deployed': 'Vercel',
-        'sample_data': True
+        'sample_data': USING_FALLBACK_DATA,
+        'data_version': DATA_VERSION,
+        'warmup': {'duration_seconds': DATA_LOAD_SECONDS},
+        'row_counts': {
+            'flights': DASHBOARD_DATA.get('total_flights'),
+            'destinations': len(DASHBOARD_DATA.get('destinations', [])),
+            'fleet_types': len(DASHBOARD_DATA.get('fleet', [])),
+            'hours': len(DASHBOARD_DATA.get('time_data', []))
+        }
     }
 
 @app.get("/demo")
@@ -1,39 +1,186 @@
-from flask import Flask, render_template, jsonify, request, redirect, url_for
+from flask import Flask, render_template, jsonify, request, redirect, url_for, Response, stream_with_context
 import pandas as pd
 import sqlite3
 import plotly.graph_objs as go
 import plotly.utils
 import json
 import os
+import threading
 from datetime import datetime, timedelta
 import numpy as np
 
+from dashboard_stream import DashboardStreamHub
+from flight_queries import FLIGHTS_TABLE, SQLiteFlightRepository, parse_flight_query, table_fingerprint
+from flight_export import SQLiteChunkSource, check_export_format, stream_flight_export
+from rollup_cube import CUBE_TABLE, RollupCube
+from quantile_sketch import QuantileSketchStore, parse_percentile_query
+from top_difficult import TopDifficultIndex, parse_top_query, top_difficult_response
+from flight_attribution import FlightExplainer, attach_attributions, parse_explain
+from flight_scoring import FlightScorer, MicroBatcher, model_registry_status, parse_score_request
+from request_coalescing import SingleFlight, coalesce
+from result_cache import ResultCache, cached
+from precompute import PrecomputeScheduler
+from warmup import WarmupState
+from metrics import (
+    CONTENT_TYPE, DATAFRAME_LOAD_SECONDS, METRICS, SQL_QUERY_SECONDS, analyzer_collector, install_flask_metrics,
+    observe_time
+)
+from request_profiling import PROFILE_HEADER, PROFILE_PARAM, PROFILES, install_flask_profiling, profiling_requested, stage
+
 app = Flask(__name__)
 app.secret_key = 'your-secret-key-change-this'
+install_flask_metrics(app)
+install_flask_profiling(app)
 
 DATABASE_PATH = 'skyhack.db'
 
+# Each open /api/stream holds one of the gthread worker's threads (Procfile
+# --threads 8), so at most half of them stream and each stream is recycled
+MAX_STREAMS = 4
+MAX_STREAM_SECONDS = 300
+
 class FlightAnalyzer:
     def __init__(self):
-        self.conn = None
+        self.local = threading.local()
+        self.file_version = None
+        self.data_version = None
+        self.version_lock = threading.Lock()
+        self.single_flight = SingleFlight()
+        self.result_cache = ResultCache()
+        self.flight_repository = SQLiteFlightRepository(self.get_connection)
+        self.cube = None
+        self.cube_version = None
+        self.quantile_store = None
+        self.quantile_version = None
+        self.top_index = None
+        self.top_index_version = None
+        self.top_index_lock = threading.Lock()
+        self.scorer = None
+        self.scorer_version = None
+        self.flight_explainer = FlightExplainer()
 
     def get_connection(self):
-        if not self.conn:
-            self.conn = sqlite3.connect(DATABASE_PATH)
-        return self.conn
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = self.local.conn = sqlite3.connect(DATABASE_PATH)
+        return conn
+
+    def get_data_version(self):
+        try:
+            stat = os.stat(DATABASE_PATH)
+        except OSError:
+            return None
+
+        file_version = (stat.st_mtime_ns, stat.st_size)
+        if file_version != self.file_version:
+            with self.version_lock:
+                if file_version != self.file_version:
+                    self.data_version = self.compute_data_version()
+                    self.file_version = file_version
+        return self.data_version
+
+    def compute_data_version(self):
+        try:
+            with observe_time(SQL_QUERY_SECONDS, 'data_version'):
+                return table_fingerprint(self.get_connection())
+        except sqlite3.Error as e:
+            print(f"Unable to read data version: {e}")
+            return None
 
+    def get_rollup_cube(self):
+        version = self.get_data_version()
+        if version is None:
+            return None
+        if self.cube_version != version:
+            conn = self.get_connection()
+            with observe_time(SQL_QUERY_SECONDS, 'rollup_cube'):
+                cube = RollupCube.from_sqlite(conn)
+                if cube is not None and cube.source_fingerprint != version:
+                    # The flights changed since rollup_cube.py last ran: aggregate
+                    # the live table instead of serving stale totals
+                    print(f"⚠️  {CUBE_TABLE} is out of date with {FLIGHTS_TABLE}; "
+                          "aggregating live until rollup_cube.py is rerun")
+                    cube = RollupCube.from_source(conn)
+            self.cube = cube
+            self.cube_version = version
+        return self.cube
+
+    def get_quantile_store(self):
+        version = self.get_data_version()
+        if version is None:
+            return None
+        if self.quantile_version != version:
+            with observe_time(SQL_QUERY_SECONDS, 'quantile_sketches'):
+                self.quantile_store = QuantileSketchStore.from_sqlite(self.get_connection())
+            self.quantile_version = version
+        return self.quantile_store
+
+    def get_top_index(self):
+        version = self.get_data_version()
+        if version is None:
+            return None
+        if self.top_index_version != version:
+            with self.top_index_lock:
+                if self.top_index_version != version:
+                    with observe_time(SQL_QUERY_SECONDS, 'top_difficult_index'):
+                        if self.top_index is None:
+                            self.top_index = TopDifficultIndex.from_sqlite(self.get_connection())
+                        elif self.top_index.update_from_sqlite(self.get_connection()) is None:
+                            return self.top_index
+                    self.top_index_version = version
+        return self.top_index
+
+    def get_scorer(self):
+        version = self.get_data_version()
+        if version is None:
+            return None
+        if self.scorer_version != version:
+            with observe_time(SQL_QUERY_SECONDS, 'feature_stats'):
+                self.scorer = FlightScorer.from_sqlite(self.get_connection())
+            self.scorer_version = version
+        return self.scorer
+
+    @cached()
+    @coalesce
+    def get_row_counts(self):
+        try:
+            with observe_time(SQL_QUERY_SECONDS, 'row_counts'):
+                flights = self.get_connection().execute(f"SELECT COUNT(*) FROM {FLIGHTS_TABLE}").fetchone()[0]
+        except sqlite3.Error as e:
+            print(f"Unable to count flights: {e}")
+            flights = None
+
+        return {
+            'flights': flights,
+            'rollup_cells': len(self.cube.cells) if self.cube is not None else None,
+            'quantile_sketches': len(self.quantile_store.sketches) if self.quantile_store is not None else None,
+            'top_difficult_index': len(self.top_index) if self.top_index is not None else None
+        }
+
+    @coalesce
     def load_flight_data(self):
         conn = self.get_connection()
         query =
         try:
-            df = pd.read_sql_query(query, conn)
+            with observe_time(DATAFRAME_LOAD_SECONDS, 'sqlite'):
+                df = pd.read_sql_query(query, conn)
             return df
         except Exception as e:
             print(f"Database error: {e}")
             return None
 
+    @cached()
+    @coalesce
     def get_dashboard_stats(self):
         try:
+            cube = self.get_rollup_cube()
+            if cube is not None:
+                stats = cube.dashboard_stats()
+                stats['avg_delay'] = round(stats['avg_delay'], 2)
+                stats['delayed_pct'] = round(stats['delayed_pct'], 2)
+                stats['avg_difficulty'] = round(stats['avg_difficulty'], 3)
+                return stats
+
             df = self.load_flight_data()
             if df is None:
                 print("No data loaded from database")
@@ -52,7 +199,13 @@ class FlightAnalyzer:
             print(f"Error in get_dashboard_stats: {e}")
             return None
 
+    @cached()
+    @coalesce
     def get_destination_analysis(self):
+        cube = self.get_rollup_cube()
+        if cube is not None:
+            return cube.difficulty_breakdown('destination', ['difficulty_score', 'departure_delay_minutes'])
+
         df = self.load_flight_data()
         if df is None:
             return None
@@ -65,7 +218,13 @@ class FlightAnalyzer:
 
         return dest_analysis.reset_index()
 
+    @cached()
+    @coalesce
     def get_fleet_analysis(self):
+        cube = self.get_rollup_cube()
+        if cube is not None:
+            return cube.difficulty_breakdown('fleet_type', ['difficulty_score', 'total_passengers'])
+
         df = self.load_flight_data()
         if df is None:
             return None
@@ -78,16 +237,24 @@ class FlightAnalyzer:
 
         return fleet_analysis.reset_index()
 
+    @cached()
+    @coalesce
     def get_time_analysis(self):
+        cube = self.get_rollup_cube()
+        if cube is not None:
+            return cube.difficulty_breakdown('departure_hour', ['departure_delay_minutes'], limit=None, sort=False)
+
         df = self.load_flight_data()
         if df is None:
             return None
 
+        # load_flight_data's frame is shared by concurrent callers: add the
+        # hour column to a new frame rather than the shared one
         try:
-            df['departure_hour'] = pd.to_datetime(df['scheduled_departure_datetime_local'], errors='coerce').dt.hour
+            df = df.assign(departure_hour=pd.to_datetime(df['scheduled_departure_datetime_local'], errors='coerce').dt.hour)
             df = df.dropna(subset=['departure_hour'])
         except:
-            df['departure_hour'] = np.random.randint(6, 23, len(df))
+            df = df.assign(departure_hour=np.random.randint(6, 23, len(df)))
 
         time_analysis = df.groupby('departure_hour').agg({
             'difficulty_classification': lambda x: (x == 'Difficult').sum(),
@@ -96,6 +263,8 @@ class FlightAnalyzer:
 
         return time_analysis
 
+    @cached()
+    @coalesce
     def create_classification_chart(self):
         df = self.load_flight_data()
         if df is None:
@@ -116,8 +285,11 @@ class FlightAnalyzer:
             showlegend=True
         )
 
-        return json.dumps(fig.to_dict(), cls=plotly.utils.PlotlyJSONEncoder)
+        with stage('json'):
+            return json.dumps(fig.to_dict(), cls=plotly.utils.PlotlyJSONEncoder)
 
+    @cached()
+    @coalesce
     def create_destination_chart(self):
         dest_data = self.get_destination_analysis()
         if dest_data is None:
@@ -139,8 +311,11 @@ class FlightAnalyzer:
             height=400
         )
 
-        return json.dumps(fig.to_dict(), cls=plotly.utils.PlotlyJSONEncoder)
+        with stage('json'):
+            return json.dumps(fig.to_dict(), cls=plotly.utils.PlotlyJSONEncoder)
 
+    @cached()
+    @coalesce
     def create_time_chart(self):
         time_data = self.get_time_analysis()
         if time_data is None:
@@ -164,9 +339,82 @@ class FlightAnalyzer:
             height=400
         )
 
-        return json.dumps(fig.to_dict(), cls=plotly.utils.PlotlyJSONEncoder)
+        with stage('json'):
+            return json.dumps(fig.to_dict(), cls=plotly.utils.PlotlyJSONEncoder)
+
+    @cached()
+    @coalesce
+    def list_flights(self, query):
+        return self.flight_repository.list_flights(query)
+
+    def explain_flights(self, flights, top):
+        attributions = self.flight_explainer.explain_sqlite(
+            self.get_connection(), [flight['flight_id'] for flight in flights], FLIGHTS_TABLE, top
+        )
+        return attach_attributions(flights, attributions)
+
+    def export_flights(self, query, export_format='csv', columns=None):
+        check_export_format(export_format)
+        source = SQLiteChunkSource(DATABASE_PATH, query, columns)
+        return stream_flight_export(source, export_format)
+
+    @cached()
+    @coalesce
+    def get_percentiles(self, query):
+        store = self.get_quantile_store()
+        if store is None:
+            return None
+        return store.percentiles(
+            query['metric'], query['quantiles'], query['destinations'], query['hours'], query['group_by']
+        )
+
+    @cached()
+    @coalesce
+    def get_top_difficult(self, query):
+        index = self.get_top_index()
+        if index is None:
+            return None
+        return top_difficult_response(index, self.flight_repository, query)
+
+    def score_flights(self, records):
+        scorer = self.get_scorer()
+        if scorer is None:
+            raise RuntimeError('Online scoring is unavailable (FeatureStats or ClassifiedFlights missing)')
+        return scorer.score(records)
+
+    @cached()
+    @coalesce
+    def get_stream_snapshot(self):
+        stats = self.get_dashboard_stats()
+        if stats is None:
+            return None
+
+        dest_data = self.get_destination_analysis()
+        fleet_data = self.get_fleet_analysis()
+        charts = {
+            'classification_chart': self.create_classification_chart(),
+            'destination_chart': self.create_destination_chart(),
+            'time_chart': self.create_time_chart()
+        }
+
+        snapshot = {
+            'stats': stats,
+            'destinations': dest_data.to_dict('records') if dest_data is not None else [],
+            'fleet': fleet_data.to_dict('records') if fleet_data is not None else []
+        }
+        for name, chart_json in charts.items():
+            if chart_json:
+                snapshot[name] = json.loads(chart_json)
+        return snapshot
 
 analyzer = FlightAnalyzer()
+stream_hub = DashboardStreamHub(
+    analyzer.get_stream_snapshot, analyzer.get_data_version,
+    max_streams=MAX_STREAMS, max_stream_seconds=MAX_STREAM_SECONDS
+)
+score_batcher = MicroBatcher(analyzer.score_flights)
+precompute_scheduler = PrecomputeScheduler(analyzer)
+METRICS.add_collector(analyzer_collector(analyzer))
 
 @app.route('/')
 def dashboard():
@@ -224,17 +472,162 @@ def get_fleet():
     else:
         return jsonify({'error': 'Unable to load fleet data'}), 500
 
+@app.route('/api/flights')
+def get_flights():
+    try:
+        query = parse_flight_query(request.args)
+        top = parse_explain(request.args)
+        page = analyzer.list_flights(query)
+        if top:
+            page = {**page, 'flights': analyzer.explain_flights(page['flights'], top)}
+        return jsonify(page)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error in get_flights: {e}")
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
+
+@app.route('/api/export')
+def export_flights():
+    try:
+        query = parse_flight_query(request.args)
+        body, mimetype, filename = analyzer.export_flights(
+            query, request.args.get('format', 'csv'), request.args.get('columns')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error in export_flights: {e}")
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
+
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+@app.route('/api/percentiles')
+def get_percentiles():
+    try:
+        query = parse_percentile_query(request.args)
+        groups = analyzer.get_percentiles(query)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error in get_percentiles: {e}")
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
+
+    if groups is None:
+        return jsonify({'error': 'Quantile sketches not built (run python quantile_sketch.py)'}), 503
+    return jsonify({'metric': query['metric'], 'group_by': query['group_by'], 'groups': groups})
+
+@app.route('/api/top-difficult')
+def get_top_difficult():
+    try:
+        query = parse_top_query(request.args)
+        top_flights = analyzer.get_top_difficult(query)
+        if top_flights is not None:
+            return jsonify(top_flights)
+        else:
+            return jsonify({'error': 'Unable to load flight data'}), 500
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error in get_top_difficult: {e}")
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
+
+@app.route('/api/score', methods=['POST'])
+def score_flights():
+    try:
+        records = parse_score_request(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    if analyzer.get_scorer() is None:
+        return jsonify({'error': 'Online scoring is unavailable'}), 503
+
+    try:
+        flights = score_batcher.submit(records).result(timeout=30)
+        return jsonify({'count': len(flights), 'flights': flights})
+    except Exception as e:
+        print(f"Error in score_flights: {e}")
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
+
+@app.route('/api/models')
+def list_models():
+    try:
+        return jsonify(model_registry_status(analyzer.get_scorer()))
+    except Exception as e:
+        print(f"Error in list_models: {e}")
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
+
+@app.route('/api/stream')
+def stream():
+    if not stream_hub.has_capacity():
+        # The dashboard falls back to polling when the stream is refused
+        return jsonify({'error': 'Too many open update streams'}), 503
+    return Response(
+        stream_with_context(stream_hub.stream()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @app.route('/about')
 def about():
     return render_template('about.html')
 
 @app.route('/api/health')
 def health_check():
+    ready = warmup_state.ready.is_set()
+    database_exists = os.path.exists(DATABASE_PATH)
+    warmup = warmup_state.get_status()
+
+    if not ready:
+        status = 'warming_up'
+    elif not database_exists or warmup['errors']:
+        status = 'degraded'
+    else:
+        status = 'healthy'
+
     return jsonify({
-        'status': 'healthy',
+        'status': status,
+        'ready': ready,
         'timestamp': datetime.now().isoformat(),
-        'database_exists': os.path.exists(DATABASE_PATH)
-    })
+        'database_exists': database_exists,
+        'data_version': analyzer.get_data_version(),
+        'row_counts': analyzer.get_row_counts() if ready else None,
+        'warmup': warmup,
+        'cache': analyzer.result_cache.get_status(),
+        'coalescing': analyzer.single_flight.get_status(),
+        'precompute': precompute_scheduler.get_status()
+    }), 200 if ready else 503
+
+@app.route('/metrics')
+def metrics():
+    return Response(METRICS.render(), content_type=CONTENT_TYPE)
+
+@app.route('/api/profiles/<profile_id>')
+def get_profile(profile_id):
+    if not profiling_requested(request.headers.get(PROFILE_HEADER) or request.args.get(PROFILE_PARAM)):
+        return jsonify({'error': 'Profiling is disabled or the profile token is invalid'}), 403
+
+    profile = PROFILES.get(profile_id)
+    if profile is None:
+        return jsonify({'error': 'Profile not found'}), 404
+    if request.args.get('format') == 'json':
+        return jsonify(profile)
+    return Response(profile['folded'], mimetype='text/plain')
+
+warmup_state = WarmupState()
+warmup_state.start([
+    ('rollup_cube', analyzer.get_rollup_cube),
+    ('quantile_sketches', analyzer.get_quantile_store),
+    ('top_difficult_index', analyzer.get_top_index),
+    ('scoring_models', analyzer.get_scorer),
+    ('aggregates', precompute_scheduler.refresh_all),
+    ('flight_pages', lambda: [analyzer.list_flights(parse_flight_query({'sort': sort})) for sort in ('score', 'departure')]),
+    ('row_counts', analyzer.get_row_counts)
+], on_ready=lambda: precompute_scheduler.start(refresh_now=False))
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=8000)
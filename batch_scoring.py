@@ -0,0 +1,310 @@
+import argparse
+import multiprocessing
+import resource
+import sqlite3
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from feature_store import FEATURE_STORE_DIR
+from flight_queries import FLIGHTS_TABLE
+from ml_features import (
+    CATEGORICAL_FEATURES, CLASS_LABELS, DERIVED_FEATURE_COLUMNS, FEATURE_SET_VERSION,
+    FEATURE_SOURCE_COLUMNS, NUMERIC_FEATURES, build_feature_matrix, open_feature_store, served_features
+)
+from model_registry import ModelRegistry
+
+PREDICTIONS_TABLE = 'FlightPredictions'
+STAGING_TABLE = PREDICTIONS_TABLE + '_staging'
+DEFAULT_CHUNK_ROWS = 20000
+ENGINES = ['native', 'compiled']
+
+KEY_COLUMNS = [
+    'company_id', 'flight_number', 'scheduled_departure_date_local',
+    'scheduled_departure_station_code', 'scheduled_arrival_station_code'
+]
+PROBABILITY_COLUMNS = [f"probability_{label.lower()}" for label in CLASS_LABELS]
+
+_worker = {}
+
+def limit_model_threads(model, threads):
+    for _, estimator in getattr(model, 'estimators', None) or getattr(model, 'steps', None) or []:
+        limit_model_threads(estimator, threads)
+    if hasattr(model, 'get_params') and 'n_jobs' in model.get_params(deep=False):
+        model.set_params(n_jobs=threads)
+    return model
+
+class NativeModel:
+    def __init__(self, model, name, version, categories):
+        self.model = model
+        self.name = name
+        self.version = version
+        self.categories = categories
+        self.classes_ = np.arange(len(CLASS_LABELS))
+
+    def predict_proba(self, X):
+        return self.model.predict_proba(X)
+
+def load_scoring_model(models_dir, version=None, engine='native', threads=None):
+    registered = ModelRegistry(models_dir).get(version)
+    if registered is None:
+        raise ValueError(f"No model version registered in {models_dir}")
+    manifest = registered.manifest
+    if manifest['feature_set_version'] != FEATURE_SET_VERSION:
+        raise ValueError(
+            f"Model version {registered.version} was trained on feature set {manifest['feature_set_version']}, "
+            f"expected {FEATURE_SET_VERSION}"
+        )
+
+    if engine == 'compiled':
+        from tree_inference import load_compiled_model
+
+        model = load_compiled_model(models_dir, registered.version)
+        if model is None:
+            reason = manifest.get('compiled_skipped')
+            raise ValueError(
+                f"Model version {registered.version} has no compiled model" + (f" ({reason})" if reason else "")
+            )
+        return model
+
+    model = registered.model(manifest['best_model'])
+    if threads:
+        limit_model_threads(model, threads)
+    return NativeModel(model, manifest['best_model'], registered.version, manifest['categories'])
+
+def required_source_columns():
+    return FEATURE_SOURCE_COLUMNS + [column for column in NUMERIC_FEATURES if column not in DERIVED_FEATURE_COLUMNS]
+
+def missing_source_columns(available):
+    return [column for column in required_source_columns() if column not in available]
+
+def source_columns(conn, table=FLIGHTS_TABLE):
+    available = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+    if not available:
+        raise ValueError(f"Table {table} not found")
+
+    missing = missing_source_columns(available)
+    if missing:
+        raise ValueError(f"Table {table} is missing feature columns: {', '.join(missing)}")
+
+    wanted = set(required_source_columns() + CATEGORICAL_FEATURES + KEY_COLUMNS)
+    return [column for column in available if column in wanted]
+
+def rowid_ranges(conn, chunk_rows, table=FLIGHTS_TABLE, after_rowid=0):
+    cursor = conn.execute(f"SELECT rowid FROM {table} WHERE rowid > ? ORDER BY rowid", (after_rowid,))
+    ranges = []
+    while True:
+        rows = cursor.fetchmany(chunk_rows)
+        if not rows:
+            break
+        ranges.append((rows[0][0], rows[-1][0]))
+    return ranges
+
+def _init_worker(db_path, models_dir, version, engine, threads, columns, table, feature_store_dir):
+    from threadpoolctl import threadpool_limits
+
+    threadpool_limits(limits=threads)
+    _worker['model'] = load_scoring_model(models_dir, version, engine, threads)
+    _worker['feature_store'] = open_feature_store(feature_store_dir)
+    _worker['conn'] = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    _worker['query'] = f"SELECT rowid AS source_rowid, {', '.join(columns)} FROM {table} WHERE rowid BETWEEN ? AND ?"
+
+def score_range(first_rowid, last_rowid):
+    model = _worker['model']
+    started = time.perf_counter()
+    chunk = pd.read_sql_query(_worker['query'], _worker['conn'], params=(first_rowid, last_rowid))
+    read_seconds = time.perf_counter() - started
+
+    feature_store = _worker['feature_store']
+    served = feature_store.stats['rows_served'] if feature_store is not None else 0
+    started = time.perf_counter()
+    X = build_feature_matrix(served_features(chunk, feature_store), model.categories)
+    feature_seconds = time.perf_counter() - started
+    served = feature_store.stats['rows_served'] - served if feature_store is not None else 0
+
+    started = time.perf_counter()
+    probabilities = np.asarray(model.predict_proba(X), dtype=np.float32)
+    predict_seconds = time.perf_counter() - started
+
+    return {
+        'keys': chunk[['source_rowid'] + [column for column in KEY_COLUMNS if column in chunk.columns]],
+        'probabilities': probabilities,
+        'predicted': np.asarray(model.classes_)[probabilities.argmax(axis=1)],
+        'features_served': served,
+        'seconds': {'read': read_seconds, 'features': feature_seconds, 'predict': predict_seconds},
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    }
+
+class BatchScorer:
+    def __init__(self, db_path, models_dir='models/', version=None, engine='native', workers=None,
+                 chunk_rows=DEFAULT_CHUNK_ROWS, table=FLIGHTS_TABLE, feature_store_dir=FEATURE_STORE_DIR):
+        from training_scheduler import physical_cores
+
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine '{engine}', expected one of {', '.join(ENGINES)}")
+        self.db_path = db_path
+        self.models_dir = models_dir
+        self.version = version or ModelRegistry(models_dir).current_version()
+        if self.version is None:
+            raise ValueError(f"No model version registered in {models_dir}")
+        self.engine = engine
+        self.cores = physical_cores()
+        self.workers = workers or self.cores
+        self.chunk_rows = chunk_rows
+        self.table = table
+        self.feature_store_dir = feature_store_dir
+        self.report = {}
+
+    def create_staging_table(self, conn, key_columns):
+        declared = {row[1]: row[2] or 'TEXT' for row in conn.execute(f"PRAGMA table_info({self.table})")}
+        conn.execute(f"DROP TABLE IF EXISTS {STAGING_TABLE}")
+        conn.execute(
+            f"CREATE TABLE {STAGING_TABLE} (" + ', '.join(
+                ['source_rowid INTEGER PRIMARY KEY']
+                + [f"{column} {declared[column]}" for column in key_columns]
+                + ['model_version TEXT', 'model_name TEXT', 'predicted_class TEXT']
+                + [f"{column} REAL" for column in PROBABILITY_COLUMNS]
+                + ['scored_at TEXT']
+            ) + ")"
+        )
+        conn.commit()
+
+    def write_chunk(self, conn, result, model_name, scored_at):
+        keys = result['keys']
+        key_rows = zip(*[keys[column].tolist() for column in keys.columns])
+        labels = [CLASS_LABELS[int(code)] for code in result['predicted']]
+        probabilities = result['probabilities'].astype(float).tolist()
+        placeholders = ', '.join(['?'] * (len(keys.columns) + 4 + len(PROBABILITY_COLUMNS)))
+        conn.executemany(
+            f"INSERT INTO {STAGING_TABLE} VALUES ({placeholders})",
+            (
+                (*key_row, self.version, model_name, label, *row, scored_at)
+                for key_row, label, row in zip(key_rows, labels, probabilities)
+            )
+        )
+        conn.commit()
+
+    def publish(self, conn):
+        conn.execute("BEGIN")
+        conn.execute(f"DROP TABLE IF EXISTS {PREDICTIONS_TABLE}")
+        conn.execute(f"ALTER TABLE {STAGING_TABLE} RENAME TO {PREDICTIONS_TABLE}")
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_flight_predictions_flight ON {PREDICTIONS_TABLE} "
+            "(company_id, flight_number, scheduled_departure_date_local)"
+        )
+        conn.commit()
+
+    def run(self):
+        started = time.perf_counter()
+        conn = sqlite3.connect(f"file:{self.db_path}?mode=rw", uri=True)
+        try:
+            columns = source_columns(conn, self.table)
+            key_columns = [column for column in KEY_COLUMNS if column in columns]
+            self.create_staging_table(conn, key_columns)
+
+            threads = max(1, self.cores // self.workers)
+            initargs = (
+                self.db_path, self.models_dir, self.version, self.engine, threads, columns, self.table, self.feature_store_dir
+            )
+            model_name = ModelRegistry(self.models_dir).manifest(self.version)['best_model']
+            scored_at = datetime.now().isoformat()
+
+            totals = {'rows': 0, 'chunks': 0, 'features_served': 0, 'read': 0.0, 'features': 0.0, 'predict': 0.0, 'write': 0.0}
+            worker_rss = 0.0
+
+            def consume(result):
+                nonlocal worker_rss
+                write_started = time.perf_counter()
+                self.write_chunk(conn, result, model_name, scored_at)
+                totals['write'] += time.perf_counter() - write_started
+                totals['rows'] += len(result['keys'])
+                totals['chunks'] += 1
+                totals['features_served'] += result['features_served']
+                for stage, seconds in result['seconds'].items():
+                    totals[stage] += seconds
+                worker_rss = max(worker_rss, result['peak_rss_mb'])
+
+            ranges = rowid_ranges(conn, self.chunk_rows, self.table)
+            if self.workers == 1:
+                _init_worker(*initargs)
+                for first_rowid, last_rowid in ranges:
+                    consume(score_range(first_rowid, last_rowid))
+            else:
+                context = multiprocessing.get_context('spawn')
+                with ProcessPoolExecutor(max_workers=self.workers, mp_context=context,
+                                         initializer=_init_worker, initargs=initargs) as executor:
+                    pending = deque()
+                    for first_rowid, last_rowid in ranges:
+                        pending.append(executor.submit(score_range, first_rowid, last_rowid))
+                        if len(pending) >= self.workers * 2:
+                            consume(pending.popleft().result())
+                    while pending:
+                        consume(pending.popleft().result())
+
+            self.publish(conn)
+        finally:
+            conn.close()
+
+        wall = time.perf_counter() - started
+        self.report = {
+            'version': self.version,
+            'model': model_name,
+            'engine': self.engine,
+            'workers': self.workers,
+            'chunk_rows': self.chunk_rows,
+            'rows': totals['rows'],
+            'chunks': totals['chunks'],
+            'feature_rows_served': totals['features_served'],
+            'wall_seconds': round(wall, 3),
+            'rows_per_second': round(totals['rows'] / wall, 1) if wall else None,
+            'stage_seconds': {stage: round(totals[stage], 3) for stage in ('read', 'features', 'predict', 'write')},
+            'peak_rss_mb': {
+                'writer': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+                'worker': round(worker_rss, 1)
+            }
+        }
+        return self.report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score every flight with the current model version into a predictions table")
+    parser.add_argument('--db', default='skyhack.db')
+    parser.add_argument('--models-dir', default='models/')
+    parser.add_argument('--version', help="Model version to score with (default: the current version)")
+    parser.add_argument('--engine', choices=ENGINES, default='native',
+                        help="native uses the pickled estimators (fastest for large batches); compiled uses the NumPy predictor")
+    parser.add_argument('--workers', type=int, help="Worker processes (default: physical cores)")
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument('--feature-store-dir', default=FEATURE_STORE_DIR,
+                        help="Read derived features stored by training from here ('' computes them all in memory)")
+    args = parser.parse_args(argv)
+
+    try:
+        scorer = BatchScorer(
+            args.db, args.models_dir, args.version, args.engine, args.workers, args.chunk_rows,
+            feature_store_dir=args.feature_store_dir
+        )
+        print(f"🚀 Scoring {FLIGHTS_TABLE} with model version {scorer.version} "
+              f"({args.engine}, {scorer.workers} worker(s), {args.chunk_rows} rows per chunk)...")
+        report = scorer.run()
+    except (ValueError, OSError, sqlite3.Error) as e:
+        print(f"❌ {e}")
+        return 1
+
+    stages = report['stage_seconds']
+    print(f"✅ Wrote {report['rows']} predictions from {report['model']} to {PREDICTIONS_TABLE} "
+          f"in {report['wall_seconds']:.2f}s ({report['rows_per_second']:.0f} rows/s)")
+    print(f"   read {stages['read']:.2f}s | features {stages['features']:.2f}s | "
+          f"predict {stages['predict']:.2f}s | write {stages['write']:.2f}s")
+    print(f"   features: {report['feature_rows_served']} of {report['rows']} flights read from the feature store")
+    print(f"   peak memory: writer {report['peak_rss_mb']['writer']:.0f} MB, worker {report['peak_rss_mb']['worker']:.0f} MB")
+    if report['rows_per_second']:
+        print(f"   ~{10_000_000 / report['rows_per_second'] / 60:.1f} min per 10M flights at this rate")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
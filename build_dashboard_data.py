@@ -0,0 +1,136 @@
+import sqlite3
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime
+
+DATABASE_PATH = 'skyhack.db'
+ARTIFACT_PATH = os.path.join('api', 'dashboard_data.json')
+ARTIFACT_FORMAT_VERSION = 1
+
+def compute_content_hash(payload):
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]
+
+class DashboardDataBuilder:
+    def __init__(self, db_path=DATABASE_PATH):
+        self.db_path = db_path
+
+    def build_stats(self, cursor):
+        cursor.execute(
+            "SELECT COUNT(*), AVG(departure_delay_minutes), "
+            "AVG(CASE WHEN is_delayed = 1 THEN 1.0 ELSE 0.0 END) * 100, "
+            "AVG(difficulty_score) "
+            "FROM ClassifiedFlights"
+        )
+        total_flights, avg_delay, delayed_pct, avg_difficulty = cursor.fetchone()
+
+        cursor.execute(
+            "SELECT difficulty_classification, COUNT(*) FROM ClassifiedFlights "
+            "GROUP BY difficulty_classification ORDER BY COUNT(*) DESC"
+        )
+        distribution = {label: count for label, count in cursor.fetchall()}
+
+        return {
+            'total_flights': total_flights,
+            'avg_delay': round(avg_delay or 0, 1),
+            'delayed_pct': round(delayed_pct or 0, 1),
+            'avg_difficulty': round(avg_difficulty or 0, 3),
+            'difficulty_distribution': distribution
+        }
+
+    def build_destinations(self, cursor, limit=15):
+        cursor.execute(
+            "SELECT scheduled_arrival_station_code, "
+            "SUM(CASE WHEN difficulty_classification = 'Difficult' THEN 1 ELSE 0 END) AS difficult, "
+            "AVG(difficulty_score), AVG(departure_delay_minutes) "
+            "FROM ClassifiedFlights GROUP BY scheduled_arrival_station_code "
+            "ORDER BY difficult DESC LIMIT ?",
+            (limit,)
+        )
+        return [
+            {'dest': dest, 'difficult': difficult, 'score': round(score or 0, 3), 'delay': round(delay or 0, 1)}
+            for dest, difficult, score, delay in cursor.fetchall()
+        ]
+
+    def build_fleet(self, cursor, limit=15):
+        cursor.execute(
+            "SELECT fleet_type, "
+            "SUM(CASE WHEN difficulty_classification = 'Difficult' THEN 1 ELSE 0 END) AS difficult, "
+            "AVG(difficulty_score), AVG(total_passengers) "
+            "FROM ClassifiedFlights GROUP BY fleet_type "
+            "ORDER BY difficult DESC LIMIT ?",
+            (limit,)
+        )
+        return [
+            {'type': fleet, 'difficult': difficult, 'score': round(score or 0, 3), 'passengers': int(round(passengers or 0))}
+            for fleet, difficult, score, passengers in cursor.fetchall()
+        ]
+
+    def build_time_data(self, cursor):
+        cursor.execute(
+            "SELECT CAST(strftime('%H', scheduled_departure_datetime_local) AS INTEGER) AS hour, "
+            "SUM(CASE WHEN difficulty_classification = 'Difficult' THEN 1 ELSE 0 END), "
+            "AVG(departure_delay_minutes) "
+            "FROM ClassifiedFlights "
+            "WHERE strftime('%H', scheduled_departure_datetime_local) IS NOT NULL "
+            "GROUP BY hour ORDER BY hour"
+        )
+        return [
+            {'hour': hour, 'difficult': difficult, 'delay': round(delay or 0, 1)}
+            for hour, difficult, delay in cursor.fetchall()
+        ]
+
+    def build(self):
+        if not os.path.exists(self.db_path):
+            raise FileNotFoundError(f"Database {self.db_path} not found")
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            cursor = conn.cursor()
+            payload = self.build_stats(cursor)
+            payload['destinations'] = self.build_destinations(cursor)
+            payload['fleet'] = self.build_fleet(cursor)
+            payload['time_data'] = self.build_time_data(cursor)
+        finally:
+            conn.close()
+
+        return {
+            'format_version': ARTIFACT_FORMAT_VERSION,
+            'content_hash': compute_content_hash(payload),
+            'generated_at': datetime.now().isoformat(),
+            'source': os.path.basename(self.db_path),
+            'data': payload
+        }
+
+    def write(self, artifact_path=ARTIFACT_PATH):
+        artifact = self.build()
+
+        directory = os.path.dirname(artifact_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp_path = artifact_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(artifact, f, separators=(',', ':'))
+        os.replace(tmp_path, artifact_path)
+
+        return artifact
+
+if __name__ == "__main__":
+    db_path = sys.argv[1] if len(sys.argv) > 1 else DATABASE_PATH
+    artifact_path = sys.argv[2] if len(sys.argv) > 2 else ARTIFACT_PATH
+
+    print(f"📦 Building dashboard data artifact from {db_path}...")
+    try:
+        artifact = DashboardDataBuilder(db_path).write(artifact_path)
+    except (FileNotFoundError, sqlite3.Error) as e:
+        print(f"❌ Failed to build dashboard data: {e}")
+        sys.exit(1)
+
+    print(f"✅ Wrote {artifact_path}")
+    print(f"🔑 Content hash: {artifact['content_hash']}")
+    print(f"📊 {artifact['data']['total_flights']} flights, "
+          f"{len(artifact['data']['destinations'])} destinations, "
+          f"{len(artifact['data']['fleet'])} fleet types")
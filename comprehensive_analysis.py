@@ -14,8 +14,9 @@ from advanced_ml_models import AdvancedMLModels
 from reinforcement_learning import RLResourceAllocator
 
 class ComprehensiveFlightAnalyzer:
-    def __init__(self, db_path="skyhack.db"):
+    def __init__(self, db_path="skyhack.db", incremental=False):
         self.db_path = db_path
+        self.incremental = incremental
         self.conn = None
         self.data = None
         self.ml_models = AdvancedMLModels()
@@ -29,6 +30,12 @@ class ComprehensiveFlightAnalyzer:
         print("🤖 ADVANCED MACHINE LEARNING MODEL TRAINING")
         print("="*50)
 
+        if self.incremental:
+            update = self.ml_models.update_models(self.data, "models/")
+            if update is not None:
+                return update['candidate_accuracy']
+            print("Incremental update not possible; retraining all models")
+
         results, X_test, y_test = self.ml_models.train_all_models(self.data)
 
         print("\nMODEL PERFORMANCE COMPARISON:")
@@ -267,7 +274,7 @@ class ComprehensiveFlightAnalyzer:
         print("📤 EXPORTING COMPREHENSIVE RESULTS")
         print("="*50)
 
-        enhanced_data = self.ml_models.prepare_advanced_features(self.data)
+        enhanced_data = self.ml_models.get_advanced_features(self.data)
         enhanced_data.to_csv('test_arnav_enhanced.csv', index=False)
         print("✅ Enhanced dataset exported as 'test_arnav_enhanced.csv'")
 
@@ -275,9 +282,14 @@ class ComprehensiveFlightAnalyzer:
             performance_summary = []
             for model_name, model_data in self.ml_models.models.items():
                 if 'accuracy' in model_data:
+                    search = model_data.get('search') or {}
                     performance_summary.append({
                         'Model': model_name,
-                        'Accuracy': model_data['accuracy']
+                        'Accuracy': model_data['accuracy'],
+                        'Search': search.get('mode'),
+                        'Search Fits': search.get('fits'),
+                        'Search Seconds': search.get('seconds'),
+                        'Time To Best Seconds': search.get('time_to_best_seconds')
                     })
 
             performance_df = pd.DataFrame(performance_summary)
@@ -325,5 +337,7 @@ class ComprehensiveFlightAnalyzer:
         print("• Monitor performance and iterate")
 
 if __name__ == "__main__":
-    analyzer = ComprehensiveFlightAnalyzer()
+    import sys
+
+    analyzer = ComprehensiveFlightAnalyzer(incremental='--incremental' in sys.argv[1:])
     analyzer.run_comprehensive_analysis()
@@ -0,0 +1,201 @@
+import asyncio
+import json
+import queue
+import threading
+import time
+
+HEARTBEAT = ': keepalive\n\n'
+RETRY_MS = 5000
+
+def _json_default(value):
+    if hasattr(value, 'item'):
+        return value.item()
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+def format_sse(data, event=None, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    if event:
+        lines.append(f'event: {event}')
+    lines.append('data: ' + json.dumps(data, separators=(',', ':'), default=_json_default))
+    return '\n'.join(lines) + '\n\n'
+
+def diff_snapshots(old, new):
+    changed = {key: value for key, value in new.items() if old.get(key) != value}
+    removed = [key for key in old if key not in new]
+    return changed, removed
+
+class QueueSubscriber:
+    def __init__(self, maxsize=16):
+        self.queue = queue.Queue(maxsize=maxsize)
+
+    def put(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except queue.Full:
+            pass
+
+class AsyncSubscriber:
+    def __init__(self, loop, maxsize=16):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def put(self, message):
+        self.loop.call_soon_threadsafe(self._put, message)
+
+    def _put(self, message):
+        if not self.queue.full():
+            self.queue.put_nowait(message)
+
+class DashboardStreamHub:
+    def __init__(self, snapshot_fn, version_fn, poll_interval=5.0, heartbeat_interval=15.0,
+                 max_streams=None, max_stream_seconds=None):
+        self.snapshot_fn = snapshot_fn
+        self.version_fn = version_fn
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.max_streams = max_streams
+        self.max_stream_seconds = max_stream_seconds
+        self.open_streams = 0
+        self.version = None
+        self.snapshot = {}
+        self.subscribers = set()
+        self.lock = threading.Lock()
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.stats = {'computations': 0, 'events_published': 0}
+
+    def _refresh_locked(self):
+        version = self.version_fn()
+        if version == self.version:
+            return None
+
+        snapshot = self.snapshot_fn()
+        if snapshot is None:
+            return None
+
+        changed, removed = diff_snapshots(self.snapshot, snapshot)
+        base = self.version
+        self.version = version
+        self.snapshot = snapshot
+        self.stats['computations'] += 1
+
+        if base is None or not (changed or removed):
+            return None
+        return {'base': base, 'version': version, 'changed': changed, 'removed': removed}
+
+    def check_for_updates(self):
+        with self.lock:
+            diff = self._refresh_locked()
+            subscribers = list(self.subscribers)
+
+        if diff is None:
+            return False
+
+        message = format_sse(diff, event='diff', event_id=diff['version'])
+        for subscriber in subscribers:
+            subscriber.put(message)
+        self.stats['events_published'] += 1
+        return True
+
+    def subscribe(self, subscriber):
+        with self.lock:
+            if self.version is None:
+                self._refresh_locked()
+            self.subscribers.add(subscriber)
+            message = format_sse(
+                {'version': self.version, 'sections': self.snapshot},
+                event='snapshot',
+                event_id=self.version
+            )
+        self._ensure_running()
+        return message
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            self.subscribers.discard(subscriber)
+
+    def _ensure_running(self):
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, name='dashboard-stream-hub', daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while not self.stop_event.wait(self.poll_interval):
+            try:
+                self.check_for_updates()
+            except Exception as e:
+                print(f"Stream hub refresh error: {e}")
+
+    def stop(self):
+        self.stop_event.set()
+
+    def get_status(self):
+        with self.lock:
+            return {
+                'version': self.version,
+                'subscribers': len(self.subscribers),
+                'open_streams': self.open_streams,
+                'max_streams': self.max_streams,
+                'computations': self.stats['computations'],
+                'events_published': self.stats['events_published']
+            }
+
+    def has_capacity(self):
+        with self.lock:
+            return self.max_streams is None or self.open_streams < self.max_streams
+
+    def _open_stream(self):
+        with self.lock:
+            if self.max_streams is not None and self.open_streams >= self.max_streams:
+                return False
+            self.open_streams += 1
+            return True
+
+    def _close_stream(self):
+        with self.lock:
+            self.open_streams -= 1
+
+    def stream(self):
+        # Each synchronous stream holds a server thread, so streams are capped in
+        # number and lifetime; the browser reconnects after RETRY_MS when one ends
+        if not self._open_stream():
+            yield f'retry: {RETRY_MS}\n\n'
+            return
+
+        subscriber = QueueSubscriber()
+        deadline = time.monotonic() + self.max_stream_seconds if self.max_stream_seconds else None
+        try:
+            yield f'retry: {RETRY_MS}\n' + self.subscribe(subscriber)
+            while True:
+                timeout = self.heartbeat_interval
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return
+                    timeout = min(timeout, remaining)
+                try:
+                    yield subscriber.queue.get(timeout=timeout)
+                except queue.Empty:
+                    yield HEARTBEAT
+        finally:
+            self.unsubscribe(subscriber)
+            self._close_stream()
+
+    async def stream_async(self, request):
+        loop = asyncio.get_running_loop()
+        subscriber = AsyncSubscriber(loop)
+        try:
+            yield await loop.run_in_executor(None, self.subscribe, subscriber)
+            while not await request.is_disconnected():
+                try:
+                    yield await asyncio.wait_for(subscriber.queue.get(), self.heartbeat_interval)
+                except asyncio.TimeoutError:
+                    yield HEARTBEAT
+        finally:
+            self.unsubscribe(subscriber)
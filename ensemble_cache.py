@@ -0,0 +1,96 @@
+import time
+
+import joblib
+import numpy as np
+from sklearn.base import clone
+from sklearn.model_selection import StratifiedKFold
+
+def _rows(data, index):
+    return data.iloc[index] if hasattr(data, 'iloc') else data[index]
+
+class OutOfFoldCache:
+    def __init__(self, base_learners, cv=5):
+        self.base_learners = list(base_learners)
+        self.cv = cv
+        self.classes_ = None
+        self.fingerprint = None
+        self.names = []
+        self.fitted_estimators = {}
+        self.oof_probabilities = {}
+        self.fits = 0
+        self.seconds = {}
+
+    @staticmethod
+    def data_fingerprint(X, y):
+        return joblib.hash((list(getattr(X, 'columns', [])), np.asarray(X), np.asarray(y)))
+
+    def fitted_on(self, X, y):
+        return self.fingerprint is not None and self.fingerprint == self.data_fingerprint(X, y)
+
+    def out_of_fold(self, estimator, X, y):
+        oof = np.zeros((len(y), len(self.classes_)))
+        for train_index, valid_index in StratifiedKFold(n_splits=self.cv).split(X, y):
+            model = clone(estimator).fit(_rows(X, train_index), _rows(y, train_index))
+            oof[valid_index] = model.predict_proba(_rows(X, valid_index))
+        self.fits += self.cv
+        return oof
+
+    def fit(self, X, y):
+        self.classes_ = np.unique(y)
+
+        for name, estimator in self.base_learners:
+            started = time.perf_counter()
+            self.oof_probabilities[name] = self.out_of_fold(estimator, X, y)
+            self.fitted_estimators[name] = clone(estimator).fit(X, y)
+            self.fits += 1
+            self.names.append(name)
+            self.seconds[name] = round(time.perf_counter() - started, 3)
+
+        self.fingerprint = self.data_fingerprint(X, y)
+        return self
+
+    def include(self, name, estimator, X, y, oof_probabilities=None):
+        # Adopt an estimator already fitted on the full training data (a tuned
+        # search winner); only its out-of-fold predictions are fitted here when
+        # the search did not keep them
+        started = time.perf_counter()
+        if oof_probabilities is None:
+            oof_probabilities = self.out_of_fold(estimator, X, y)
+        self.oof_probabilities[name] = oof_probabilities
+        self.fitted_estimators[name] = estimator
+        self.names.append(name)
+        self.seconds[name] = round(time.perf_counter() - started, 3)
+        return self
+
+    def estimators(self):
+        return [(name, self.fitted_estimators[name]) for name in self.names]
+
+    def oof_meta_features(self):
+        return np.hstack([self.oof_probabilities[name] for name in self.names])
+
+class PrefitVotingClassifier:
+    def __init__(self, estimators, weights=None):
+        self.estimators = list(estimators)
+        self.weights = weights
+        self.classes_ = self.estimators[0][1].classes_
+
+    def predict_proba(self, X):
+        return np.average([estimator.predict_proba(X) for _, estimator in self.estimators], axis=0, weights=self.weights)
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+class PrefitStackingClassifier:
+    def __init__(self, estimators, final_estimator):
+        self.estimators = list(estimators)
+        self.final_estimator = final_estimator
+        self.classes_ = final_estimator.classes_
+
+    def transform(self, X):
+        return np.hstack([estimator.predict_proba(X) for _, estimator in self.estimators])
+
+    def predict_proba(self, X):
+        return self.final_estimator.predict_proba(self.transform(X))
+
+    def predict(self, X):
+        return self.final_estimator.predict(self.transform(X))
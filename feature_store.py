@@ -0,0 +1,207 @@
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+FEATURE_STORE_DIR = 'feature_store/'
+MANIFEST_FILE = 'manifest.json'
+DATE_COLUMN = 'scheduled_departure_date_local'
+ROW_KEY_COLUMN = '_row_key'
+MAX_OPEN_PARTITIONS = 64
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.feather
+    except ImportError as e:
+        raise ValueError("The feature store requires pyarrow (pip install pyarrow)") from e
+    return pyarrow, pyarrow.feather
+
+def row_keys(data, source_columns):
+    # Numbers are hashed as float64 so a flight read with NULLs elsewhere in
+    # its chunk (int column loaded as float) still maps to the same key
+    normalized = pd.DataFrame({
+        column: data[column].astype(np.float64) if pd.api.types.is_numeric_dtype(data[column]) else data[column].astype(str)
+        for column in source_columns
+    })
+    return pd.util.hash_pandas_object(normalized, index=False).to_numpy()
+
+def partition_fingerprints(data, row_hashes):
+    dates = data[DATE_COLUMN].astype(str)
+    partitions = {}
+    for date, positions in dates.groupby(dates, sort=True).indices.items():
+        digest = hashlib.sha1(row_hashes[positions].tobytes()).hexdigest()[:16]
+        partitions[date] = (positions, f"{len(positions)}-{digest}")
+    return partitions
+
+class FeatureStore:
+    def __init__(self, compute, source_columns, feature_columns, version, path=FEATURE_STORE_DIR):
+        self.compute = compute
+        self.source_columns = list(source_columns)
+        self.feature_columns = list(feature_columns)
+        self.version = version
+        self.path = path
+        self.stored_columns = self.feature_columns + [ROW_KEY_COLUMN]
+        self.last_fingerprint = None
+        self.last_features = None
+        self.manifest = ({}, None)
+        self.open_partitions = {}
+        self.lock = threading.Lock()
+        self.stats = {'partitions_reused': 0, 'partitions_computed': 0, 'rows_served': 0, 'rows_computed': 0}
+
+    def manifest_path(self):
+        return os.path.join(self.path, MANIFEST_FILE)
+
+    def load_manifest(self):
+        try:
+            with open(self.manifest_path()) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if manifest.get('version') != self.version or manifest.get('columns') != self.stored_columns:
+            return {}
+        return manifest.get('partitions', {})
+
+    def save_manifest(self, partitions):
+        temp_path = self.manifest_path() + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump({'version': self.version, 'columns': self.stored_columns, 'partitions': partitions}, f, indent=2)
+        os.replace(temp_path, self.manifest_path())
+
+    def read_partition(self, file_name):
+        pyarrow, _ = _require_pyarrow()
+        source = pyarrow.memory_map(os.path.join(self.path, file_name), 'r')
+        return pyarrow.ipc.open_file(source).read_all()
+
+    def write_partition(self, date, fingerprint, frame, keys):
+        pyarrow, feather = _require_pyarrow()
+        file_name = f"{date}-{fingerprint}.arrow"
+        temp_path = os.path.join(self.path, file_name + '.tmp')
+        table = pyarrow.Table.from_pandas(
+            frame[self.feature_columns].reset_index(drop=True).assign(**{ROW_KEY_COLUMN: keys}), preserve_index=False
+        )
+        feather.write_feather(table, temp_path, compression='uncompressed')
+        os.replace(temp_path, os.path.join(self.path, file_name))
+        return file_name, table
+
+    def data_fingerprint(self, partitions):
+        return hashlib.sha1(json.dumps({date: fp for date, (_, fp) in partitions.items()}, sort_keys=True).encode()).hexdigest()[:16]
+
+    def features_for(self, data):
+        pyarrow, _ = _require_pyarrow()
+        keys = row_keys(data, self.source_columns)
+        partitions = partition_fingerprints(data, keys)
+        fingerprint = self.data_fingerprint(partitions)
+        if fingerprint == self.last_fingerprint and len(self.last_features) == len(data):
+            return self.last_features.set_axis(data.index)
+
+        os.makedirs(self.path, exist_ok=True)
+        manifest = self.load_manifest()
+        stale = [
+            date for date, (_, partition_fingerprint) in partitions.items()
+            if manifest.get(date, {}).get('fingerprint') != partition_fingerprint
+            or not os.path.exists(os.path.join(self.path, manifest[date]['file']))
+        ]
+
+        tables = {}
+        if stale:
+            stale_positions = np.concatenate([partitions[date][0] for date in stale])
+            computed = self.compute(data.iloc[stale_positions]).reset_index(drop=True)
+            offset = 0
+            for date in stale:
+                positions, partition_fingerprint = partitions[date]
+                frame = computed.iloc[offset:offset + len(positions)]
+                offset += len(positions)
+
+                previous = manifest.get(date, {}).get('file')
+                file_name, tables[date] = self.write_partition(date, partition_fingerprint, frame, keys[positions])
+                manifest[date] = {'fingerprint': partition_fingerprint, 'rows': len(positions), 'file': file_name}
+                if previous and previous != file_name and os.path.exists(os.path.join(self.path, previous)):
+                    os.remove(os.path.join(self.path, previous))
+            self.save_manifest(manifest)
+
+        for date in partitions:
+            if date not in tables:
+                tables[date] = self.read_partition(manifest[date]['file'])
+
+        self.stats['partitions_computed'] += len(stale)
+        self.stats['partitions_reused'] += len(partitions) - len(stale)
+
+        # One copy out of the mapped files: only the feature columns are
+        # converted, and split_blocks skips pandas' block consolidation
+        order = np.concatenate([positions for positions, _ in partitions.values()])
+        features = pyarrow.concat_tables([tables[date].select(self.feature_columns) for date in partitions])
+        features = features.to_pandas(split_blocks=True)
+        features = features.iloc[np.argsort(order, kind='stable')].reset_index(drop=True)
+
+        self.last_fingerprint = fingerprint
+        self.last_features = features
+        return features.set_axis(data.index)
+
+    def current_manifest(self):
+        try:
+            mtime = os.stat(self.manifest_path()).st_mtime_ns
+        except OSError:
+            return {}
+        partitions, loaded_mtime = self.manifest
+        if mtime != loaded_mtime:
+            partitions = self.load_manifest()
+            self.manifest = (partitions, mtime)
+        return partitions
+
+    def open_partition(self, file_name):
+        with self.lock:
+            if file_name in self.open_partitions:
+                return self.open_partitions[file_name]
+
+            table = self.read_partition(file_name)
+            keys = table.column(ROW_KEY_COLUMN).to_numpy()
+            order = np.argsort(keys, kind='stable')
+            if len(self.open_partitions) >= MAX_OPEN_PARTITIONS:
+                self.open_partitions.pop(next(iter(self.open_partitions)))
+            self.open_partitions[file_name] = (keys[order], order, table.select(self.feature_columns))
+            return self.open_partitions[file_name]
+
+    def lookup(self, data):
+        # Read-only path for inference: flights already in a stored day are
+        # taken from its mapped file (only the key column and the matching
+        # rows are read), anything else is computed in memory and not written
+        if not len(data):
+            return self.compute(data)
+        manifest = self.current_manifest()
+        dates = data[DATE_COLUMN].astype(str).to_numpy()
+        stored_dates = [date for date in np.unique(dates) if date in manifest]
+        keys = row_keys(data, self.source_columns) if stored_dates else None
+
+        found = np.zeros(len(data), dtype=bool)
+        parts = []
+        for date in stored_dates:
+            try:
+                sorted_keys, order, table = self.open_partition(manifest[date]['file'])
+            except OSError:
+                continue
+            positions = np.flatnonzero(dates == date)
+            slots = np.minimum(np.searchsorted(sorted_keys, keys[positions]), len(sorted_keys) - 1)
+            hits = sorted_keys[slots] == keys[positions]
+            if hits.any():
+                rows = table.take(order[slots[hits]]).to_pandas()
+                parts.append((positions[hits], rows))
+                found[positions[hits]] = True
+
+        missing = np.flatnonzero(~found)
+        if len(missing):
+            parts.append((missing, self.compute(data.iloc[missing]).reset_index(drop=True)))
+        self.stats['rows_served'] += len(data) - len(missing)
+        self.stats['rows_computed'] += len(missing)
+
+        if len(parts) == 1:
+            return parts[0][1].set_axis(data.index)
+        positions = np.concatenate([positions for positions, _ in parts])
+        features = pd.concat([frame for _, frame in parts], ignore_index=True)
+        return features.iloc[np.argsort(positions, kind='stable')].set_axis(data.index)
+
+    def feature_matrix(self, data, columns):
+        return self.features_for(data)[columns].to_numpy()
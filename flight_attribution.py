@@ -0,0 +1,366 @@
+import argparse
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from batch_scoring import missing_source_columns, rowid_ranges, source_columns
+from feature_store import FEATURE_STORE_DIR
+from flight_queries import FLIGHTS_TABLE
+from ml_features import (
+    CLASS_LABELS, FEATURE_COLUMNS, FEATURE_SET_VERSION, build_feature_matrix, open_feature_store, served_features
+)
+from model_registry import ModelRegistry
+
+ATTRIBUTIONS_TABLE = 'FlightAttributions'
+STAGING_TABLE = ATTRIBUTIONS_TABLE + '_staging'
+ATTRIBUTION_MODELS = ['XGBoost', 'LightGBM']
+CONTRIBUTION_COLUMNS = [f"contribution_{feature}" for feature in FEATURE_COLUMNS]
+DEFAULT_CHUNK_ROWS = 20000
+DEFAULT_TOP_FEATURES = 5
+MAX_EXPLAIN_FLIGHTS = 500
+
+# Nightly budget: the whole history must fit in NIGHTLY_WINDOW_SECONDS,
+# and an uncached drill-down page must explain at least API_TARGET_ROWS_PER_SECOND flights
+NIGHTLY_WINDOW_SECONDS = 3600
+API_TARGET_ROWS_PER_SECOND = 1000
+
+class AttributionModel:
+    def __init__(self, model, name, version, categories):
+        self.model = model
+        self.name = name
+        self.version = version
+        self.categories = categories
+
+    @classmethod
+    def from_registry(cls, registered):
+        manifest = registered.manifest
+        if manifest['feature_set_version'] != FEATURE_SET_VERSION:
+            raise ValueError(
+                f"Model version {registered.version} was trained on feature set {manifest['feature_set_version']}, "
+                f"expected {FEATURE_SET_VERSION}"
+            )
+
+        candidates = [name for name in ATTRIBUTION_MODELS if name in manifest['models']]
+        if not candidates:
+            raise ValueError(f"Model version {registered.version} has no {' or '.join(ATTRIBUTION_MODELS)} model to attribute")
+        if manifest['best_model'] in candidates:
+            name = manifest['best_model']
+        else:
+            name = max(candidates, key=lambda candidate: manifest['models'][candidate]['accuracy'] or 0)
+        return cls(registered.model(name), name, registered.version, manifest['categories'])
+
+    def contributions(self, X):
+        if hasattr(self.model, 'get_booster'):
+            import xgboost as xgb
+
+            matrix = xgb.DMatrix(X, enable_categorical=True)
+            contributions = self.model.get_booster().predict(matrix, pred_contribs=True)
+        else:
+            contributions = self.model.booster_.predict(X, pred_contrib=True)
+        return np.asarray(contributions, dtype=np.float32).reshape(len(X), len(CLASS_LABELS), X.shape[1] + 1)
+
+    def explain(self, data, feature_store=None):
+        X = build_feature_matrix(served_features(data, feature_store), self.categories)
+        contributions = self.contributions(X)
+        margins = contributions.sum(axis=2)
+        predicted = margins.argmax(axis=1)
+        rows = np.arange(len(X))
+        return predicted, contributions[rows, predicted, -1], contributions[rows, predicted, :-1]
+
+def parse_explain(params):
+    value = (params.get('explain') or '').strip().lower()
+    if value in ('', '0', 'false', 'no'):
+        return None
+    if value in ('1', 'true', 'yes'):
+        return DEFAULT_TOP_FEATURES
+    try:
+        top = int(value)
+    except ValueError as e:
+        raise ValueError("'explain' must be true/false or the number of features to return") from e
+    if not 1 <= top <= len(FEATURE_COLUMNS):
+        raise ValueError(f"'explain' must be between 1 and {len(FEATURE_COLUMNS)} features")
+    return top
+
+def format_attribution(model_version, model_name, predicted, base_value, contributions, top=DEFAULT_TOP_FEATURES):
+    order = np.argsort(-np.abs(contributions))[:top]
+    return {
+        'model_version': model_version,
+        'model': model_name,
+        'class': CLASS_LABELS[int(predicted)],
+        'base_value': round(float(base_value), 4),
+        'top_features': [
+            {'feature': FEATURE_COLUMNS[position], 'contribution': round(float(contributions[position]), 4)}
+            for position in order
+        ]
+    }
+
+def cached_state(conn):
+    try:
+        return conn.execute(f"SELECT MIN(model_version), MAX(model_version), MAX(source_rowid), COUNT(*) FROM {ATTRIBUTIONS_TABLE}").fetchone()
+    except sqlite3.OperationalError:
+        return None, None, None, 0
+
+def read_cached(conn, model, flight_ids, top=DEFAULT_TOP_FEATURES):
+    try:
+        cursor = conn.execute(
+            f"SELECT source_rowid, predicted_class, base_value, {', '.join(CONTRIBUTION_COLUMNS)} FROM {ATTRIBUTIONS_TABLE} "
+            f"WHERE source_rowid IN ({', '.join('?' for _ in flight_ids)}) AND model_version = ?",
+            [*flight_ids, model.version]
+        )
+    except sqlite3.OperationalError:
+        return {}
+    return {
+        flight_id: format_attribution(
+            model.version, model.name, CLASS_LABELS.index(predicted_class), base_value,
+            np.array(contributions, dtype=np.float32), top
+        )
+        for flight_id, predicted_class, base_value, *contributions in cursor.fetchall()
+    }
+
+class FlightExplainer:
+    def __init__(self, models_dir='models/', feature_store_dir=FEATURE_STORE_DIR):
+        self.models_dir = models_dir
+        self.feature_store = open_feature_store(feature_store_dir)
+        self.attribution_model = None
+        self.failed_version = None
+        self.lock = threading.Lock()
+
+    def current_model(self):
+        version = ModelRegistry(self.models_dir).current_version()
+        current = self.attribution_model
+        if version is None or version == self.failed_version or (current is not None and current.version == version):
+            return current
+
+        with self.lock:
+            if self.attribution_model is None or self.attribution_model.version != version:
+                try:
+                    self.attribution_model = AttributionModel.from_registry(ModelRegistry(self.models_dir).get(version))
+                except (ValueError, OSError, ImportError) as e:
+                    print(f"Flight attribution unavailable for model version {version}: {e}")
+                    self.failed_version = version
+        return self.attribution_model
+
+    def explain(self, data, top=DEFAULT_TOP_FEATURES):
+        model = self.current_model()
+        if model is None:
+            raise ValueError("No XGBoost or LightGBM model version is available for flight attribution")
+
+        predicted, base_values, contributions = model.explain(data, self.feature_store)
+        return [
+            format_attribution(model.version, model.name, predicted[position], base_values[position], contributions[position], top)
+            for position in range(len(data))
+        ]
+
+    def explain_dataframe(self, df, flight_ids, top=DEFAULT_TOP_FEATURES):
+        flight_ids = list(flight_ids)[:MAX_EXPLAIN_FLIGHTS]
+        missing = missing_source_columns(df.columns)
+        if missing:
+            raise ValueError(f"Flight attribution needs columns this dataset does not have: {', '.join(missing)}")
+        if self.current_model() is None or not flight_ids:
+            return {}
+        return dict(zip(flight_ids, self.explain(df.iloc[flight_ids], top)))
+
+    def explain_sqlite(self, conn, flight_ids, table=FLIGHTS_TABLE, top=DEFAULT_TOP_FEATURES):
+        flight_ids = list(flight_ids)[:MAX_EXPLAIN_FLIGHTS]
+        model = self.current_model()
+        if model is None or not flight_ids:
+            return {}
+
+        attributions = read_cached(conn, model, flight_ids, top)
+        missing = [flight_id for flight_id in flight_ids if flight_id not in attributions]
+        if missing:
+            data = pd.read_sql_query(
+                f"SELECT rowid AS flight_id, {', '.join(source_columns(conn, table))} FROM {table} "
+                f"WHERE rowid IN ({', '.join('?' for _ in missing)})",
+                conn, params=missing
+            )
+            attributions.update(zip(data['flight_id'].tolist(), self.explain(data, top)))
+        return attributions
+
+def attach_attributions(flights, attributions):
+    return [{**flight, 'attribution': attributions.get(flight['flight_id'])} for flight in flights]
+
+class AttributionCache:
+    def __init__(self, db_path, models_dir='models/', version=None, chunk_rows=DEFAULT_CHUNK_ROWS, table=FLIGHTS_TABLE,
+                 feature_store_dir=FEATURE_STORE_DIR):
+        registry = ModelRegistry(models_dir)
+        registered = registry.get(version)
+        if registered is None:
+            raise ValueError(f"No model version registered in {models_dir}")
+        self.db_path = db_path
+        self.model = AttributionModel.from_registry(registered)
+        self.feature_store = open_feature_store(feature_store_dir)
+        self.chunk_rows = chunk_rows
+        self.table = table
+        self.report = {}
+
+    def create_table(self, conn, name):
+        conn.execute(f"DROP TABLE IF EXISTS {name}")
+        conn.execute(
+            f"CREATE TABLE {name} (" + ', '.join(
+                ['source_rowid INTEGER PRIMARY KEY', 'model_version TEXT', 'model_name TEXT',
+                 'predicted_class TEXT', 'base_value REAL']
+                + [f"{column} REAL" for column in CONTRIBUTION_COLUMNS]
+                + ['computed_at TEXT']
+            ) + ")"
+        )
+
+    def write_chunk(self, conn, name, flight_ids, predicted, base_values, contributions, computed_at):
+        placeholders = ', '.join(['?'] * (6 + len(CONTRIBUTION_COLUMNS)))
+        conn.executemany(
+            f"INSERT OR REPLACE INTO {name} VALUES ({placeholders})",
+            (
+                (flight_id, self.model.version, self.model.name, CLASS_LABELS[label], base_value, *row, computed_at)
+                for flight_id, label, base_value, row in zip(
+                    flight_ids, predicted.tolist(), base_values.astype(float).tolist(), contributions.astype(float).tolist()
+                )
+            )
+        )
+        conn.commit()
+
+    def run(self, force=False):
+        started = time.perf_counter()
+        conn = sqlite3.connect(f"file:{self.db_path}?mode=rw", uri=True)
+        try:
+            columns = source_columns(conn, self.table)
+            first_version, last_version, last_rowid, cached_rows = cached_state(conn)
+            max_rowid = conn.execute(f"SELECT MAX(rowid) FROM {self.table}").fetchone()[0] or 0
+            incremental = (
+                not force and first_version == last_version == self.model.version
+                and last_rowid is not None and last_rowid <= max_rowid
+            )
+            if incremental:
+                target = ATTRIBUTIONS_TABLE
+                ranges = rowid_ranges(conn, self.chunk_rows, self.table, after_rowid=last_rowid)
+            else:
+                target = STAGING_TABLE
+                self.create_table(conn, STAGING_TABLE)
+                conn.commit()
+                ranges = rowid_ranges(conn, self.chunk_rows, self.table)
+                cached_rows = 0
+
+            query = f"SELECT rowid AS flight_id, {', '.join(columns)} FROM {self.table} WHERE rowid BETWEEN ? AND ?"
+            computed_at = datetime.now().isoformat()
+            totals = {'rows': 0, 'read': 0.0, 'attribute': 0.0, 'write': 0.0}
+            for first_rowid, last in ranges:
+                stage_started = time.perf_counter()
+                chunk = pd.read_sql_query(query, conn, params=(first_rowid, last))
+                totals['read'] += time.perf_counter() - stage_started
+
+                stage_started = time.perf_counter()
+                predicted, base_values, contributions = self.model.explain(chunk, self.feature_store)
+                totals['attribute'] += time.perf_counter() - stage_started
+
+                stage_started = time.perf_counter()
+                self.write_chunk(conn, target, chunk['flight_id'].tolist(), predicted, base_values, contributions, computed_at)
+                totals['write'] += time.perf_counter() - stage_started
+                totals['rows'] += len(chunk)
+
+            if not incremental:
+                conn.execute("BEGIN")
+                conn.execute(f"DROP TABLE IF EXISTS {ATTRIBUTIONS_TABLE}")
+                conn.execute(f"ALTER TABLE {STAGING_TABLE} RENAME TO {ATTRIBUTIONS_TABLE}")
+                conn.commit()
+            history_rows = conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        finally:
+            conn.close()
+
+        wall = time.perf_counter() - started
+        processing_seconds = totals['read'] + totals['attribute'] + totals['write']
+        rows_per_second = totals['rows'] / processing_seconds if totals['rows'] and processing_seconds else None
+        self.report = {
+            'version': self.model.version,
+            'model': self.model.name,
+            'mode': 'incremental' if incremental else 'full',
+            'rows': totals['rows'],
+            'reused_rows': cached_rows,
+            'wall_seconds': round(wall, 3),
+            'rows_per_second': round(rows_per_second, 1) if rows_per_second else None,
+            'stage_seconds': {stage: round(totals[stage], 3) for stage in ('read', 'attribute', 'write')},
+            'history_rows': history_rows,
+            'nightly_target_rows_per_second': round(history_rows / NIGHTLY_WINDOW_SECONDS, 1),
+            'full_history_seconds': round(history_rows / rows_per_second, 1) if rows_per_second else None
+        }
+        return self.report
+
+def benchmark(db_path, models_dir='models/', rows=MAX_EXPLAIN_FLIGHTS, table=FLIGHTS_TABLE):
+    explainer = FlightExplainer(models_dir)
+    model = explainer.current_model()
+    if model is None:
+        raise ValueError(f"No XGBoost or LightGBM model version is available in {models_dir}")
+
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        data = pd.read_sql_query(
+            f"SELECT rowid AS flight_id, {', '.join(source_columns(conn, table))} FROM {table} ORDER BY rowid LIMIT ?",
+            conn, params=(rows,)
+        )
+        flight_ids = data['flight_id'].tolist()
+
+        started = time.perf_counter()
+        cached = read_cached(conn, model, flight_ids)
+        cached_seconds = time.perf_counter() - started
+    finally:
+        conn.close()
+
+    started = time.perf_counter()
+    explainer.explain(data)
+    computed_seconds = time.perf_counter() - started
+
+    results = {'flights': len(flight_ids), 'target_rows_per_second': API_TARGET_ROWS_PER_SECOND}
+    for name, seconds, count in (('computed', computed_seconds, len(flight_ids)), ('cached', cached_seconds, len(cached))):
+        results[name] = {
+            'flights': count,
+            'seconds': round(seconds, 4),
+            'rows_per_second': round(count / seconds, 1) if count and seconds else None
+        }
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute and cache per-flight feature attributions for a model version")
+    parser.add_argument('command', choices=['cache', 'benchmark'])
+    parser.add_argument('--db', default='skyhack.db')
+    parser.add_argument('--models-dir', default='models/')
+    parser.add_argument('--version', help="Model version to attribute (default: the current version)")
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument('--force', action='store_true', help="Recompute every flight even if the cache matches the version")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == 'benchmark':
+            result = benchmark(args.db, args.models_dir)
+            for name in ('computed', 'cached'):
+                stats = result[name]
+                if not stats['flights']:
+                    print(f"   {name}: no {ATTRIBUTIONS_TABLE} rows for the current version (run the cache command)")
+                    continue
+                status = '✅' if stats['rows_per_second'] >= result['target_rows_per_second'] else '⚠️'
+                print(f"{status} {name}: {stats['flights']} flights in {stats['seconds'] * 1000:.1f}ms "
+                      f"({stats['rows_per_second']:.0f} rows/s, target {result['target_rows_per_second']} rows/s)")
+            return 0
+
+        cache = AttributionCache(args.db, args.models_dir, args.version, args.chunk_rows)
+        print(f"🚀 Attributing {FLIGHTS_TABLE} with {cache.model.name} from model version {cache.model.version}...")
+        report = cache.run(force=args.force)
+    except (ValueError, OSError, sqlite3.Error) as e:
+        print(f"❌ {e}")
+        return 1
+
+    stages = report['stage_seconds']
+    print(f"✅ {report['mode'].capitalize()} run wrote {report['rows']} attributions to {ATTRIBUTIONS_TABLE} "
+          f"({report['reused_rows']} reused) in {report['wall_seconds']:.2f}s")
+    if report['rows_per_second']:
+        status = '✅' if report['rows_per_second'] >= report['nightly_target_rows_per_second'] else '⚠️'
+        print(f"   read {stages['read']:.2f}s | attribute {stages['attribute']:.2f}s | write {stages['write']:.2f}s")
+        print(f"{status} {report['rows_per_second']:.0f} rows/s; full history of {report['history_rows']} flights needs "
+              f"{report['nightly_target_rows_per_second']:.0f} rows/s to fit the {NIGHTLY_WINDOW_SECONDS // 60} min nightly window "
+              f"(~{report['full_history_seconds'] / 60:.1f} min at this rate)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,266 @@
+import argparse
+import csv
+import io
+import sqlite3
+import sys
+
+import numpy as np
+
+from flight_queries import FLIGHTS_TABLE, build_flight_where, parse_flight_query, LIST_FILTERS
+
+DEFAULT_CHUNK_SIZE = 5000
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet'
+}
+
+def select_columns(requested, available):
+    if not requested:
+        return list(available)
+
+    columns = [column.strip() for column in requested.split(',') if column.strip()]
+    unknown = [column for column in columns if column not in available]
+    if unknown:
+        raise ValueError(f"Unknown export columns: {', '.join(unknown)}")
+    return columns
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ValueError("Parquet export requires pyarrow (pip install pyarrow)") from e
+    return pyarrow, pyarrow.parquet
+
+class SQLiteChunkSource:
+    def __init__(self, db_path, query, columns=None, chunk_size=DEFAULT_CHUNK_SIZE, table=FLIGHTS_TABLE):
+        self.db_path = db_path
+        self.chunk_size = chunk_size
+        conn = self.connect()
+        try:
+            table_info = conn.execute(f"PRAGMA table_info({table})").fetchall()
+        finally:
+            conn.close()
+        if not table_info:
+            raise ValueError(f"Table {table} not found in {db_path}")
+        declared = {row[1]: (row[2] or '').upper() for row in table_info}
+
+        self.columns = select_columns(columns, [row[1] for row in table_info])
+        self.declared_types = [declared[column] for column in self.columns]
+
+        clauses, self.params = build_flight_where(query, set(declared))
+        self.sql = f"SELECT {', '.join(self.columns)} FROM {table}"
+        if clauses:
+            self.sql += " WHERE " + " AND ".join(clauses)
+        self.sql += " ORDER BY rowid"
+
+    def connect(self):
+        return sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+
+    def chunks(self):
+        conn = self.connect()
+        try:
+            cursor = conn.execute(self.sql, self.params)
+            while True:
+                rows = cursor.fetchmany(self.chunk_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            conn.close()
+
+    def storage_classes(self):
+        # One pass over the exported rows noting which SQLite storage classes
+        # each column holds, so the Parquet schema fits every chunk
+        checks = []
+        for column in self.columns:
+            checks.extend([
+                f"MAX(typeof({column}) = 'integer')",
+                f"MAX(typeof({column}) = 'real')",
+                f"MAX(typeof({column}) IN ('text', 'blob'))"
+            ])
+        sql = f"SELECT {', '.join(checks)} FROM ({self.sql})"
+        conn = self.connect()
+        try:
+            row = conn.execute(sql, self.params).fetchone()
+        finally:
+            conn.close()
+
+        classes = []
+        for position in range(0, len(checks), 3):
+            found = [bool(flag) for flag in row[position:position + 3]]
+            classes.append({name for name, present in zip(('integer', 'real', 'text'), found) if present})
+        return classes
+
+    def arrow_schema(self):
+        pa, _ = _require_pyarrow()
+
+        fields = []
+        for column, declared, classes in zip(self.columns, self.declared_types, self.storage_classes()):
+            if 'text' in classes:
+                arrow_type = pa.string()
+            elif 'real' in classes:
+                arrow_type = pa.float64()
+            elif 'integer' in classes:
+                arrow_type = pa.int64()
+            elif 'INT' in declared:
+                arrow_type = pa.int64()
+            elif any(name in declared for name in ('REAL', 'FLOA', 'DOUB')):
+                arrow_type = pa.float64()
+            else:
+                arrow_type = pa.string()
+            fields.append(pa.field(column, arrow_type))
+        return pa.schema(fields)
+
+class DataFrameChunkSource:
+    def __init__(self, df, mask, columns=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.df = df
+        self.chunk_size = chunk_size
+        self.columns = select_columns(columns, list(df.columns))
+        self.positions = np.flatnonzero(mask)
+
+    def chunks(self):
+        for start in range(0, len(self.positions), self.chunk_size):
+            chunk = self.df.iloc[self.positions[start:start + self.chunk_size]][self.columns]
+            yield list(chunk.itertuples(index=False, name=None))
+
+    def arrow_schema(self):
+        pa, _ = _require_pyarrow()
+
+        fields = []
+        for column in self.columns:
+            values = self.df[column].iloc[self.positions]
+            try:
+                arrow_type = pa.Array.from_pandas(values).type
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                arrow_type = pa.string()
+            if pa.types.is_null(arrow_type):
+                arrow_type = pa.string()
+            fields.append(pa.field(column, arrow_type))
+        return pa.schema(fields)
+
+class _ByteSink:
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.parts)
+        self.parts = []
+        return data
+
+def write_csv(source):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(source.columns)
+    for rows in source.chunks():
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def _arrow_array(pa, values, arrow_type):
+    try:
+        return pa.array(values, type=arrow_type)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+        pass
+
+    # Mixed values (e.g. numbers in a text column): convert them one by one
+    if pa.types.is_string(arrow_type):
+        convert = str
+    elif pa.types.is_floating(arrow_type):
+        convert = float
+    elif pa.types.is_integer(arrow_type):
+        convert = int
+    else:
+        raise ValueError(f"Cannot export values as {arrow_type}")
+    return pa.array([None if value is None or value != value else convert(value) for value in values], type=arrow_type)
+
+def write_parquet(source, schema):
+    pa, pq = _require_pyarrow()
+    sink = _ByteSink()
+    writer = pq.ParquetWriter(sink, schema)
+
+    for rows in source.chunks():
+        column_values = list(zip(*rows))
+        arrays = [_arrow_array(pa, values, field.type) for values, field in zip(column_values, schema)]
+        writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+        yield sink.drain()
+
+    writer.close()
+    yield sink.drain()
+
+def check_export_format(export_format):
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"'format' must be one of {', '.join(EXPORT_FORMATS)}")
+
+def stream_flight_export(source, export_format):
+    check_export_format(export_format)
+
+    if export_format == 'parquet':
+        # Fix the schema from every exported row before the response starts,
+        # so a later chunk cannot fail to convert and cut the download short
+        body = write_parquet(source, source.arrow_schema())
+    else:
+        body = write_csv(source)
+
+    return body, EXPORT_FORMATS[export_format], f"flights.{export_format}"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream a filtered slice of ClassifiedFlights to CSV or Parquet")
+    parser.add_argument('--db', default='skyhack.db', help="SQLite database path")
+    parser.add_argument('--format', default='csv', choices=sorted(EXPORT_FORMATS))
+    parser.add_argument('--output', required=True, help="Output file path")
+    parser.add_argument('--columns', help="Comma separated list of columns (default: all)")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--date-from')
+    parser.add_argument('--date-to')
+    parser.add_argument('--min-score')
+    parser.add_argument('--max-score')
+    for name in LIST_FILTERS:
+        parser.add_argument(f"--{name.replace('_', '-')}", dest=name, help="Comma separated values")
+    args = parser.parse_args(argv)
+
+    params = {key: value for key, value in vars(args).items() if value is not None}
+    try:
+        query = parse_flight_query(params)
+        source = SQLiteChunkSource(args.db, query, args.columns, chunk_size=args.chunk_size)
+        body, _, _ = stream_flight_export(source, args.format)
+    except (ValueError, sqlite3.Error) as e:
+        print(f"❌ Export failed: {e}")
+        return 1
+
+    print(f"📤 Exporting flights from {args.db} to {args.output}...")
+    total_bytes = 0
+    with open(args.output, 'wb') as f:
+        for part in body:
+            if isinstance(part, str):
+                part = part.encode('utf-8')
+            f.write(part)
+            total_bytes += len(part)
+
+    print(f"✅ Wrote {total_bytes:,} bytes to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,344 @@
+import base64
+import bisect
+import hashlib
+import json
+import math
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+
+import numpy as np
+
+from metrics import SQL_QUERY_SECONDS, observe_time
+
+FLIGHTS_TABLE = 'ClassifiedFlights'
+
+FLIGHT_COLUMNS = [
+    'company_id', 'flight_number', 'scheduled_departure_date_local',
+    'scheduled_departure_datetime_local', 'scheduled_departure_station_code',
+    'scheduled_arrival_station_code', 'fleet_type', 'carrier',
+    'difficulty_score', 'difficulty_classification', 'daily_rank',
+    'departure_delay_minutes', 'load_factor', 'ground_time_pressure',
+    'transfer_bag_ratio', 'ssr_intensity', 'is_international',
+    'total_passengers', 'total_bags'
+]
+
+SORT_COLUMNS = {
+    'score': 'difficulty_score',
+    'departure': 'scheduled_departure_datetime_local'
+}
+
+LIST_FILTERS = {
+    'destination': 'scheduled_arrival_station_code',
+    'fleet_type': 'fleet_type',
+    'carrier': 'carrier',
+    'classification': 'difficulty_classification'
+}
+
+FLIGHT_INDEXES = [
+    ('idx_classified_score', 'difficulty_score'),
+    ('idx_classified_departure', 'scheduled_departure_datetime_local'),
+    ('idx_classified_date_score', 'scheduled_departure_date_local, difficulty_score'),
+    ('idx_classified_dest_score', 'scheduled_arrival_station_code, difficulty_score'),
+    ('idx_classified_fleet_score', 'fleet_type, difficulty_score'),
+    ('idx_classified_carrier_score', 'carrier, difficulty_score'),
+    ('idx_classified_class_score', 'difficulty_classification, difficulty_score')
+]
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+def _is_null(value):
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+def encode_cursor(sort_value, row_id, sort, order):
+    sort_value = None if _is_null(sort_value) else sort_value
+    raw = json.dumps([sort_value, int(row_id), sort, order], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor, sort, order):
+    padded = cursor + '=' * (-len(cursor) % 4)
+    try:
+        sort_value, row_id, cursor_sort, cursor_order = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        row_id = int(row_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError('Invalid cursor') from e
+    # The sort value is bound straight into SQL, so only accept what encode_cursor writes
+    if isinstance(sort_value, bool) or not (
+        sort_value is None or isinstance(sort_value, str)
+        or (isinstance(sort_value, (int, float)) and math.isfinite(sort_value))
+    ):
+        raise ValueError('Invalid cursor')
+    if (cursor_sort, cursor_order) != (sort, order):
+        raise ValueError(f"Cursor was issued for sort={cursor_sort}&order={cursor_order}")
+    return sort_value, row_id
+
+def keyset_clause(sort_column, order, cursor):
+    # Matches SQLite's ORDER BY: NULL sort values come first ascending and last descending
+    sort_value, row_id = cursor
+    if order == 'asc':
+        if sort_value is None:
+            return f"(({sort_column} IS NULL AND rowid > ?) OR {sort_column} IS NOT NULL)", [row_id]
+        return f"({sort_column}, rowid) > (?, ?)", [sort_value, row_id]
+    if sort_value is None:
+        return f"({sort_column} IS NULL AND rowid < ?)", [row_id]
+    return f"(({sort_column}, rowid) < (?, ?) OR {sort_column} IS NULL)", [sort_value, row_id]
+
+def sort_key(sort_value, row_id):
+    return (0, 0, row_id) if _is_null(sort_value) else (1, sort_value, row_id)
+
+def _split_values(value):
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+def _parse_date(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        datetime.strptime(value, '%Y-%m-%d')
+    except ValueError as e:
+        raise ValueError(f"'{name}' must be a YYYY-MM-DD date") from e
+    return value
+
+def _parse_float(params, name):
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return float(value)
+    except ValueError as e:
+        raise ValueError(f"'{name}' must be a number") from e
+
+def parse_flight_query(params):
+    sort = params.get('sort') or 'score'
+    if sort not in SORT_COLUMNS:
+        raise ValueError(f"'sort' must be one of {', '.join(SORT_COLUMNS)}")
+
+    order = params.get('order') or ('desc' if sort == 'score' else 'asc')
+    if order not in ('asc', 'desc'):
+        raise ValueError("'order' must be 'asc' or 'desc'")
+
+    try:
+        limit = int(params.get('limit') or DEFAULT_PAGE_SIZE)
+    except ValueError as e:
+        raise ValueError("'limit' must be an integer") from e
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    cursor = params.get('cursor')
+
+    return {
+        'sort': sort,
+        'order': order,
+        'limit': limit,
+        'cursor': decode_cursor(cursor, sort, order) if cursor else None,
+        'filters': {
+            name: _split_values(params.get(name))
+            for name in LIST_FILTERS if params.get(name)
+        },
+        'date_from': _parse_date(params, 'date_from'),
+        'date_to': _parse_date(params, 'date_to'),
+        'min_score': _parse_float(params, 'min_score'),
+        'max_score': _parse_float(params, 'max_score')
+    }
+
+def build_flight_where(query, available_columns):
+    clauses = []
+    params = []
+
+    for name, values in query['filters'].items():
+        column = LIST_FILTERS[name]
+        if column not in available_columns:
+            raise ValueError(f"Filter '{name}' is not available for this dataset")
+        clauses.append(f"{column} IN ({', '.join('?' for _ in values)})")
+        params.extend(values)
+
+    if query['date_from']:
+        clauses.append('scheduled_departure_date_local >= ?')
+        params.append(query['date_from'])
+    if query['date_to']:
+        clauses.append('scheduled_departure_date_local <= ?')
+        params.append(query['date_to'])
+    if query['min_score'] is not None:
+        clauses.append('difficulty_score >= ?')
+        params.append(query['min_score'])
+    if query['max_score'] is not None:
+        clauses.append('difficulty_score <= ?')
+        params.append(query['max_score'])
+
+    return clauses, params
+
+def build_page(rows, query):
+    has_more = len(rows) > query['limit']
+    rows = rows[:query['limit']]
+
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1]
+        next_cursor = encode_cursor(last[SORT_COLUMNS[query['sort']]], last['flight_id'], query['sort'], query['order'])
+
+    return {
+        'flights': rows,
+        'count': len(rows),
+        'sort': query['sort'],
+        'order': query['order'],
+        'next_cursor': next_cursor
+    }
+
+def create_flight_indexes(conn, table=FLIGHTS_TABLE):
+    # Run by the ETL (complete_analysis.sql and score_development.sql create the
+    # same indexes); the dashboards only read the table
+    for name, columns in FLIGHT_INDEXES:
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table}({columns})")
+    conn.commit()
+
+def table_fingerprint(conn, table=FLIGHTS_TABLE):
+    # Hash every column so any change to the table changes the fingerprint,
+    # while writes to other tables in the same file do not
+    digest = hashlib.sha1()
+    cursor = conn.execute(f"SELECT rowid, * FROM {table} ORDER BY rowid")
+    digest.update(repr([column[0] for column in cursor.description]).encode())
+    while True:
+        rows = cursor.fetchmany(10000)
+        if not rows:
+            break
+        digest.update(repr(rows).encode())
+    return digest.hexdigest()[:16]
+
+class SQLiteFlightRepository:
+    def __init__(self, get_connection, table=FLIGHTS_TABLE):
+        self.get_connection = get_connection
+        self.table = table
+        self.columns = None
+
+    def get_columns(self):
+        if self.columns is None:
+            conn = self.get_connection()
+            self.columns = {row[1] for row in conn.execute(f"PRAGMA table_info({self.table})")}
+        return self.columns
+
+    def list_flights(self, query):
+        available = self.get_columns()
+        columns = [column for column in FLIGHT_COLUMNS if column in available]
+        sort_column = SORT_COLUMNS[query['sort']]
+        direction = 'DESC' if query['order'] == 'desc' else 'ASC'
+
+        clauses, params = build_flight_where(query, available)
+        if query['cursor'] is not None:
+            clause, clause_params = keyset_clause(sort_column, query['order'], query['cursor'])
+            clauses.append(clause)
+            params.extend(clause_params)
+
+        sql = f"SELECT rowid AS flight_id, {', '.join(columns)} FROM {self.table}"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY {sort_column} {direction}, rowid {direction} LIMIT ?"
+        params.append(query['limit'] + 1)
+
+        with observe_time(SQL_QUERY_SECONDS, 'list_flights'):
+            cursor = self.get_connection().execute(sql, params)
+            names = [description[0] for description in cursor.description]
+            rows = [dict(zip(names, row)) for row in cursor.fetchall()]
+        return build_page(rows, query)
+
+    def get_flights(self, flight_ids):
+        if not flight_ids:
+            return []
+
+        columns = [column for column in FLIGHT_COLUMNS if column in self.get_columns()]
+        with observe_time(SQL_QUERY_SECONDS, 'get_flights'):
+            cursor = self.get_connection().execute(
+                f"SELECT rowid AS flight_id, {', '.join(columns)} FROM {self.table} "
+                f"WHERE rowid IN ({', '.join('?' for _ in flight_ids)})",
+                list(flight_ids)
+            )
+            names = [description[0] for description in cursor.description]
+            rows = {row[0]: dict(zip(names, row)) for row in cursor.fetchall()}
+        return [rows[flight_id] for flight_id in flight_ids if flight_id in rows]
+
+class DataFrameFlightRepository:
+    def __init__(self, df):
+        self.df = df
+        self.orders = {}
+        self.lock = threading.Lock()
+
+    def _sorted_order(self, sort):
+        if sort not in self.orders:
+            with self.lock:
+                if sort not in self.orders:
+                    values = self.df[SORT_COLUMNS[sort]].reset_index(drop=True)
+                    positions = values.sort_values(kind='mergesort', na_position='first').index.to_numpy()
+                    column = values.tolist()
+                    keys = [sort_key(column[position], position) for position in positions.tolist()]
+                    self.orders[sort] = (positions, keys)
+        return self.orders[sort]
+
+    def filter_mask(self, query):
+        df = self.df
+        mask = np.ones(len(df), dtype=bool)
+
+        for name, values in query['filters'].items():
+            column = LIST_FILTERS[name]
+            if column not in df.columns:
+                raise ValueError(f"Filter '{name}' is not available for this dataset")
+            mask &= df[column].isin(values).to_numpy()
+
+        if query['date_from']:
+            mask &= (df['scheduled_departure_date_local'] >= query['date_from']).to_numpy()
+        if query['date_to']:
+            mask &= (df['scheduled_departure_date_local'] <= query['date_to']).to_numpy()
+        if query['min_score'] is not None:
+            mask &= (df['difficulty_score'] >= query['min_score']).to_numpy()
+        if query['max_score'] is not None:
+            mask &= (df['difficulty_score'] <= query['max_score']).to_numpy()
+
+        return mask
+
+    def list_flights(self, query):
+        positions, keys = self._sorted_order(query['sort'])
+        mask = self.filter_mask(query)
+        if query['order'] == 'desc':
+            positions = positions[::-1]
+
+        start = 0
+        if query['cursor'] is not None:
+            key = sort_key(*query['cursor'])
+            try:
+                if query['order'] == 'asc':
+                    start = bisect.bisect_right(keys, key)
+                else:
+                    start = len(keys) - bisect.bisect_left(keys, key)
+            except TypeError as e:
+                raise ValueError('Invalid cursor') from e
+
+        candidates = positions[start:]
+        hits = candidates[mask[candidates]][:query['limit'] + 1]
+
+        columns = [column for column in FLIGHT_COLUMNS if column in self.df.columns]
+        page = self.df.iloc[hits][columns]
+        rows = [
+            {'flight_id': int(row_id), **row}
+            for row_id, row in zip(hits, page.to_dict('records'))
+        ]
+        return build_page(rows, query)
+
+    def get_flights(self, flight_ids):
+        columns = [column for column in FLIGHT_COLUMNS if column in self.df.columns]
+        page = self.df.iloc[list(flight_ids)][columns]
+        return [
+            {'flight_id': int(row_id), **row}
+            for row_id, row in zip(flight_ids, page.to_dict('records'))
+        ]
+
+if __name__ == "__main__":
+    db_path = sys.argv[1] if len(sys.argv) > 1 else 'skyhack.db'
+    print(f"🗂️  Creating {FLIGHTS_TABLE} indexes in {db_path}...")
+    conn = sqlite3.connect(db_path)
+    try:
+        create_flight_indexes(conn)
+    except sqlite3.Error as e:
+        print(f"❌ Failed to create flight indexes: {e}")
+        sys.exit(1)
+    finally:
+        conn.close()
+    print(f"✅ {len(FLIGHT_INDEXES)} indexes ready")
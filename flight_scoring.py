@@ -0,0 +1,407 @@
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+
+from feature_store import FEATURE_STORE_DIR
+from flight_queries import FLIGHTS_TABLE
+from ml_features import CLASS_LABELS, build_feature_matrix, open_feature_store, served_features
+from model_registry import ModelRegistry
+
+AIRPORTS_PATH = 'Airports Data.csv'
+MODELS_DIR = 'models/'
+
+SCORE_WEIGHTS = {
+    'ground_time_pressure': 0.25,
+    'load_factor': 0.20,
+    'transfer_bag_ratio': 0.20,
+    'ssr_intensity': 0.15,
+    'is_international': 0.10,
+    'fleet_complexity': 0.05,
+    'time_complexity': 0.05
+}
+NORMALIZED_FEATURES = ['load_factor', 'ground_time_pressure', 'transfer_bag_ratio', 'ssr_intensity']
+
+REQUIRED_FIELDS = [
+    'scheduled_departure_datetime_local', 'scheduled_departure_station_code',
+    'scheduled_arrival_station_code', 'fleet_type', 'total_seats', 'total_passengers', 'total_bags'
+]
+COUNT_FIELDS = [
+    'total_seats', 'total_passengers', 'total_bags', 'transfer_bags',
+    'total_passengers_with_remarks', 'unique_special_requests', 'children_count',
+    'lap_children_count', 'stroller_users', 'scheduled_ground_time_minutes', 'minimum_turn_minutes'
+]
+ECHO_FIELDS = ['company_id', 'flight_number', 'scheduled_departure_date_local', 'scheduled_arrival_station_code']
+
+DIFFICULT_SHARE = 0.20
+MEDIUM_SHARE = 0.50
+MAX_SCORE_BATCH = 1000
+
+def load_airports(path=AIRPORTS_PATH):
+    try:
+        airports = pd.read_csv(path, encoding='utf-8-sig', keep_default_na=False, dtype=str)
+    except (OSError, pd.errors.ParserError) as e:
+        print(f"Airport lookup unavailable: {e}")
+        return {}
+    return dict(zip(airports['airport_iata_code'], airports['iso_country_code']))
+
+def load_best_model(models_dir=MODELS_DIR, version=None):
+    from tree_inference import load_compiled_model
+
+    compiled = load_compiled_model(models_dir, version)
+    if compiled is not None:
+        return compiled
+
+    try:
+        from advanced_ml_models import AdvancedMLModels
+        from tree_inference import compile_model
+    except ImportError as e:
+        print(f"ML scoring disabled: {e}")
+        return None
+
+    ml_models = AdvancedMLModels(feature_store_dir=None)
+    if not ml_models.load_models(models_dir, version) or ml_models.best_model is None:
+        return None
+    try:
+        compiled = compile_model(ml_models)
+        compiled.version = ml_models.model_version
+        return compiled
+    except ValueError as e:
+        print(f"ML scoring disabled: {e}")
+        return None
+
+def parse_score_request(payload):
+    if isinstance(payload, dict) and 'flights' in payload:
+        records = payload['flights']
+    elif isinstance(payload, dict):
+        records = [payload]
+    else:
+        records = payload
+
+    if not isinstance(records, list) or not records:
+        raise ValueError("Request body must be a flight object, a list of flights or {'flights': [...]}")
+    if len(records) > MAX_SCORE_BATCH:
+        raise ValueError(f"At most {MAX_SCORE_BATCH} flights can be scored per request")
+
+    for position, record in enumerate(records):
+        if not isinstance(record, dict):
+            raise ValueError(f"Flight {position} must be an object")
+
+        missing = [field for field in REQUIRED_FIELDS if record.get(field) in (None, '')]
+        if missing:
+            raise ValueError(f"Flight {position} is missing {', '.join(missing)}")
+
+        for field in COUNT_FIELDS:
+            if record.get(field) in (None, ''):
+                continue
+            try:
+                if float(record[field]) < 0:
+                    raise ValueError
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"Flight {position}: '{field}' must be a non-negative number") from e
+
+        if pd.isna(pd.to_datetime(record['scheduled_departure_datetime_local'], errors='coerce')):
+            raise ValueError(f"Flight {position}: 'scheduled_departure_datetime_local' must be a datetime")
+
+    return records
+
+def parse_departure_times(values):
+    # Parsed one record at a time: a micro-batch mixes requests whose formats
+    # differ, and an offset is dropped rather than applied so the hour stays local
+    departures = []
+    for value in values:
+        departure = pd.to_datetime(value, errors='coerce')
+        if not pd.isna(departure) and departure.tzinfo is not None:
+            departure = departure.tz_localize(None)
+        departures.append(departure)
+    return pd.Series(pd.to_datetime(departures), index=values.index)
+
+def derive_features(records, airports):
+    df = pd.DataFrame(records)
+    for field in COUNT_FIELDS:
+        values = df[field] if field in df.columns else pd.Series(0, index=df.index)
+        df[field] = pd.to_numeric(values, errors='coerce').fillna(0)
+
+    departure = parse_departure_times(df['scheduled_departure_datetime_local'])
+    if 'scheduled_departure_date_local' in df.columns:
+        df['scheduled_departure_date_local'] = df['scheduled_departure_date_local'].fillna(departure.dt.strftime('%Y-%m-%d'))
+    else:
+        df['scheduled_departure_date_local'] = departure.dt.strftime('%Y-%m-%d')
+
+    departure_country = df['scheduled_departure_station_code'].map(airports)
+    arrival_country = df['scheduled_arrival_station_code'].map(airports)
+    df['is_international'] = (
+        (departure_country.notna() & (departure_country != 'US')) |
+        (arrival_country.notna() & (arrival_country != 'US'))
+    ).astype(int)
+
+    seats = df['total_seats']
+    passengers = df['total_passengers']
+    bags = df['total_bags']
+    minimum_turn = df['minimum_turn_minutes']
+    df['load_factor'] = np.where(seats > 0, passengers / seats.where(seats > 0), 0.0)
+    df['ground_time_pressure'] = np.where(
+        minimum_turn > 0, df['scheduled_ground_time_minutes'] / minimum_turn.where(minimum_turn > 0), 1.0
+    )
+    df['transfer_bag_ratio'] = np.where(bags > 0, df['transfer_bags'] / bags.where(bags > 0), 0.0)
+    df['ssr_intensity'] = np.where(
+        passengers > 0, df['total_passengers_with_remarks'] / passengers.where(passengers > 0), 0.0
+    )
+
+    df['has_children'] = ((df['children_count'] > 0) | (df['lap_children_count'] > 0)).astype(int)
+    df['has_strollers'] = (df['stroller_users'] > 0).astype(int)
+
+    fleet_type = df['fleet_type'].astype(str)
+    df['fleet_complexity'] = np.select(
+        [fleet_type.str.contains('B787|B777|B767'), fleet_type.str.contains('B737|B757|A319|A320')],
+        [3, 2], default=1
+    )
+
+    hour = departure.dt.hour
+    df['scheduled_departure_datetime_local'] = departure.dt.strftime('%Y-%m-%d %H:%M:%S')
+    df['time_complexity'] = np.select(
+        [hour.between(5, 7) | hour.between(22, 23), hour.between(8, 9) | hour.between(16, 18)],
+        [3, 2], default=1
+    )
+
+    return df
+
+class FlightScorer:
+    def __init__(self, airports, feature_stats, daily_scores, model=None, models_dir=None, feature_store=None):
+        self.airports = airports
+        self.feature_stats = feature_stats
+        self.daily_scores = {date: np.sort(np.asarray(scores, dtype=float)) for date, scores in daily_scores.items()}
+        self.all_scores = np.sort(np.concatenate(list(self.daily_scores.values()) or [np.empty(0)]))
+        self.model = model
+        self.models_dir = models_dir
+        self.failed_version = None
+        self.model_lock = threading.Lock()
+        self.feature_store = feature_store
+
+    @classmethod
+    def from_sqlite(cls, conn, airports_path=AIRPORTS_PATH, models_dir=MODELS_DIR, table=FLIGHTS_TABLE,
+                    feature_store_dir=FEATURE_STORE_DIR):
+        try:
+            stats = pd.read_sql_query("SELECT * FROM FeatureStats", conn).iloc[0].to_dict()
+            scores = pd.read_sql_query(
+                f"SELECT scheduled_departure_date_local, difficulty_score FROM {table}", conn
+            )
+        except (sqlite3.Error, pd.errors.DatabaseError, IndexError) as e:
+            print(f"Online scoring unavailable: {e}")
+            return None
+
+        daily_scores = scores.groupby('scheduled_departure_date_local')['difficulty_score'].apply(np.asarray).to_dict()
+        return cls(
+            load_airports(airports_path), stats, daily_scores, load_best_model(models_dir), models_dir,
+            open_feature_store(feature_store_dir)
+        )
+
+    @classmethod
+    def from_dataframe(cls, df, airports_path=AIRPORTS_PATH, models_dir=MODELS_DIR, feature_store_dir=FEATURE_STORE_DIR):
+        stats = {}
+        for feature in NORMALIZED_FEATURES:
+            stats[f'min_{feature}'] = float(df[feature].min())
+            stats[f'max_{feature}'] = float(df[feature].max())
+
+        daily_scores = df.groupby('scheduled_departure_date_local')['difficulty_score'].apply(np.asarray).to_dict()
+        return cls(
+            load_airports(airports_path), stats, daily_scores, load_best_model(models_dir), models_dir,
+            open_feature_store(feature_store_dir)
+        )
+
+    @property
+    def model_name(self):
+        return self.model.name if self.model is not None else None
+
+    @property
+    def model_version(self):
+        return self.model.version if self.model is not None else None
+
+    def current_model(self):
+        if self.models_dir is None:
+            return self.model
+
+        version = ModelRegistry(self.models_dir).current_version()
+        if version is None or version in (self.model_version, self.failed_version):
+            return self.model
+
+        with self.model_lock:
+            if version != self.model_version:
+                model = load_best_model(self.models_dir, version)
+                if model is None:
+                    print(f"Keeping scoring model {self.model_version}; version {version} failed to load")
+                    self.failed_version = version
+                else:
+                    print(f"Scoring model switched from {self.model_version} to {version} ({model.name})")
+                    self.model = model
+        return self.model
+
+    def rule_scores(self, features):
+        score = np.zeros(len(features))
+        for feature, weight in SCORE_WEIGHTS.items():
+            values = features[feature].astype(float)
+            if feature in NORMALIZED_FEATURES:
+                low = self.feature_stats[f'min_{feature}']
+                high = self.feature_stats[f'max_{feature}']
+                values = ((values - low) / (high - low)).clip(0, 1) if high > low else values * 0
+            elif feature in ('fleet_complexity', 'time_complexity'):
+                values = (values - 1) / 2.0
+            score += weight * values.to_numpy()
+        return score
+
+    def classify(self, dates, scores):
+        results = []
+        for date, score in zip(dates, scores):
+            reference = self.daily_scores.get(date)
+            basis = 'same_day'
+            if reference is None:
+                reference = self.all_scores
+                basis = 'all_days'
+
+            rank = len(reference) - np.searchsorted(reference, score, side='right') + 1
+            count = len(reference) + 1
+            if rank <= count * DIFFICULT_SHARE:
+                classification = 'Difficult'
+            elif rank <= count * MEDIUM_SHARE:
+                classification = 'Medium'
+            else:
+                classification = 'Easy'
+            results.append({
+                'daily_rank': int(rank),
+                'daily_flight_count': int(count),
+                'difficulty_classification': classification,
+                'classification_basis': basis
+            })
+        return results
+
+    def predict_probabilities(self, features, model):
+        if model is None:
+            return [None] * len(features)
+
+        X = build_feature_matrix(served_features(features, self.feature_store), model.categories)
+        probabilities = model.predict_proba(X)
+        labels = [CLASS_LABELS[int(code)] for code in model.classes_]
+        return [
+            {label: float(probability) for label, probability in zip(labels, row)}
+            for row in probabilities
+        ]
+
+    def score(self, records):
+        features = derive_features(records, self.airports)
+        scores = self.rule_scores(features)
+        classes = self.classify(features['scheduled_departure_date_local'], scores)
+        model = self.current_model()
+        probabilities = self.predict_probabilities(features, model)
+
+        results = []
+        for position, (score, classification, class_probabilities) in enumerate(zip(scores, classes, probabilities)):
+            row = features.iloc[position]
+            result = {field: records[position][field] for field in ECHO_FIELDS if field in records[position]}
+            result['difficulty_score'] = float(score)
+            result.update(classification)
+            result['features'] = {feature: float(row[feature]) for feature in SCORE_WEIGHTS}
+            result['ml'] = None if class_probabilities is None else {
+                'model': model.name,
+                'version': model.version,
+                'probabilities': class_probabilities,
+                'predicted_class': max(class_probabilities, key=class_probabilities.get)
+            }
+            results.append(result)
+        return results
+
+def model_registry_status(scorer, models_dir=MODELS_DIR):
+    status = ModelRegistry(models_dir).summary()
+    model = scorer.current_model() if scorer is not None else None
+    status['serving'] = {'model': model.name, 'version': model.version} if model is not None else None
+    return status
+
+class MicroBatcher:
+    def __init__(self, process_batch, max_batch_size=256, max_wait=0.005):
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.worker = None
+        self.requests = 0
+        self.items = 0
+        self.batches = 0
+
+    def _ensure_worker(self):
+        if self.worker is not None and self.worker.is_alive():
+            return
+        with self.lock:
+            if self.worker is None or not self.worker.is_alive():
+                self.worker = threading.Thread(target=self._run, name='score-batcher', daemon=True)
+                self.worker.start()
+
+    def submit(self, records):
+        future = Future()
+        self.queue.put((records, future))
+        self._ensure_worker()
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            size = len(batch[0][0])
+            deadline = time.monotonic() + self.max_wait
+
+            while size < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(item)
+                size += len(item[0])
+
+            self._process(batch)
+
+    def _score(self, records):
+        try:
+            return self.process_batch(records)
+        finally:
+            with self.lock:
+                self.batches += 1
+
+    def _process(self, batch):
+        records = [record for request_records, _ in batch for record in request_records]
+        with self.lock:
+            self.requests += len(batch)
+            self.items += len(records)
+
+        try:
+            results = self._score(records)
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0][1].set_exception(e)
+                return
+            # Score each request alone so a bad record only fails its own request
+            for request_records, future in batch:
+                try:
+                    future.set_result(self._score(request_records))
+                except Exception as request_error:
+                    future.set_exception(request_error)
+            return
+
+        offset = 0
+        for request_records, future in batch:
+            future.set_result(results[offset:offset + len(request_records)])
+            offset += len(request_records)
+
+    def get_status(self):
+        with self.lock:
+            return {
+                'requests': self.requests,
+                'flights': self.items,
+                'batches': self.batches,
+                'avg_batch_size': round(self.items / self.batches, 2) if self.batches else 0.0,
+                'queued': self.queue.qsize()
+            }
@@ -0,0 +1,187 @@
+import math
+import time
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import GridSearchCV, ParameterGrid, StratifiedKFold, train_test_split
+import xgboost as xgb
+import lightgbm as lgb
+
+SEARCH_MODES = ['halving', 'grid']
+
+DEFAULT_SEARCH = {
+    'mode': 'halving',
+    'cv': 3,
+    'eta': 3,
+    'early_stopping_rounds': 20,
+    'early_stopping_fraction': 0.15,
+    'budget_seconds': 600
+}
+
+def _subset(data, index):
+    return data.iloc[index] if hasattr(data, 'iloc') else data[index]
+
+def fit_with_early_stopping(model, X_train, y_train, X_valid, y_valid, stopping_rounds):
+    if isinstance(model, xgb.XGBClassifier):
+        model.set_params(early_stopping_rounds=stopping_rounds)
+        model.fit(X_train, y_train, eval_set=[(X_valid, y_valid)], verbose=False)
+        return int(model.best_iteration) + 1
+
+    if isinstance(model, lgb.LGBMClassifier):
+        model.fit(
+            X_train, y_train, eval_set=[(X_valid, y_valid)],
+            callbacks=[lgb.early_stopping(stopping_rounds, verbose=False)]
+        )
+        return int(model.best_iteration_ or model.n_estimators)
+
+    model.fit(X_train, y_train)
+    return int(model.get_params().get('n_estimators', 1))
+
+class SuccessiveHalvingSearch:
+    def __init__(self, estimator, param_grid, cv=3, eta=3, early_stopping_rounds=20,
+                 early_stopping_fraction=0.15, budget_seconds=None, random_state=42):
+        self.estimator = estimator
+        self.param_grid = dict(param_grid)
+        self.max_rounds = max(self.param_grid.pop('n_estimators', [estimator.get_params()['n_estimators']]))
+        self.cv = cv
+        self.eta = eta
+        self.early_stopping_rounds = early_stopping_rounds
+        self.early_stopping_fraction = early_stopping_fraction
+        self.budget_seconds = budget_seconds
+        self.random_state = random_state
+        self.history = []
+        self.best_params_ = None
+        self.best_score_ = None
+        self.best_estimator_ = None
+        self.oof_probabilities_ = None
+        self.report_ = None
+
+    def rung_rounds(self, candidates):
+        rungs = max(1, math.ceil(math.log(candidates, self.eta))) if candidates > 1 else 1
+        return [
+            max(self.early_stopping_rounds * 2, int(self.max_rounds / self.eta ** (rungs - 1 - rung)))
+            for rung in range(rungs)
+        ]
+
+    def evaluate(self, params, rounds, X, y, folds):
+        scores = []
+        iterations = []
+        oof = np.zeros((len(y), len(np.unique(y))))
+        for fit_index, stop_index, valid_index in folds:
+            model = clone(self.estimator).set_params(**params, n_estimators=rounds)
+            iterations.append(fit_with_early_stopping(
+                model, _subset(X, fit_index), _subset(y, fit_index),
+                _subset(X, stop_index), _subset(y, stop_index), self.early_stopping_rounds
+            ))
+            oof[valid_index] = model.predict_proba(_subset(X, valid_index))
+            scores.append(accuracy_score(_subset(y, valid_index), model.classes_[np.argmax(oof[valid_index], axis=1)]))
+        return float(np.mean(scores)), int(np.median(iterations)), int(np.sum(iterations)), oof
+
+    def split_folds(self, X, y):
+        # Early stopping watches a slice of each training fold, so the
+        # validation fold that scores the candidate never picks its rounds
+        folds = []
+        splitter = StratifiedKFold(n_splits=self.cv, shuffle=True, random_state=self.random_state)
+        for train_index, valid_index in splitter.split(X, y):
+            fit_index, stop_index = train_test_split(
+                train_index, test_size=self.early_stopping_fraction,
+                stratify=np.asarray(y)[train_index], random_state=self.random_state
+            )
+            folds.append((np.sort(fit_index), np.sort(stop_index), valid_index))
+        return folds
+
+    def fit(self, X, y):
+        started = time.perf_counter()
+        folds = self.split_folds(X, y)
+        candidates = list(ParameterGrid(self.param_grid))
+        schedule = self.rung_rounds(len(candidates))
+
+        fits = 0
+        boosting_rounds = 0
+        best = None
+        out_of_budget = False
+
+        for rung, rounds in enumerate(schedule):
+            results = []
+            rung_oof = None
+            for params in candidates:
+                if results and self.budget_seconds is not None and time.perf_counter() - started > self.budget_seconds:
+                    out_of_budget = True
+                    break
+
+                score, best_iteration, trained_rounds, oof = self.evaluate(params, rounds, X, y, folds)
+                fits += len(folds)
+                boosting_rounds += trained_rounds
+                # Only the rung leader's out-of-fold predictions are kept
+                if not results or score > max(result[0] for result in results):
+                    rung_oof = oof
+
+                elapsed = time.perf_counter() - started
+                results.append((score, best_iteration, params, elapsed))
+                self.history.append({
+                    'rung': rung, 'rounds': rounds, 'params': params, 'score': score,
+                    'best_iteration': best_iteration, 'elapsed_seconds': round(elapsed, 3)
+                })
+
+            results.sort(key=lambda result: result[0], reverse=True)
+            best = results[0]
+            self.oof_probabilities_ = rung_oof
+            if out_of_budget:
+                break
+            candidates = [params for _, _, params, _ in results[:max(1, math.ceil(len(results) / self.eta))]]
+
+        # When the evaluation that produced the winning score finished
+        score, best_iteration, params, time_to_best = best
+        self.best_params_ = {**params, 'n_estimators': best_iteration}
+        self.best_score_ = score
+        self.best_estimator_ = clone(self.estimator).set_params(**self.best_params_).fit(X, y)
+
+        self.report_ = {
+            'mode': 'halving',
+            'candidates': len(ParameterGrid(self.param_grid)),
+            'rungs': schedule,
+            'fits': fits,
+            'boosting_rounds': boosting_rounds,
+            'cv_score': round(score, 4),
+            'seconds': round(time.perf_counter() - started, 3),
+            'time_to_best_seconds': round(time_to_best, 3),
+            'out_of_budget': out_of_budget
+        }
+        return self
+
+def grid_search(estimator, param_grid, X, y, cv=5, n_jobs=None):
+    started = time.perf_counter()
+    if n_jobs is not None:
+        estimator = clone(estimator).set_params(n_jobs=1)
+    search = GridSearchCV(estimator, param_grid, cv=cv, scoring='accuracy', n_jobs=n_jobs or -1)
+    search.fit(X, y)
+
+    candidates = list(ParameterGrid(param_grid))
+    default_rounds = estimator.get_params().get('n_estimators', 1)
+    search.report_ = {
+        'mode': 'grid',
+        'candidates': len(candidates),
+        'fits': len(candidates) * cv,
+        'boosting_rounds': sum(params.get('n_estimators', default_rounds) for params in candidates) * cv,
+        'cv_score': round(float(search.best_score_), 4),
+        'seconds': round(time.perf_counter() - started, 3),
+        'time_to_best_seconds': None,
+        'out_of_budget': False
+    }
+    return search
+
+def run_search(estimator, param_grid, X, y, config=None):
+    config = {**DEFAULT_SEARCH, **(config or {})}
+    if config['mode'] not in SEARCH_MODES:
+        raise ValueError(f"Unknown search mode '{config['mode']}' (expected one of {', '.join(SEARCH_MODES)})")
+
+    if config['mode'] == 'grid':
+        return grid_search(estimator, param_grid, X, y, cv=config.get('grid_cv', 5), n_jobs=config.get('n_jobs'))
+
+    return SuccessiveHalvingSearch(
+        estimator, param_grid, cv=config['cv'], eta=config['eta'],
+        early_stopping_rounds=config['early_stopping_rounds'],
+        early_stopping_fraction=config['early_stopping_fraction'],
+        budget_seconds=config['budget_seconds']
+    ).fit(X, y)
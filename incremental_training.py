@@ -0,0 +1,47 @@
+import copy
+
+DEFAULT_UPDATE = {
+    'holdout_days': 1,
+    'extra_rounds': 50,
+    'extra_trees': 20,
+    'tolerance': 0.0
+}
+
+def split_update_days(data, last_trained_date, holdout_days=1):
+    dates = data['scheduled_departure_date_local'].astype(str)
+    new_days = sorted(dates[dates > str(last_trained_date)].unique())
+    if len(new_days) <= holdout_days:
+        return None
+    update_days = new_days[:-holdout_days]
+    holdout = new_days[-holdout_days:]
+    return data[dates.isin(update_days)], data[dates.isin(holdout)], update_days, holdout
+
+def continue_training(model, X, y, extra_rounds=50, extra_trees=20):
+    from ensemble_cache import PrefitStackingClassifier, PrefitVotingClassifier
+
+    if hasattr(model, 'final_estimator'):
+        return PrefitStackingClassifier(
+            [(name, continue_training(estimator, X, y, extra_rounds, extra_trees)) for name, estimator in model.estimators],
+            model.final_estimator
+        )
+    if hasattr(model, 'estimators') and hasattr(model, 'weights'):
+        return PrefitVotingClassifier(
+            [(name, continue_training(estimator, X, y, extra_rounds, extra_trees)) for name, estimator in model.estimators],
+            model.weights
+        )
+    if hasattr(model, 'get_booster'):
+        params = {**model.get_params(), 'n_estimators': extra_rounds, 'early_stopping_rounds': None}
+        return type(model)(**params).fit(X, y, xgb_model=model.get_booster(), verbose=False)
+    if hasattr(model, 'booster_'):
+        params = {**model.get_params(), 'n_estimators': extra_rounds}
+        return type(model)(**params).fit(X, y, init_model=model.booster_)
+    if hasattr(model, 'steps'):
+        updated = copy.deepcopy(model)
+        name, final = updated.steps[-1]
+        updated.steps[-1] = (name, continue_training(final, updated[:-1].transform(X), y, extra_rounds, extra_trees))
+        return updated
+    if hasattr(model, 'estimators_') and 'warm_start' in model.get_params():
+        updated = copy.deepcopy(model)
+        updated.set_params(warm_start=True, n_estimators=len(updated.estimators_) + extra_trees)
+        return updated.fit(X, y)
+    raise ValueError(f"Cannot continue training {type(model).__name__}")
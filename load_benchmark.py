@@ -0,0 +1,432 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+RESULTS_DIR = 'benchmarks'
+DEFAULT_PORT = 8765
+SAMPLE_SCORE_FLIGHT = {
+    'company_id': 'UA',
+    'flight_number': 1234,
+    'scheduled_departure_date_local': '2025-08-04',
+    'scheduled_departure_station_code': 'ORD',
+    'scheduled_arrival_station_code': 'LAX',
+    'scheduled_departure_datetime_local': '2025-08-04T08:30:00',
+    'scheduled_arrival_datetime_local': '2025-08-04T11:05:00',
+    'actual_departure_datetime_local': '2025-08-04T08:52:00',
+    'actual_arrival_datetime_local': '2025-08-04T11:20:00',
+    'total_seats': 166,
+    'fleet_type': 'B737-800',
+    'carrier': 'Mainline',
+    'scheduled_ground_time_minutes': 55,
+    'minimum_turn_minutes': 45,
+    'total_passengers': 150,
+    'total_passengers_with_remarks': 12,
+    'unique_special_requests': 4,
+    'children_count': 6,
+    'lap_children_count': 1,
+    'stroller_users': 2,
+    'total_bags': 140,
+    'transfer_bags': 45
+}
+
+TARGETS = {
+    'flask': {
+        'command': [sys.executable, '-m', 'flask', '--app', 'app', 'run', '--port', '{port}', '--no-reload', '--with-threads'],
+        'health': '/api/health'
+    },
+    'fastapi': {
+        'command': [sys.executable, '-m', 'uvicorn', 'main:app', '--port', '{port}', '--log-level', 'warning'],
+        'health': '/api/health'
+    },
+    'vercel': {
+        'command': [sys.executable, '-m', 'uvicorn', 'api.index:app', '--port', '{port}', '--log-level', 'warning'],
+        'health': '/api/health'
+    }
+}
+
+MIXES = {
+    'dashboard': [
+        (4, 'GET', '/api/stats', None),
+        (2, 'GET', '/api/destinations', None),
+        (2, 'GET', '/api/fleet', None),
+        (1, 'GET', '/api/classification-chart', None),
+        (1, 'GET', '/api/destination-chart', None),
+        (1, 'GET', '/api/time-chart', None)
+    ],
+    'drilldown': [
+        (4, 'GET', '/api/flights?limit=50', None),
+        (2, 'GET', '/api/flights?limit=50&sort=departure', None),
+        (2, 'GET', '/api/top-difficult?start=2025-08-04T00:00&window=1d&k=20', None),
+        (1, 'GET', '/api/percentiles?metric=difficulty_score&group_by=destination', None)
+    ],
+    'scoring': [
+        (3, 'POST', '/api/score', SAMPLE_SCORE_FLIGHT),
+        (1, 'POST', '/api/score', {'flights': [SAMPLE_SCORE_FLIGHT] * 50})
+    ],
+    'static': [
+        (3, 'GET', '/api/destinations', None),
+        (3, 'GET', '/api/fleet', None),
+        (2, 'GET', '/api/time-data', None),
+        (1, 'GET', '/api/data', None)
+    ]
+}
+MIXES['mixed'] = MIXES['dashboard'] + MIXES['drilldown'] + MIXES['scoring']
+
+def _require_httpx():
+    try:
+        import httpx
+    except ImportError as e:
+        raise RuntimeError("The benchmark client requires httpx (pip install httpx)") from e
+    return httpx
+
+def parse_endpoint(spec):
+    method, _, path = spec.strip().partition(' ')
+    if not path:
+        method, path = 'GET', method
+    if not path.startswith('/'):
+        raise ValueError(f"Endpoint path must start with '/': {spec}")
+    return (1, method.upper(), path, None)
+
+def percentile_summary(latencies):
+    if not latencies:
+        return {'p50_ms': None, 'p95_ms': None, 'p99_ms': None, 'max_ms': None, 'mean_ms': None}
+    values = np.asarray(latencies) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        'p50_ms': round(float(p50), 2),
+        'p95_ms': round(float(p95), 2),
+        'p99_ms': round(float(p99), 2),
+        'max_ms': round(float(values.max()), 2),
+        'mean_ms': round(float(values.mean()), 2)
+    }
+
+class ProcessSampler:
+    def __init__(self, pid, interval=0.25):
+        self.pid = pid
+        self.interval = interval
+        self.clock_ticks = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+        self.page_size = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+        self.rss_samples = []
+        self.cpu_start = None
+        self.cpu_end = None
+        self.started = None
+        self.finished = None
+
+    def read_cpu_seconds(self):
+        try:
+            with open(f'/proc/{self.pid}/stat') as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+            return (int(fields[11]) + int(fields[12])) / self.clock_ticks
+        except (OSError, IndexError, ValueError):
+            return None
+
+    def read_rss_bytes(self):
+        try:
+            with open(f'/proc/{self.pid}/statm') as f:
+                return int(f.read().split()[1]) * self.page_size
+        except (OSError, IndexError, ValueError):
+            return None
+
+    async def run(self, stop_event):
+        self.started = time.perf_counter()
+        self.cpu_start = self.read_cpu_seconds()
+        while not stop_event.is_set():
+            rss = self.read_rss_bytes()
+            if rss is not None:
+                self.rss_samples.append(rss)
+            try:
+                await asyncio.wait_for(stop_event.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+        self.cpu_end = self.read_cpu_seconds()
+        self.finished = time.perf_counter()
+
+    def summary(self):
+        if self.pid is None or self.cpu_start is None or self.cpu_end is None:
+            return {'cpu_seconds': None, 'cpu_percent': None, 'rss_mean_mb': None, 'rss_peak_mb': None}
+        cpu_seconds = self.cpu_end - self.cpu_start
+        elapsed = self.finished - self.started
+        return {
+            'cpu_seconds': round(cpu_seconds, 3),
+            'cpu_percent': round(cpu_seconds / elapsed * 100, 1) if elapsed else None,
+            'rss_mean_mb': round(float(np.mean(self.rss_samples)) / 2**20, 1) if self.rss_samples else None,
+            'rss_peak_mb': round(max(self.rss_samples) / 2**20, 1) if self.rss_samples else None
+        }
+
+class ServerProcess:
+    def __init__(self, target, port, startup_timeout=120):
+        self.target = target
+        self.port = port
+        self.startup_timeout = startup_timeout
+        self.process = None
+        self.log = None
+        self.startup_seconds = None
+
+    @property
+    def base_url(self):
+        return f'http://127.0.0.1:{self.port}'
+
+    def start(self):
+        config = TARGETS[self.target]
+        command = [part.format(port=self.port) for part in config['command']]
+        self.log = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(
+            command, cwd=os.path.dirname(os.path.abspath(__file__)),
+            stdout=subprocess.DEVNULL, stderr=self.log
+        )
+
+    async def wait_ready(self, client):
+        started = time.perf_counter()
+        deadline = started + self.startup_timeout
+        health = TARGETS[self.target]['health']
+        while time.perf_counter() < deadline:
+            if self.process.poll() is not None:
+                self.log.seek(0)
+                error = self.log.read().decode(errors='replace')
+                raise RuntimeError(f"{self.target} server exited during startup:\n{error[-2000:]}")
+            try:
+                response = await client.get(self.base_url + health)
+                if response.status_code == 200:
+                    self.startup_seconds = round(time.perf_counter() - started, 3)
+                    return
+            except Exception:
+                pass
+            await asyncio.sleep(0.25)
+        raise RuntimeError(f"{self.target} server not ready after {self.startup_timeout}s")
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        if self.log is not None:
+            self.log.close()
+
+class LoadGenerator:
+    def __init__(self, base_url, mix, concurrency=10, duration=30, warmup=5, seed=0):
+        self.base_url = base_url.rstrip('/')
+        self.mix = mix
+        self.concurrency = concurrency
+        self.duration = duration
+        self.warmup = warmup
+        self.random = random.Random(seed)
+        self.weights = [weight for weight, _, _, _ in mix]
+        self.results = {}
+
+    def endpoint_name(self, method, path):
+        return f'{method} {path}'
+
+    async def send(self, client, method, path, body):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, self.base_url + path, json=body)
+            await response.aread()
+            status = str(response.status_code)
+        except Exception as e:
+            status = type(e).__name__
+        return status, time.perf_counter() - started
+
+    async def worker(self, client, deadline, record):
+        while time.perf_counter() < deadline:
+            _, method, path, body = self.random.choices(self.mix, weights=self.weights)[0]
+            status, elapsed = await self.send(client, method, path, body)
+            if record:
+                stats = self.results.setdefault(self.endpoint_name(method, path), {'latencies': [], 'statuses': {}})
+                stats['latencies'].append(elapsed)
+                stats['statuses'][status] = stats['statuses'].get(status, 0) + 1
+
+    async def phase(self, client, seconds, record):
+        deadline = time.perf_counter() + seconds
+        await asyncio.gather(*(self.worker(client, deadline, record) for _ in range(self.concurrency)))
+
+    async def run(self, client, sampler=None):
+        if self.warmup > 0:
+            await self.phase(client, self.warmup, record=False)
+
+        stop_event = asyncio.Event()
+        sampler_task = asyncio.create_task(sampler.run(stop_event)) if sampler is not None else None
+        started = time.perf_counter()
+        await self.phase(client, self.duration, record=True)
+        elapsed = time.perf_counter() - started
+        stop_event.set()
+        if sampler_task is not None:
+            await sampler_task
+        return elapsed
+
+    def summary(self, elapsed):
+        endpoints = {}
+        all_latencies = []
+        for name, stats in sorted(self.results.items()):
+            count = len(stats['latencies'])
+            errors = sum(n for status, n in stats['statuses'].items() if not status.startswith(('2', '3')))
+            endpoints[name] = {
+                'requests': count,
+                'errors': errors,
+                'throughput_rps': round(count / elapsed, 2),
+                'statuses': stats['statuses'],
+                **percentile_summary(stats['latencies'])
+            }
+            all_latencies.extend(stats['latencies'])
+
+        total = len(all_latencies)
+        return {
+            'requests': total,
+            'errors': sum(endpoint['errors'] for endpoint in endpoints.values()),
+            'throughput_rps': round(total / elapsed, 2) if elapsed else None,
+            **percentile_summary(all_latencies),
+            'endpoints': endpoints
+        }
+
+def git_revision():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], capture_output=True, text=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, dirty
+
+async def run_benchmark(target, mix, mix_name, concurrency, duration, warmup, port, url=None, seed=0, startup_timeout=120):
+    httpx = _require_httpx()
+    server = None
+    sampler = None
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(timeout=60, limits=limits) as client:
+        try:
+            if url is None:
+                server = ServerProcess(target, port, startup_timeout)
+                server.start()
+                await server.wait_ready(client)
+                sampler = ProcessSampler(server.process.pid)
+                url = server.base_url
+
+            generator = LoadGenerator(url, mix, concurrency, duration, warmup, seed)
+            elapsed = await generator.run(client, sampler)
+        finally:
+            if server is not None:
+                server.stop()
+
+    commit, dirty = git_revision()
+    return {
+        'target': target,
+        'mix': mix_name,
+        'url': url,
+        'created_at': datetime.now().isoformat(),
+        'git_commit': commit,
+        'git_dirty': dirty,
+        'python': platform.python_version(),
+        'config': {'concurrency': concurrency, 'duration': duration, 'warmup': warmup, 'seed': seed},
+        'startup_seconds': server.startup_seconds if server is not None else None,
+        'elapsed_seconds': round(elapsed, 3),
+        'server': sampler.summary() if sampler is not None else None,
+        'summary': generator.summary(elapsed)
+    }
+
+def save_result(result, results_dir=RESULTS_DIR):
+    os.makedirs(results_dir, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    revision = (result['git_commit'] or 'nogit') + ('-dirty' if result['git_dirty'] else '')
+    path = os.path.join(results_dir, f"{stamp}-{result['target']}-{result['mix']}-{revision}.json")
+    with open(path, 'w') as f:
+        json.dump(result, f, indent=2)
+    return path
+
+def _delta(current, baseline):
+    if current is None or baseline is None or not baseline:
+        return ''
+    return f" ({(current - baseline) / baseline * 100:+.1f}%)"
+
+def print_report(result, baseline=None):
+    summary = result['summary']
+    base_endpoints = baseline['summary']['endpoints'] if baseline else {}
+    print(f"\n📊 {result['target']} / {result['mix']} @ {result['git_commit'] or 'unknown'}"
+          f" — {result['config']['concurrency']} workers for {result['elapsed_seconds']}s")
+    if baseline:
+        print(f"   compared with {baseline['git_commit'] or 'unknown'} ({baseline['created_at']})")
+
+    header = f"{'endpoint':<60} {'reqs':>7} {'err':>5} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    print(header)
+    print('-' * len(header))
+    for name, stats in summary['endpoints'].items():
+        print(f"{name[:60]:<60} {stats['requests']:>7} {stats['errors']:>5} {stats['throughput_rps']:>9} "
+              f"{stats['p50_ms']:>9} {stats['p95_ms']:>9} {stats['p99_ms']:>9}")
+        base = base_endpoints.get(name)
+        if base:
+            print(f"{'':<60} {'':>7} {'':>5} {_delta(stats['throughput_rps'], base['throughput_rps']):>9} "
+                  f"{_delta(stats['p50_ms'], base['p50_ms']):>9} {_delta(stats['p95_ms'], base['p95_ms']):>9} "
+                  f"{_delta(stats['p99_ms'], base['p99_ms']):>9}")
+    print('-' * len(header))
+    print(f"{'total':<60} {summary['requests']:>7} {summary['errors']:>5} {summary['throughput_rps']:>9} "
+          f"{summary['p50_ms']:>9} {summary['p95_ms']:>9} {summary['p99_ms']:>9}")
+    if baseline:
+        base = baseline['summary']
+        print(f"{'':<60} {'':>7} {'':>5} {_delta(summary['throughput_rps'], base['throughput_rps']):>9} "
+              f"{_delta(summary['p50_ms'], base['p50_ms']):>9} {_delta(summary['p95_ms'], base['p95_ms']):>9} "
+              f"{_delta(summary['p99_ms'], base['p99_ms']):>9}")
+
+    server = result['server']
+    if server and server['cpu_seconds'] is not None:
+        print(f"🖥️  Server CPU {server['cpu_seconds']}s ({server['cpu_percent']}%), "
+              f"RSS mean {server['rss_mean_mb']} MB, peak {server['rss_peak_mb']} MB")
+    if result['startup_seconds'] is not None:
+        print(f"⏱️  Ready after {result['startup_seconds']}s")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the dashboard servers and report per-endpoint latency")
+    parser.add_argument('--target', default='fastapi', choices=sorted(TARGETS))
+    parser.add_argument('--mix', default='dashboard', choices=sorted(MIXES))
+    parser.add_argument('--endpoint', action='append', help="Override the mix, e.g. 'GET /api/stats' (repeatable)")
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--duration', type=float, default=30, help="Measured seconds")
+    parser.add_argument('--warmup', type=float, default=5, help="Unmeasured seconds before measuring")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--url', help="Benchmark an already running server instead of starting one")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--startup-timeout', type=float, default=120)
+    parser.add_argument('--results-dir', default=RESULTS_DIR)
+    parser.add_argument('--compare', help="Previous result JSON to compare against")
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args(argv)
+
+    try:
+        mix = [parse_endpoint(spec) for spec in args.endpoint] if args.endpoint else MIXES[args.mix]
+        mix_name = 'custom' if args.endpoint else args.mix
+        baseline = None
+        if args.compare:
+            with open(args.compare) as f:
+                baseline = json.load(f)
+        if args.concurrency < 1 or args.duration <= 0:
+            raise ValueError("concurrency must be >= 1 and duration > 0")
+    except (ValueError, OSError) as e:
+        print(f"❌ {e}")
+        return 1
+
+    print(f"🚦 Benchmarking {args.url or args.target} with the {mix_name} mix...")
+    try:
+        result = asyncio.run(run_benchmark(
+            args.target, mix, mix_name, args.concurrency, args.duration, args.warmup,
+            args.port, args.url, args.seed, args.startup_timeout
+        ))
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return 1
+
+    print_report(result, baseline)
+    if not args.no_save:
+        print(f"💾 Saved {save_result(result, args.results_dir)}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
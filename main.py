@@ -1,22 +1,43 @@
 from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 import pandas as pd
 import plotly.graph_objs as go
 import plotly.utils
+import asyncio
 import json
 import os
 from datetime import datetime, timedelta
 import numpy as np
 from typing import Dict, List
 
+from dashboard_stream import DashboardStreamHub
+from flight_queries import DataFrameFlightRepository, parse_flight_query
+from flight_export import DataFrameChunkSource, stream_flight_export
+from rollup_cube import RollupCube
+from quantile_sketch import QuantileSketchStore, parse_percentile_query
+from top_difficult import TopDifficultIndex, parse_top_query, top_difficult_response
+from flight_attribution import FlightExplainer, attach_attributions, parse_explain
+from flight_scoring import FlightScorer, MicroBatcher, model_registry_status, parse_score_request
+from request_coalescing import SingleFlight, coalesce
+from result_cache import ResultCache, cached
+from precompute import PrecomputeScheduler
+from warmup import WarmupState
+from metrics import CONTENT_TYPE, DATAFRAME_LOAD_SECONDS, METRICS, MetricsMiddleware, analyzer_collector, observe_time
+from request_profiling import (
+    PROFILE_HEADER, PROFILE_PARAM, PROFILES, RequestProfilingMiddleware, profiling_requested, stage
+)
+
 app = FastAPI(
     title="United Airlines Flight Difficulty Dashboard",
     description="Real-time analysis of United Airlines flight operations and difficulty patterns",
     version="1.0.0"
 )
 
+app.add_middleware(RequestProfilingMiddleware)
+app.add_middleware(MetricsMiddleware)
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 templates = Jinja2Templates(directory="templates")
@@ -24,7 +45,17 @@ templates = Jinja2Templates(directory="templates")
 class FastAPIFlightAnalyzer:
 
     def __init__(self):
-        self.flight_data = self.generate_sample_data()
+        self.single_flight = SingleFlight()
+        self.result_cache = ResultCache()
+        with observe_time(DATAFRAME_LOAD_SECONDS, 'sample_data'):
+            self.flight_data = self.generate_sample_data()
+        self.data_version = self.compute_data_version(self.flight_data)
+        self.flight_repository = DataFrameFlightRepository(self.flight_data)
+        self.cube = RollupCube.from_dataframe(self.flight_data)
+        self.quantile_store = QuantileSketchStore.from_dataframe(self.flight_data)
+        self.top_index = TopDifficultIndex.from_dataframe(self.flight_data)
+        self.scorer = FlightScorer.from_dataframe(self.flight_data)
+        self.flight_explainer = FlightExplainer()
 
     def generate_sample_data(self):
         np.random.seed(42)
@@ -81,45 +112,51 @@ class FastAPIFlightAnalyzer:
 
         return pd.DataFrame(data)
 
-    def get_dashboard_stats(self) -> Dict:
-        df = self.load_flight_data()
+    def compute_data_version(self, df) -> str:
+        row_hash = int(pd.util.hash_pandas_object(df, index=False).sum()) & 0xFFFFFFFFFFFFFFFF
+        return f"{len(df):x}-{row_hash:016x}"
+
+    def get_data_version(self) -> str:
+        return self.data_version
+
+    def get_row_counts(self) -> Dict:
         return {
-            'total_flights': len(df),
-            'avg_delay': round(float(df['departure_delay_minutes'].mean()), 1),
-            'delayed_pct': round(float((df['is_delayed'] == 1).mean() * 100), 1),
-            'avg_difficulty': round(float(df['difficulty_score'].mean()), 3),
-            'difficulty_distribution': df['difficulty_classification'].value_counts().to_dict()
+            'flights': len(self.flight_data),
+            'rollup_cells': len(self.cube.cells),
+            'quantile_sketches': len(self.quantile_store.sketches),
+            'top_difficult_index': len(self.top_index)
         }
 
+    @cached()
+    @coalesce
+    def get_dashboard_stats(self) -> Dict:
+        stats = self.cube.dashboard_stats()
+        stats['avg_delay'] = round(stats['avg_delay'], 1)
+        stats['delayed_pct'] = round(stats['delayed_pct'], 1)
+        stats['avg_difficulty'] = round(stats['avg_difficulty'], 3)
+        return stats
+
+    @coalesce
     def load_flight_data(self):
         return self.flight_data
 
+    @cached()
+    @coalesce
     def get_destination_analysis(self):
-        df = self.load_flight_data()
-        dest_analysis = df.groupby('scheduled_arrival_station_code').agg({
-            'difficulty_classification': lambda x: (x == 'Difficult').sum(),
-            'difficulty_score': 'mean',
-            'departure_delay_minutes': 'mean'
-        }).sort_values('difficulty_classification', ascending=False).head(15)
-        return dest_analysis.reset_index()
+        return self.cube.difficulty_breakdown('destination', ['difficulty_score', 'departure_delay_minutes'])
 
+    @cached()
+    @coalesce
     def get_fleet_analysis(self):
-        df = self.load_flight_data()
-        fleet_analysis = df.groupby('fleet_type').agg({
-            'difficulty_classification': lambda x: (x == 'Difficult').sum(),
-            'difficulty_score': 'mean',
-            'total_passengers': 'mean'
-        }).sort_values('difficulty_classification', ascending=False).head(15)
-        return fleet_analysis.reset_index()
+        return self.cube.difficulty_breakdown('fleet_type', ['difficulty_score', 'total_passengers'])
 
+    @cached()
+    @coalesce
     def get_time_analysis(self):
-        df = self.load_flight_data()
-        time_analysis = df.groupby('departure_hour').agg({
-            'difficulty_classification': lambda x: (x == 'Difficult').sum(),
-            'departure_delay_minutes': 'mean'
-        }).reset_index()
-        return time_analysis
+        return self.cube.difficulty_breakdown('departure_hour', ['departure_delay_minutes'], limit=None, sort=False)
 
+    @cached()
+    @coalesce
     def create_classification_chart(self):
         df = self.load_flight_data()
         classification_counts = df['difficulty_classification'].value_counts()
@@ -141,8 +178,11 @@ class FastAPIFlightAnalyzer:
             margin=dict(t=50)
         )
 
-        return json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+        with stage('json'):
+            return json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
 
+    @cached()
+    @coalesce
     def create_destination_chart(self):
         dest_data = self.get_destination_analysis()
 
@@ -161,8 +201,11 @@ class FastAPIFlightAnalyzer:
             margin=dict(t=50)
         )
 
-        return json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+        with stage('json'):
+            return json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
 
+    @cached()
+    @coalesce
     def create_time_chart(self):
         time_data = self.get_time_analysis()
 
@@ -198,9 +241,71 @@ class FastAPIFlightAnalyzer:
             margin=dict(t=50)
         )
 
-        return json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+        with stage('json'):
+            return json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+
+    @cached()
+    @coalesce
+    def list_flights(self, query: Dict) -> Dict:
+        return self.flight_repository.list_flights(query)
+
+    def explain_flights(self, flights: List[Dict], top: int) -> List[Dict]:
+        attributions = self.flight_explainer.explain_dataframe(
+            self.flight_data, [flight['flight_id'] for flight in flights], top
+        )
+        return attach_attributions(flights, attributions)
+
+    def export_flights(self, query: Dict, export_format: str = 'csv', columns: str = None):
+        mask = self.flight_repository.filter_mask(query)
+        source = DataFrameChunkSource(self.flight_data, mask, columns)
+        return stream_flight_export(source, export_format)
+
+    @cached()
+    @coalesce
+    def get_percentiles(self, query: Dict) -> List[Dict]:
+        return self.quantile_store.percentiles(
+            query['metric'], query['quantiles'], query['destinations'], query['hours'], query['group_by']
+        )
+
+    @cached()
+    @coalesce
+    def get_top_difficult(self, query: Dict) -> Dict:
+        return top_difficult_response(self.top_index, self.flight_repository, query)
+
+    def score_flights(self, records: List[Dict]) -> List[Dict]:
+        return self.scorer.score(records)
+
+    @cached()
+    @coalesce
+    def get_stream_snapshot(self) -> Dict:
+        return {
+            'stats': self.get_dashboard_stats(),
+            'destinations': self.get_destination_analysis().to_dict('records'),
+            'fleet': self.get_fleet_analysis().to_dict('records'),
+            'classification_chart': json.loads(self.create_classification_chart()),
+            'destination_chart': json.loads(self.create_destination_chart()),
+            'time_chart': json.loads(self.create_time_chart())
+        }
 
 analyzer = FastAPIFlightAnalyzer()
+stream_hub = DashboardStreamHub(analyzer.get_stream_snapshot, analyzer.get_data_version)
+score_batcher = MicroBatcher(analyzer.score_flights)
+precompute_scheduler = PrecomputeScheduler(analyzer)
+METRICS.add_collector(analyzer_collector(analyzer))
+
+warmup_state = WarmupState()
+
+@app.on_event("startup")
+async def start_warmup():
+    warmup_state.start([
+        ('aggregates', precompute_scheduler.refresh_all),
+        ('flight_pages', lambda: [analyzer.list_flights(parse_flight_query({'sort': sort})) for sort in ('score', 'departure')]),
+        ('percentiles', lambda: analyzer.get_percentiles(parse_percentile_query({})))
+    ], on_ready=lambda: precompute_scheduler.start(refresh_now=False))
+
+@app.on_event("shutdown")
+async def stop_precompute():
+    precompute_scheduler.stop()
 
 @app.get("/", response_class=HTMLResponse)
 async def dashboard(request: Request):
@@ -212,45 +317,144 @@ async def about(request: Request):
 
 @app.get("/api/stats")
 async def get_stats():
-    stats = analyzer.get_dashboard_stats()
+    stats = await run_in_threadpool(analyzer.get_dashboard_stats)
     return stats
 
 @app.get("/api/classification-chart")
 async def get_classification_chart():
-    chart_json = analyzer.create_classification_chart()
+    chart_json = await run_in_threadpool(analyzer.create_classification_chart)
     return JSONResponse(content={"chart": json.loads(chart_json)})
 
 @app.get("/api/destination-chart")
 async def get_destination_chart():
-    chart_json = analyzer.create_destination_chart()
+    chart_json = await run_in_threadpool(analyzer.create_destination_chart)
     return JSONResponse(content={"chart": json.loads(chart_json)})
 
 @app.get("/api/time-chart")
 async def get_time_chart():
-    chart_json = analyzer.create_time_chart()
+    chart_json = await run_in_threadpool(analyzer.create_time_chart)
     return JSONResponse(content={"chart": json.loads(chart_json)})
 
 @app.get("/api/destinations")
 async def get_destinations():
-    dest_data = analyzer.get_destination_analysis()
+    dest_data = await run_in_threadpool(analyzer.get_destination_analysis)
     return dest_data.to_dict('records')
 
 @app.get("/api/fleet")
 async def get_fleet():
-    fleet_data = analyzer.get_fleet_analysis()
+    fleet_data = await run_in_threadpool(analyzer.get_fleet_analysis)
     return fleet_data.to_dict('records')
 
+@app.get("/api/flights")
+async def get_flights(request: Request):
+    try:
+        query = parse_flight_query(request.query_params)
+        top = parse_explain(request.query_params)
+        page = await run_in_threadpool(analyzer.list_flights, query)
+        if top:
+            page = {**page, 'flights': await run_in_threadpool(analyzer.explain_flights, page['flights'], top)}
+        return page
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+
+@app.get("/api/export")
+async def export_flights(request: Request):
+    try:
+        query = parse_flight_query(request.query_params)
+        body, media_type, filename = analyzer.export_flights(
+            query, request.query_params.get('format', 'csv'), request.query_params.get('columns')
+        )
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+@app.get("/api/percentiles")
+async def get_percentiles(request: Request):
+    try:
+        query = parse_percentile_query(request.query_params)
+        groups = await run_in_threadpool(analyzer.get_percentiles, query)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    return {'metric': query['metric'], 'group_by': query['group_by'], 'groups': groups}
+
+@app.get("/api/top-difficult")
+async def get_top_difficult(request: Request):
+    try:
+        query = parse_top_query(request.query_params)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    return await run_in_threadpool(analyzer.get_top_difficult, query)
+
+@app.post("/api/score")
+async def score_flights(request: Request):
+    try:
+        records = parse_score_request(await request.json())
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+
+    flights = await asyncio.wrap_future(score_batcher.submit(records))
+    return {'count': len(flights), 'flights': flights}
+
+@app.get("/api/models")
+async def list_models():
+    return await run_in_threadpool(model_registry_status, analyzer.scorer)
+
+@app.get("/api/stream")
+async def stream(request: Request):
+    return StreamingResponse(
+        stream_hub.stream_async(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/api/health")
 async def health_check():
-    return {
-        'status': 'healthy',
+    ready = warmup_state.ready.is_set()
+    warmup = warmup_state.get_status()
+    if not ready:
+        status = 'warming_up'
+    elif warmup['errors']:
+        status = 'degraded'
+    else:
+        status = 'healthy'
+
+    return JSONResponse(status_code=200 if ready else 503, content={
+        'status': status,
+        'ready': ready,
         'timestamp': datetime.now().isoformat(),
         'database_exists': True,
         'sample_data': True,
+        'data_version': analyzer.get_data_version(),
+        'row_counts': analyzer.get_row_counts(),
+        'warmup': warmup,
+        'cache': analyzer.result_cache.get_status(),
+        'coalescing': analyzer.single_flight.get_status(),
+        'precompute': precompute_scheduler.get_status(),
         'deployment': 'fastapi',
         'framework': 'FastAPI',
         'version': '1.0.0'
-    }
+    })
+
+@app.get("/metrics")
+async def metrics():
+    return Response(METRICS.render(), media_type=CONTENT_TYPE)
+
+@app.get("/api/profiles/{profile_id}")
+async def get_profile(profile_id: str, request: Request):
+    if not profiling_requested(request.headers.get(PROFILE_HEADER) or request.query_params.get(PROFILE_PARAM)):
+        return JSONResponse(status_code=403, content={"error": "Profiling is disabled or the profile token is invalid"})
+
+    profile = PROFILES.get(profile_id)
+    if profile is None:
+        return JSONResponse(status_code=404, content={"error": "Profile not found"})
+    if request.query_params.get('format') == 'json':
+        return profile
+    return Response(profile['folded'], media_type='text/plain')
 
 @app.get("/api/demo")
 async def demo():
@@ -275,7 +479,14 @@ async def demo():
             '/api/fleet',
             '/api/classification-chart',
             '/api/destination-chart',
-            '/api/time-chart'
+            '/api/time-chart',
+            '/api/flights',
+            '/api/export',
+            '/api/percentiles',
+            '/api/top-difficult',
+            '/api/score',
+            '/api/stream',
+            '/metrics'
         ]
     }
 
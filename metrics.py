@@ -0,0 +1,241 @@
+import bisect
+import os
+import resource
+import threading
+import time
+from contextlib import contextmanager
+
+from request_profiling import record_stage
+
+PREFIX = 'flight_dashboard_'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, label_names=()):
+        self.name = PREFIX + name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+
+    def labels_for(self, label_values):
+        return dict(zip(self.label_names, label_values))
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, *label_values, amount=1):
+        with self.lock:
+            self.series[label_values] = self.series.get(label_values, 0) + amount
+
+    def render(self):
+        with self.lock:
+            series = list(self.series.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labels_for(values))} {_format_value(total)}"
+            for values, total in series
+        ]
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def dec(self, *label_values, amount=1):
+        self.inc(*label_values, amount=-amount)
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS, stage=None):
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(buckets)
+        self.stage = stage
+
+    def observe(self, value, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(label_values)
+            if series is None:
+                series = self.series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        with self.lock:
+            series = [(values, list(counts), total, count) for values, (counts, total, count) in self.series.items()]
+
+        lines = self.header()
+        for values, counts, total, count in series:
+            labels = self.labels_for(values)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': _format_value(bound)})} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector):
+        self.collectors.append(collector)
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+
+        for collector in self.collectors:
+            try:
+                samples = collector()
+            except Exception as e:
+                print(f"Metrics collector failed: {e}")
+                continue
+            for name, kind, help_text, value in samples:
+                if value is None:
+                    continue
+                lines.append(f"# HELP {PREFIX}{name} {help_text}")
+                lines.append(f"# TYPE {PREFIX}{name} {kind}")
+                lines.append(f"{PREFIX}{name} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+METRICS = MetricsRegistry()
+
+REQUESTS_TOTAL = METRICS.register(Counter(
+    'http_requests_total', 'HTTP requests by method, route and status', ('method', 'route', 'status')
+))
+REQUEST_SECONDS = METRICS.register(Histogram(
+    'http_request_duration_seconds', 'Time to produce the response headers', ('method', 'route')
+))
+REQUESTS_IN_FLIGHT = METRICS.register(Gauge(
+    'http_requests_in_flight', 'Requests currently being served, including open streams'
+))
+DATAFRAME_LOAD_SECONDS = METRICS.register(Histogram(
+    'dataframe_load_seconds', 'Time spent loading flight data into a DataFrame', ('source',), stage='dataframe'
+))
+SQL_QUERY_SECONDS = METRICS.register(Histogram(
+    'sql_query_seconds', 'Time spent executing and fetching SQLite queries', ('query',), stage='sql'
+))
+
+@contextmanager
+def observe_time(histogram, *label_values):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        histogram.observe(elapsed, *label_values)
+        if histogram.stage is not None:
+            record_stage(histogram.stage, elapsed)
+
+def _resident_memory_bytes():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+_PROCESS_START = time.time()
+
+def process_collector():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return [
+        ('process_resident_memory_bytes', 'gauge', 'Resident set size of the server process', _resident_memory_bytes()),
+        ('process_cpu_seconds_total', 'counter', 'User and system CPU time', round(usage.ru_utime + usage.ru_stime, 6)),
+        ('process_start_time_seconds', 'gauge', 'Process start time since the epoch', round(_PROCESS_START, 3))
+    ]
+
+def analyzer_collector(analyzer):
+    def collect():
+        cache = analyzer.result_cache.get_status()
+        coalescing = analyzer.single_flight.get_status()
+        return [
+            ('result_cache_hit_ratio', 'gauge', 'Result cache hits over lookups', cache['hit_ratio']),
+            ('result_cache_hits_total', 'counter', 'Result cache hits', cache['hits']),
+            ('result_cache_misses_total', 'counter', 'Result cache misses', cache['misses']),
+            ('result_cache_evictions_total', 'counter', 'Result cache LRU evictions', cache['evictions']),
+            ('result_cache_bytes', 'gauge', 'Estimated bytes held by the result cache', cache['bytes']),
+            ('result_cache_entries', 'gauge', 'Entries held by the result cache', cache['entries']),
+            ('coalesced_calls_total', 'counter', 'Analyzer calls that joined an in-flight computation', coalescing['coalesced']),
+            ('coalesced_ratio', 'gauge', 'Coalesced analyzer calls over all calls', coalescing['coalesced_ratio'])
+        ]
+    return collect
+
+METRICS.add_collector(process_collector)
+
+def install_flask_metrics(app):
+    from flask import g, request
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_started = time.perf_counter()
+        REQUESTS_IN_FLIGHT.inc()
+
+    @app.after_request
+    def record_request(response):
+        started = g.get('metrics_started')
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            REQUEST_SECONDS.observe(time.perf_counter() - started, request.method, route)
+            REQUESTS_TOTAL.inc(request.method, route, str(response.status_code))
+        return response
+
+    @app.teardown_request
+    def finish_request(exc):
+        if g.pop('metrics_started', None) is not None:
+            REQUESTS_IN_FLIGHT.dec()
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = {'code': 500}
+        REQUESTS_IN_FLIGHT.inc()
+
+        async def send_with_metrics(message):
+            if message['type'] == 'http.response.start':
+                status['code'] = message['status']
+                route = scope.get('route')
+                REQUEST_SECONDS.observe(
+                    time.perf_counter() - started, scope['method'], getattr(route, 'path', 'unmatched')
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            route = scope.get('route')
+            REQUESTS_TOTAL.inc(scope['method'], getattr(route, 'path', 'unmatched'), str(status['code']))
@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+
+from feature_store import FEATURE_STORE_DIR, FeatureStore
+
+NUMERIC_FEATURES = [
+    'load_factor', 'ground_time_pressure', 'transfer_bag_ratio',
+    'ssr_intensity', 'is_international', 'has_children', 'has_strollers',
+    'fleet_complexity', 'time_complexity', 'total_passengers',
+    'total_bags', 'children_count', 'lap_children_count',
+    'departure_hour', 'departure_dayofweek', 'departure_month',
+    'is_peak_morning', 'is_peak_evening', 'is_weekend',
+    'seats_per_bag', 'passengers_per_bag', 'has_special_needs',
+    'high_load_factor', 'tight_schedule', 'load_x_ground_pressure',
+    'bags_x_transfer_ratio', 'passengers_x_ssr'
+]
+
+INT8_FEATURES = [
+    'is_international', 'has_children', 'has_strollers',
+    'fleet_complexity', 'time_complexity',
+    'departure_hour', 'departure_dayofweek', 'departure_month',
+    'is_peak_morning', 'is_peak_evening', 'is_weekend',
+    'has_special_needs', 'high_load_factor', 'tight_schedule'
+]
+
+CATEGORICAL_FEATURES = ['fleet_type', 'scheduled_arrival_station_code', 'carrier']
+
+FEATURE_COLUMNS = NUMERIC_FEATURES + CATEGORICAL_FEATURES
+
+CLASS_LABELS = ['Easy', 'Medium', 'Difficult']
+
+FEATURE_SET_VERSION = 2
+
+FEATURE_SOURCE_COLUMNS = [
+    'scheduled_departure_datetime_local', 'scheduled_departure_date_local',
+    'total_seats', 'total_passengers', 'total_bags', 'unique_special_requests',
+    'load_factor', 'ground_time_pressure', 'transfer_bag_ratio', 'ssr_intensity'
+]
+
+DERIVED_FEATURE_COLUMNS = [
+    'departure_hour', 'departure_dayofweek', 'departure_month',
+    'is_peak_morning', 'is_peak_evening', 'is_weekend',
+    'seats_per_bag', 'passengers_per_bag',
+    'has_special_needs', 'high_load_factor', 'tight_schedule',
+    'load_x_ground_pressure', 'bags_x_transfer_ratio', 'passengers_x_ssr'
+]
+
+def compute_advanced_features(data):
+    departure = pd.to_datetime(data['scheduled_departure_datetime_local'])
+    departure_date = pd.to_datetime(data['scheduled_departure_date_local'])
+
+    df = pd.DataFrame(index=data.index)
+    df['departure_hour'] = departure.dt.hour.fillna(0).astype(np.int8)
+    df['departure_dayofweek'] = departure_date.dt.dayofweek.fillna(0).astype(np.int8)
+    df['departure_month'] = departure_date.dt.month.fillna(0).astype(np.int8)
+
+    df['is_peak_morning'] = df['departure_hour'].between(6, 9).astype(np.int8)
+    df['is_peak_evening'] = df['departure_hour'].between(16, 19).astype(np.int8)
+    df['is_weekend'] = df['departure_dayofweek'].isin([5, 6]).astype(np.int8)
+
+    df['seats_per_bag'] = (data['total_seats'] / (data['total_bags'] + 1)).astype(np.float32)
+    df['passengers_per_bag'] = (data['total_passengers'] / (data['total_bags'] + 1)).astype(np.float32)
+
+    df['has_special_needs'] = (data['unique_special_requests'] > 0).astype(np.int8)
+    df['high_load_factor'] = (data['load_factor'] > 1.0).astype(np.int8)
+    df['tight_schedule'] = (data['ground_time_pressure'] > 2.0).astype(np.int8)
+
+    df['load_x_ground_pressure'] = (data['load_factor'] * data['ground_time_pressure']).astype(np.float32)
+    df['bags_x_transfer_ratio'] = (data['total_bags'] * data['transfer_bag_ratio']).astype(np.float32)
+    df['passengers_x_ssr'] = (data['total_passengers'] * data['ssr_intensity']).astype(np.float32)
+
+    return df[DERIVED_FEATURE_COLUMNS]
+
+def feature_categories(data):
+    return {
+        column: sorted(data[column].dropna().astype(str).unique().tolist()) if column in data.columns else []
+        for column in CATEGORICAL_FEATURES
+    }
+
+def build_feature_matrix(data, categories):
+    X = pd.DataFrame(index=data.index)
+    for column in NUMERIC_FEATURES:
+        values = pd.to_numeric(data[column], errors='coerce').fillna(0)
+        X[column] = values.astype(np.int8 if column in INT8_FEATURES else np.float32)
+    for column in CATEGORICAL_FEATURES:
+        values = data[column].astype(str).where(data[column].notna()) if column in data.columns else np.nan
+        X[column] = pd.Categorical(pd.Series(values, index=data.index), categories=categories[column])
+    return X
+
+def prepare_advanced_features(data):
+    features = compute_advanced_features(data)
+    return pd.concat([data.drop(columns=DERIVED_FEATURE_COLUMNS, errors='ignore'), features], axis=1)
+
+def open_feature_store(path=FEATURE_STORE_DIR):
+    return FeatureStore(
+        compute_advanced_features, FEATURE_SOURCE_COLUMNS, DERIVED_FEATURE_COLUMNS, FEATURE_SET_VERSION, path
+    ) if path else None
+
+def served_features(data, feature_store=None):
+    if feature_store is None:
+        return prepare_advanced_features(data)
+    try:
+        features = feature_store.lookup(data)
+    except (ValueError, OSError) as e:
+        print(f"Feature store unavailable ({e}); computing features in memory")
+        return prepare_advanced_features(data)
+    return pd.concat([data.drop(columns=DERIVED_FEATURE_COLUMNS, errors='ignore'), features], axis=1)
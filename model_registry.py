@@ -0,0 +1,226 @@
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+
+CURRENT_FILE = 'CURRENT'
+MANIFEST_FILE = 'manifest.json'
+SCALER_FILE = 'scaler.pkl'
+
+def data_fingerprint(data, columns=None):
+    frame = data[columns] if columns is not None else data
+    hashes = pd.util.hash_pandas_object(frame, index=False).to_numpy()
+    return hashlib.sha1(hashes.tobytes()).hexdigest()[:16]
+
+def _json_default(value):
+    return value.item() if hasattr(value, 'item') else str(value)
+
+class LazyModelEntry(dict):
+    def __init__(self, loader, **metadata):
+        super().__init__(**metadata)
+        self.loader = loader
+
+    def __missing__(self, key):
+        if key != 'model':
+            raise KeyError(key)
+        self['model'] = self.loader()
+        return self['model']
+
+class RegisteredVersion:
+    def __init__(self, path, manifest):
+        self.path = path
+        self.manifest = manifest
+        self.version = manifest['version']
+        self.models = {}
+        self.lock = threading.Lock()
+
+    def file_path(self, file_name):
+        return os.path.join(self.path, file_name)
+
+    def model(self, name):
+        import joblib
+
+        with self.lock:
+            if name not in self.models:
+                started = time.perf_counter()
+                self.models[name] = joblib.load(self.file_path(self.manifest['models'][name]['file']), mmap_mode='r')
+                print(f"Loaded {name} from model version {self.version} in {time.perf_counter() - started:.3f}s")
+            return self.models[name]
+
+    def scaler(self):
+        import joblib
+
+        path = self.file_path(SCALER_FILE)
+        return joblib.load(path, mmap_mode='r') if os.path.exists(path) else None
+
+class ModelRegistry:
+    def __init__(self, root='models/'):
+        self.root = root
+        self.loaded = {}
+        self.lock = threading.Lock()
+
+    def path(self, version, file_name=''):
+        return os.path.join(self.root, version, file_name)
+
+    def versions(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            entry for entry in os.listdir(self.root)
+            if entry.startswith('v') and os.path.exists(self.path(entry, MANIFEST_FILE))
+        )
+
+    def current_version(self):
+        try:
+            with open(os.path.join(self.root, CURRENT_FILE)) as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+    def manifest(self, version):
+        with open(self.path(version, MANIFEST_FILE)) as f:
+            return json.load(f)
+
+    def get(self, version=None):
+        version = version or self.current_version()
+        if version is None:
+            return None
+        with self.lock:
+            if version not in self.loaded:
+                self.loaded[version] = RegisteredVersion(self.path(version), self.manifest(version))
+            return self.loaded[version]
+
+    def promote(self, version):
+        if version not in self.versions():
+            raise ValueError(f"Unknown model version '{version}'")
+        temp_path = os.path.join(self.root, CURRENT_FILE + '.tmp')
+        with open(temp_path, 'w') as f:
+            f.write(version)
+        os.replace(temp_path, os.path.join(self.root, CURRENT_FILE))
+
+    def next_version(self):
+        versions = self.versions()
+        return f"v{int(versions[-1][1:]) + 1 if versions else 1:04d}"
+
+    def register(self, ml_models, promote=True):
+        import joblib
+        from ml_features import FEATURE_COLUMNS, FEATURE_SET_VERSION
+        from tree_inference import COMPILED_MODEL_FILE, compile_model
+
+        os.makedirs(self.root, exist_ok=True)
+        version = self.next_version()
+        staging = os.path.join(self.root, f".{version}.tmp")
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+
+        models = {}
+        for model_name, model_data in ml_models.models.items():
+            file_name = f"{model_name.lower()}_model.pkl"
+            joblib.dump(model_data['model'], os.path.join(staging, file_name))
+            models[model_name] = {
+                'file': file_name,
+                'bytes': os.path.getsize(os.path.join(staging, file_name)),
+                'accuracy': model_data.get('accuracy'),
+                'best_params': model_data.get('best_params'),
+                'search': model_data.get('search')
+            }
+        if 'standard' in ml_models.scalers:
+            joblib.dump(ml_models.scalers['standard'], os.path.join(staging, SCALER_FILE))
+
+        compiled_file = None
+        compiled_skipped = None
+        if ml_models.best_model_name:
+            try:
+                compile_model(ml_models).save(os.path.join(staging, COMPILED_MODEL_FILE))
+                compiled_file = COMPILED_MODEL_FILE
+            except ValueError as e:
+                print(f"Skipping compiled model export: {e}")
+                compiled_skipped = str(e)
+
+        manifest = {
+            'version': version,
+            'created_at': datetime.now().isoformat(),
+            'best_model': ml_models.best_model_name,
+            'feature_columns': FEATURE_COLUMNS,
+            'categories': ml_models.categories,
+            'feature_set_version': FEATURE_SET_VERSION,
+            'training_data': ml_models.training_data,
+            'models': models,
+            'compiled': compiled_file,
+            'compiled_skipped': compiled_skipped,
+            'update': ml_models.update_report,
+            'timing': {
+                'training': ml_models.training_report,
+                'search': ml_models.search_reports
+            }
+        }
+        with open(os.path.join(staging, MANIFEST_FILE), 'w') as f:
+            json.dump(manifest, f, indent=2, default=_json_default)
+
+        os.rename(staging, self.path(version).rstrip(os.sep))
+        if promote:
+            self.promote(version)
+        return version
+
+    def summary(self):
+        current = self.current_version()
+        summaries = []
+        for version in self.versions():
+            manifest = self.manifest(version)
+            summaries.append({
+                'version': version,
+                'current': version == current,
+                'created_at': manifest['created_at'],
+                'best_model': manifest['best_model'],
+                'accuracy': {name: info['accuracy'] for name, info in manifest['models'].items()},
+                'training_data': manifest['training_data'],
+                'feature_set_version': manifest['feature_set_version']
+            })
+        return {'current': current, 'versions': summaries}
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect and promote registered model versions")
+    parser.add_argument('command', choices=['list', 'show', 'promote'])
+    parser.add_argument('version', nargs='?')
+    parser.add_argument('--models-dir', default='models/')
+    args = parser.parse_args(argv)
+
+    registry = ModelRegistry(args.models_dir)
+    if args.command == 'list':
+        summary = registry.summary()
+        if not summary['versions']:
+            print(f"❌ No model versions in {args.models_dir}")
+            return 1
+        for entry in summary['versions']:
+            marker = '*' if entry['current'] else ' '
+            accuracy = entry['accuracy'].get(entry['best_model'])
+            accuracy = f"{accuracy:.4f}" if accuracy is not None else 'n/a'
+            print(f"{marker} {entry['version']}  {entry['created_at'][:19]}  {entry['best_model']} ({accuracy})  "
+                  f"{(entry['training_data'] or {}).get('rows', '?')} rows")
+        return 0
+
+    version = args.version or registry.current_version()
+    if version is None:
+        print("❌ No model version given and none is current")
+        return 1
+    try:
+        if args.command == 'promote':
+            registry.promote(version)
+            print(f"✅ Promoted {version}; servers pick it up on their next scoring request")
+        else:
+            print(json.dumps(registry.manifest(version), indent=2))
+    except (ValueError, OSError) as e:
+        print(f"❌ {e}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+import threading
+import time
+from datetime import datetime
+
+import schedule
+
+DEFAULT_PRECOMPUTE_JOBS = [
+    'get_dashboard_stats',
+    'get_destination_analysis',
+    'get_fleet_analysis',
+    'get_time_analysis',
+    'create_classification_chart',
+    'create_destination_chart',
+    'create_time_chart',
+    'get_stream_snapshot'
+]
+
+class PrecomputeScheduler:
+    def __init__(self, analyzer, jobs=DEFAULT_PRECOMPUTE_JOBS, interval=60, version_check_interval=5):
+        self.analyzer = analyzer
+        self.jobs = list(jobs)
+        self.interval = interval
+        self.version_check_interval = version_check_interval
+        self.scheduler = schedule.Scheduler()
+        self.stop_event = threading.Event()
+        self.refresh_lock = threading.Lock()
+        self.thread = None
+        self.last_version = None
+        self.refreshes = 0
+        self.failures = 0
+        self.last_refresh_at = None
+        self.last_refresh_seconds = None
+
+    def refresh_job(self, name):
+        method = getattr(type(self.analyzer), name)
+        value = method.__wrapped__(self.analyzer)
+        if value is not None:
+            self.analyzer.result_cache.set(method.cache_key(self.analyzer), value, ttl=self.interval * 3)
+        return value
+
+    def refresh_all(self):
+        with self.refresh_lock:
+            version = self.analyzer.get_data_version()
+            started = time.perf_counter()
+
+            for name in self.jobs:
+                try:
+                    if self.refresh_job(name) is None:
+                        self.failures += 1
+                except Exception as e:
+                    print(f"Precompute of {name} failed: {e}")
+                    self.failures += 1
+
+            self.last_version = version
+            self.refreshes += 1
+            self.last_refresh_at = datetime.now().isoformat()
+            self.last_refresh_seconds = round(time.perf_counter() - started, 3)
+
+    def check_version(self):
+        if self.analyzer.get_data_version() != self.last_version:
+            self.refresh_all()
+
+    def start(self, refresh_now=True):
+        if self.thread is not None and self.thread.is_alive():
+            return
+
+        self.scheduler.clear()
+        self.scheduler.every(self.interval).seconds.do(self.refresh_all)
+        self.scheduler.every(self.version_check_interval).seconds.do(self.check_version)
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, args=(refresh_now,), name='precompute', daemon=True)
+        self.thread.start()
+
+    def _run(self, refresh_now):
+        if refresh_now:
+            self.refresh_all()
+        while not self.stop_event.wait(1):
+            self.scheduler.run_pending()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=5)
+
+    def get_status(self):
+        return {
+            'running': self.thread is not None and self.thread.is_alive(),
+            'jobs': self.jobs,
+            'interval_seconds': self.interval,
+            'data_version': self.last_version,
+            'refreshes': self.refreshes,
+            'failures': self.failures,
+            'last_refresh_at': self.last_refresh_at,
+            'last_refresh_seconds': self.last_refresh_seconds
+        }
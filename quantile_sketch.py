@@ -0,0 +1,366 @@
+import json
+import math
+import sqlite3
+import sys
+
+import numpy as np
+import pandas as pd
+
+from feature_store import row_keys
+
+SKETCH_TABLE = 'FlightQuantileSketches'
+STATE_TABLE = 'FlightQuantileSketchState'
+SOURCE_TABLE = 'ClassifiedFlights'
+
+SKETCH_METRICS = ['departure_delay_minutes', 'arrival_delay_minutes', 'difficulty_score']
+SKETCH_GROUPS = ['destination', 'departure_hour']
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+DEFAULT_COMPRESSION = 100
+GROUP_COLUMNS = ['scheduled_arrival_station_code', 'scheduled_departure_datetime_local']
+
+# Flights without a destination or a parseable departure hour still count
+# towards the ungrouped percentiles, under these placeholder groups
+UNKNOWN_DESTINATION = 'UNKNOWN'
+UNKNOWN_HOUR = -1
+
+class TDigest:
+    def __init__(self, compression=DEFAULT_COMPRESSION, means=None, weights=None, minimum=math.inf, maximum=-math.inf):
+        self.compression = compression
+        self.means = np.asarray(means if means is not None else [], dtype=float)
+        self.weights = np.asarray(weights if weights is not None else [], dtype=float)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.buffer = []
+        self.buffer_limit = compression * 5
+
+    @property
+    def count(self):
+        return float(self.weights.sum()) + sum(len(values) for values in self.buffer)
+
+    def _scale(self, q):
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _inverse_scale(self, k):
+        return (math.sin(min(k * 2 * math.pi / self.compression, math.pi / 2)) + 1) / 2
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return self
+
+        self.minimum = min(self.minimum, float(values.min()))
+        self.maximum = max(self.maximum, float(values.max()))
+        self.buffer.append(values)
+        if sum(len(chunk) for chunk in self.buffer) >= self.buffer_limit:
+            self._flush()
+        return self
+
+    def centroids(self):
+        buffered = self.buffer
+        if not buffered:
+            return self.means, self.weights
+        values = np.concatenate(buffered)
+        return np.concatenate([self.means, values]), np.concatenate([self.weights, np.ones(len(values))])
+
+    def merge(self, other):
+        other_means, other_weights = other.centroids()
+        self._flush()
+        if not len(other_means):
+            return self
+
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        self._compress(
+            np.concatenate([self.means, other_means]),
+            np.concatenate([self.weights, other_weights])
+        )
+        return self
+
+    def _flush(self):
+        if not self.buffer:
+            return
+        values = np.concatenate(self.buffer)
+        self.buffer = []
+        self._compress(
+            np.concatenate([self.means, values]),
+            np.concatenate([self.weights, np.ones(len(values))])
+        )
+
+    def _compress(self, means, weights):
+        order = np.argsort(means, kind='mergesort')
+        means = means[order]
+        weights = weights[order]
+        total = weights.sum()
+
+        merged_means = []
+        merged_weights = []
+        weight_so_far = 0.0
+        current_mean = means[0]
+        current_weight = weights[0]
+        q_limit = self._inverse_scale(self._scale(0.0) + 1) * total
+
+        for mean, weight in zip(means[1:], weights[1:]):
+            if weight_so_far + current_weight + weight <= q_limit:
+                current_weight += weight
+                current_mean += (mean - current_mean) * weight / current_weight
+            else:
+                merged_means.append(current_mean)
+                merged_weights.append(current_weight)
+                weight_so_far += current_weight
+                q_limit = self._inverse_scale(self._scale(weight_so_far / total) + 1) * total
+                current_mean = mean
+                current_weight = weight
+
+        merged_means.append(current_mean)
+        merged_weights.append(current_weight)
+        self.means = np.asarray(merged_means)
+        self.weights = np.asarray(merged_weights)
+
+    def quantile(self, q):
+        self._flush()
+        if not len(self.means):
+            return None
+        if len(self.means) == 1:
+            return float(self.means[0])
+
+        total = self.weights.sum()
+        centers = np.cumsum(self.weights) - self.weights / 2
+        positions = np.concatenate([[0.0], centers, [total]])
+        values = np.concatenate([[self.minimum], self.means, [self.maximum]])
+        return float(np.interp(q * total, positions, values))
+
+    def to_dict(self):
+        self._flush()
+        return {
+            'compression': self.compression,
+            'means': self.means.tolist(),
+            'weights': self.weights.tolist(),
+            'min': self.minimum,
+            'max': self.maximum
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['compression'], data['means'], data['weights'], data['min'], data['max'])
+
+def parse_percentile_query(params):
+    metric = params.get('metric') or 'departure_delay_minutes'
+    if metric not in SKETCH_METRICS:
+        raise ValueError(f"'metric' must be one of {', '.join(SKETCH_METRICS)}")
+
+    group_by = params.get('group_by') or None
+    if group_by is not None and group_by not in SKETCH_GROUPS:
+        raise ValueError(f"'group_by' must be one of {', '.join(SKETCH_GROUPS)}")
+
+    try:
+        quantiles = [float(value) for value in (params.get('q') or '').split(',') if value.strip()]
+        hours = [int(value) for value in (params.get('hour') or '').split(',') if value.strip()]
+    except ValueError as e:
+        raise ValueError("'q' must be numbers and 'hour' must be integers") from e
+    if any(not 0 <= q <= 1 for q in quantiles):
+        raise ValueError("'q' values must be between 0 and 1")
+
+    destinations = [value.strip() for value in (params.get('destination') or '').split(',') if value.strip()]
+
+    return {
+        'metric': metric,
+        'group_by': group_by,
+        'quantiles': quantiles or list(DEFAULT_QUANTILES),
+        'destinations': destinations or None,
+        'hours': hours or None
+    }
+
+class QuantileSketchStore:
+    def __init__(self, compression=DEFAULT_COMPRESSION):
+        self.compression = compression
+        self.sketches = {}
+        self.dirty = set()
+        self.last_rowid = 0
+        self.source_rows = 0
+        self.source_checksum = 0
+
+    def _sketch(self, metric, destination, hour):
+        key = (metric, destination, hour)
+        if key not in self.sketches:
+            self.sketches[key] = TDigest(self.compression)
+        self.dirty.add(key)
+        return self.sketches[key]
+
+    def add_frame(self, df):
+        if 'departure_hour' in df.columns:
+            hours = df['departure_hour']
+        else:
+            hours = pd.to_datetime(df['scheduled_departure_datetime_local'], errors='coerce').dt.hour
+        metrics = [metric for metric in SKETCH_METRICS if metric in df.columns]
+
+        grouped = df.assign(
+            _destination=df['scheduled_arrival_station_code'].fillna(UNKNOWN_DESTINATION),
+            _hour=hours.fillna(UNKNOWN_HOUR)
+        ).groupby(['_destination', '_hour'])
+        for (destination, hour), group in grouped:
+            for metric in metrics:
+                self._sketch(metric, destination, int(hour)).update(group[metric].to_numpy())
+        self.flush()
+
+    def flush(self):
+        for digest in self.sketches.values():
+            digest._flush()
+
+    @classmethod
+    def from_dataframe(cls, df, compression=DEFAULT_COMPRESSION):
+        store = cls(compression)
+        store.add_frame(df)
+        return store
+
+    @staticmethod
+    def source_query(conn, source_table, condition):
+        columns = {row[1] for row in conn.execute(f"PRAGMA table_info({source_table})")}
+        metrics = [metric for metric in SKETCH_METRICS if metric in columns]
+        return (
+            f"SELECT rowid AS source_rowid, {', '.join(GROUP_COLUMNS + metrics)} "
+            f"FROM {source_table} WHERE {condition} ORDER BY rowid"
+        )
+
+    @staticmethod
+    def chunk_checksum(chunk):
+        # Order-independent sum of row hashes, so it can be extended chunk by chunk
+        hashes = row_keys(chunk, [column for column in chunk.columns if column != 'source_rowid'])
+        return int(hashes.sum(dtype=np.uint64))
+
+    def source_fingerprint(self):
+        return f"{self.source_rows:x}-{self.source_checksum:016x}"
+
+    def read_source_fingerprint(self, conn, source_table=SOURCE_TABLE, chunk_size=50000):
+        rows, checksum = 0, 0
+        query = self.source_query(conn, source_table, 'rowid <= ?')
+        for chunk in pd.read_sql_query(query, conn, params=(self.last_rowid,), chunksize=chunk_size):
+            rows += len(chunk)
+            checksum = (checksum + self.chunk_checksum(chunk)) % 2 ** 64
+        return f"{rows:x}-{checksum:016x}"
+
+    def update_from_sqlite(self, conn, source_table=SOURCE_TABLE, chunk_size=50000):
+        query = self.source_query(conn, source_table, 'rowid > ?')
+
+        added = 0
+        for chunk in pd.read_sql_query(query, conn, params=(self.last_rowid,), chunksize=chunk_size):
+            if chunk.empty:
+                continue
+            self.add_frame(chunk)
+            self.last_rowid = int(chunk['source_rowid'].iloc[-1])
+            self.source_rows += len(chunk)
+            self.source_checksum = (self.source_checksum + self.chunk_checksum(chunk)) % 2 ** 64
+            added += len(chunk)
+        return added
+
+    def save_sqlite(self, conn):
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {SKETCH_TABLE} ("
+            "metric TEXT, destination TEXT, departure_hour INTEGER, flight_count INTEGER, sketch TEXT, "
+            "PRIMARY KEY (metric, destination, departure_hour))"
+        )
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {STATE_TABLE} "
+            "(id INTEGER PRIMARY KEY CHECK (id = 1), last_rowid INTEGER, source_fingerprint TEXT)"
+        )
+
+        conn.executemany(
+            f"INSERT OR REPLACE INTO {SKETCH_TABLE} VALUES (?, ?, ?, ?, ?)",
+            [
+                (*key, int(self.sketches[key].count), json.dumps(self.sketches[key].to_dict()))
+                for key in self.dirty
+            ]
+        )
+        conn.execute(f"INSERT OR REPLACE INTO {STATE_TABLE} VALUES (1, ?, ?)", (self.last_rowid, self.source_fingerprint()))
+        conn.commit()
+        self.dirty.clear()
+
+    @classmethod
+    def from_sqlite(cls, conn):
+        try:
+            rows = conn.execute(f"SELECT metric, destination, departure_hour, sketch FROM {SKETCH_TABLE}").fetchall()
+            state = conn.execute(f"SELECT last_rowid, source_fingerprint FROM {STATE_TABLE} WHERE id = 1").fetchone()
+        except sqlite3.Error as e:
+            print(f"Quantile sketches unavailable: {e}")
+            return None
+
+        store = cls()
+        for metric, destination, hour, sketch in rows:
+            digest = TDigest.from_dict(json.loads(sketch))
+            store.compression = digest.compression
+            store.sketches[(metric, destination, hour)] = digest
+        if state:
+            rows, checksum = (state[1] or '0-0').split('-')
+            store.last_rowid = state[0]
+            store.source_rows, store.source_checksum = int(rows, 16), int(checksum, 16)
+        return store
+
+    @property
+    def metrics(self):
+        return {metric for metric, _, _ in self.sketches}
+
+    def percentiles(self, metric, quantiles=DEFAULT_QUANTILES, destinations=None, hours=None, group_by=None):
+        if metric not in self.metrics:
+            raise ValueError(f"Metric '{metric}' is not available for this dataset")
+
+        groups = {}
+        for (sketch_metric, destination, hour), digest in self.sketches.items():
+            if sketch_metric != metric:
+                continue
+            if destinations is not None and destination not in destinations:
+                continue
+            if hours is not None and hour not in hours:
+                continue
+
+            if group_by == 'destination':
+                group_key = destination
+            elif group_by == 'departure_hour':
+                group_key = hour
+            else:
+                group_key = None
+
+            merged = groups.setdefault(group_key, TDigest(self.compression))
+            merged.merge(digest)
+
+        results = []
+        for group_key in sorted(groups, key=lambda key: (key is None, key)):
+            merged = groups[group_key]
+            row = {group_by: group_key} if group_by else {}
+            row['count'] = int(merged.count)
+            for q in quantiles:
+                row[f'p{q * 100:g}'] = merged.quantile(q)
+            results.append(row)
+        return results
+
+def build_or_update(db_path, rebuild=False):
+    conn = sqlite3.connect(db_path)
+    try:
+        store = None if rebuild else QuantileSketchStore.from_sqlite(conn)
+        if store is not None and store.read_source_fingerprint(conn) != store.source_fingerprint():
+            # complete_analysis.sql recreates the table, so the rows the sketches
+            # already cover may have changed even though rowids kept counting
+            print(f"{SOURCE_TABLE} changed below rowid {store.last_rowid}; rebuilding the sketches")
+            store = None
+        if store is None:
+            conn.execute(f"DROP TABLE IF EXISTS {SKETCH_TABLE}")
+            conn.execute(f"DROP TABLE IF EXISTS {STATE_TABLE}")
+            store = QuantileSketchStore()
+
+        added = store.update_from_sqlite(conn)
+        store.save_sqlite(conn)
+        return store, added
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    db_path = args[0] if args else 'skyhack.db'
+    rebuild = '--rebuild' in sys.argv
+
+    print(f"📐 {'Rebuilding' if rebuild else 'Updating'} quantile sketches in {db_path}...")
+    try:
+        store, added = build_or_update(db_path, rebuild=rebuild)
+    except sqlite3.Error as e:
+        print(f"❌ Failed to update quantile sketches: {e}")
+        sys.exit(1)
+    print(f"✅ Added {added:,} flights; {len(store.sketches):,} sketches up to rowid {store.last_rowid}")
@@ -50,6 +50,18 @@ if [ -f "skyhack.db" ]; then
     echo "📊 Database size: $size"
     echo "📁 Location: $(pwd)/skyhack.db"
     echo ""
+    echo "🗂️  Indexing ClassifiedFlights for the flight list and exports..."
+    python3 flight_queries.py skyhack.db
+    echo ""
+    echo "🧊 Building rollup cube..."
+    python3 rollup_cube.py skyhack.db
+    echo ""
+    echo "📐 Rebuilding delay and score quantile sketches..."
+    python3 quantile_sketch.py skyhack.db --rebuild
+    echo ""
+    echo "📦 Rebuilding dashboard data artifact for the Vercel app..."
+    python3 build_dashboard_data.py skyhack.db api/dashboard_data.json
+    echo ""
     echo "🎉 You can now run the dashboard:"
     echo "   ./launch_working_dashboard.sh"
 else
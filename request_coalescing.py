@@ -0,0 +1,76 @@
+import functools
+import json
+import threading
+
+from request_profiling import stage
+
+def make_key(name, args=(), kwargs=None):
+    return json.dumps([name, list(args), kwargs or {}], sort_keys=True, default=str, separators=(',', ':'))
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = {}
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+        self.by_method = {}
+
+    def do(self, name, fn, *args, **kwargs):
+        key = make_key(name, args, kwargs)
+
+        with self.lock:
+            self.calls += 1
+            method_stats = self.by_method.setdefault(name, {'calls': 0, 'coalesced': 0})
+            method_stats['calls'] += 1
+
+            call = self.in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self.in_flight[key] = call
+                self.executions += 1
+            else:
+                self.coalesced += 1
+                method_stats['coalesced'] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+            call.done.set()
+
+    def get_status(self):
+        with self.lock:
+            return {
+                'calls': self.calls,
+                'executions': self.executions,
+                'coalesced': self.coalesced,
+                'coalesced_ratio': round(self.coalesced / self.calls, 4) if self.calls else 0.0,
+                'in_flight': len(self.in_flight),
+                'by_method': {name: dict(stats) for name, stats in self.by_method.items()}
+            }
+
+def coalesce(method):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with stage(method.__name__):
+            return self.single_flight.do(method.__name__, functools.partial(method, self), *args, **kwargs)
+    return wrapper
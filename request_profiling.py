@@ -0,0 +1,237 @@
+import hmac
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from urllib.parse import parse_qsl
+
+PROFILE_TOKEN_ENV = 'PROFILE_TOKEN'
+PROFILE_HEADER = 'X-Profile-Token'
+PROFILE_PARAM = 'profile'
+DEFAULT_SAMPLE_INTERVAL = 0.002
+MAX_STACK_DEPTH = 128
+MAX_STORED_PROFILES = 20
+
+_current_timings = ContextVar('request_timings', default=None)
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+def fold_stack(frame):
+    labels = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+class SamplingProfiler:
+    def __init__(self, interval=DEFAULT_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.threads = Counter()
+        self.stacks = Counter()
+        self.samples = 0
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.started = None
+        self.duration = None
+
+    def attach(self, thread_id=None):
+        with self.lock:
+            self.threads[thread_id or threading.get_ident()] += 1
+
+    def detach(self, thread_id=None):
+        thread_id = thread_id or threading.get_ident()
+        with self.lock:
+            self.threads[thread_id] -= 1
+            if self.threads[thread_id] <= 0:
+                del self.threads[thread_id]
+
+    def start(self):
+        self.started = time.perf_counter()
+        self.thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            with self.lock:
+                thread_ids = list(self.threads)
+            if not thread_ids:
+                continue
+
+            frames = sys._current_frames()
+            for thread_id in thread_ids:
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    self.stacks[fold_stack(frame)] += 1
+            self.samples += 1
+
+    def stop(self):
+        if self.thread is None or self.stop_event.is_set():
+            return
+        self.stop_event.set()
+        self.thread.join(timeout=1)
+        self.duration = time.perf_counter() - self.started
+
+    def folded(self):
+        return '\n'.join(f"{stack} {count}" for stack, count in self.stacks.most_common()) + '\n'
+
+class ProfileStore:
+    def __init__(self, max_profiles=MAX_STORED_PROFILES):
+        self.max_profiles = max_profiles
+        self.profiles = OrderedDict()
+        self.lock = threading.Lock()
+
+    def save(self, profiler, method, path, timings):
+        profile_id = uuid.uuid4().hex[:16]
+        with self.lock:
+            self.profiles[profile_id] = {
+                'id': profile_id,
+                'method': method,
+                'path': path,
+                'created_at': datetime.now().isoformat(),
+                'duration_ms': round(profiler.duration * 1000, 2),
+                'samples': profiler.samples,
+                'stages': timings.get_stages(),
+                'folded': profiler.folded()
+            }
+            while len(self.profiles) > self.max_profiles:
+                self.profiles.popitem(last=False)
+        return profile_id
+
+    def get(self, profile_id):
+        with self.lock:
+            return self.profiles.get(profile_id)
+
+PROFILES = ProfileStore()
+
+class RequestTimings:
+    def __init__(self, profiler=None):
+        self.started = time.perf_counter()
+        self.profiler = profiler
+        self.lock = threading.Lock()
+        self.stages = {}
+
+    def record(self, name, seconds):
+        with self.lock:
+            total, count = self.stages.get(name, (0.0, 0))
+            self.stages[name] = (total + seconds, count + 1)
+
+    def get_stages(self):
+        with self.lock:
+            return {name: {'ms': round(total * 1000, 2), 'count': count} for name, (total, count) in self.stages.items()}
+
+    def server_timing(self):
+        with self.lock:
+            stages = list(self.stages.items())
+        parts = [
+            f'{name};dur={total * 1000:.2f}' + (f';desc="{count} calls"' if count > 1 else '')
+            for name, (total, count) in stages
+        ]
+        parts.append(f'total;dur={(time.perf_counter() - self.started) * 1000:.2f}')
+        return ', '.join(parts)
+
+def profiling_requested(supplied_token):
+    token = os.environ.get(PROFILE_TOKEN_ENV)
+    if not token or not supplied_token:
+        return False
+    return hmac.compare_digest(supplied_token, token)
+
+def begin_request(profile=False):
+    timings = RequestTimings(SamplingProfiler() if profile else None)
+    context_token = _current_timings.set(timings)
+    if timings.profiler is not None:
+        timings.profiler.start()
+    return timings, context_token
+
+def finish_profile(timings, method, path):
+    if timings.profiler is None:
+        return None
+    timings.profiler.stop()
+    return PROFILES.save(timings.profiler, method, path, timings)
+
+def record_stage(name, seconds):
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.record(name, seconds)
+
+@contextmanager
+def stage(name):
+    timings = _current_timings.get()
+    if timings is None:
+        yield
+        return
+
+    profiler = timings.profiler
+    if profiler is not None:
+        profiler.attach()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.record(name, time.perf_counter() - started)
+        if profiler is not None:
+            profiler.detach()
+
+def install_flask_profiling(app):
+    from flask import g, request
+
+    @app.before_request
+    def start_request_timings():
+        supplied = request.headers.get(PROFILE_HEADER) or request.args.get(PROFILE_PARAM)
+        g.request_timings, g.request_timings_token = begin_request(profiling_requested(supplied))
+        if g.request_timings.profiler is not None:
+            g.request_timings.profiler.attach()
+
+    @app.after_request
+    def add_server_timing(response):
+        timings = g.get('request_timings')
+        if timings is not None:
+            profile_id = finish_profile(timings, request.method, request.path)
+            response.headers['Server-Timing'] = timings.server_timing()
+            if profile_id is not None:
+                response.headers['X-Profile-Id'] = profile_id
+        return response
+
+    @app.teardown_request
+    def finish_request_timings(exc):
+        timings = g.pop('request_timings', None)
+        if timings is not None and timings.profiler is not None:
+            timings.profiler.stop()
+        _current_timings.set(None)
+
+class RequestProfilingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+        params = dict(parse_qsl(scope.get('query_string', b'').decode('latin-1')))
+        supplied = headers.get(PROFILE_HEADER.lower()) or params.get(PROFILE_PARAM)
+        timings, context_token = begin_request(profiling_requested(supplied))
+
+        async def send_with_timing(message):
+            if message['type'] == 'http.response.start':
+                profile_id = finish_profile(timings, scope['method'], scope['path'])
+                extra = [(b'server-timing', timings.server_timing().encode('latin-1'))]
+                if profile_id is not None:
+                    extra.append((b'x-profile-id', profile_id.encode('latin-1')))
+                message = {**message, 'headers': list(message.get('headers', [])) + extra}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            if timings.profiler is not None:
+                timings.profiler.stop()
+            _current_timings.reset(context_token)
@@ -0,0 +1,222 @@
+import sqlite3
+import sys
+
+import numpy as np
+import pandas as pd
+
+from flight_queries import table_fingerprint
+
+CUBE_TABLE = 'FlightRollupCube'
+CUBE_STATE_TABLE = 'FlightRollupCubeState'
+SOURCE_TABLE = 'ClassifiedFlights'
+
+DIMENSION_COLUMNS = {
+    'date': 'scheduled_departure_date_local',
+    'destination': 'scheduled_arrival_station_code',
+    'fleet_type': 'fleet_type',
+    'carrier': 'carrier',
+    'departure_hour': 'departure_hour',
+    'classification': 'difficulty_classification'
+}
+DIMENSIONS = list(DIMENSION_COLUMNS)
+
+MEASURES = [
+    'difficulty_score',
+    'departure_delay_minutes',
+    'load_factor',
+    'total_passengers',
+    'is_delayed'
+]
+
+def _aggregate_columns(measures=MEASURES):
+    columns = ['flight_count']
+    for measure in measures:
+        columns.extend([f'{measure}_n', f'{measure}_sum', f'{measure}_sumsq'])
+    return columns
+
+def cube_select_sql(source_table=SOURCE_TABLE):
+    dimension_sql = []
+    for dimension, column in DIMENSION_COLUMNS.items():
+        if dimension == 'departure_hour':
+            dimension_sql.append(f"CAST(strftime('%H', scheduled_departure_datetime_local) AS INTEGER) AS {dimension}")
+        else:
+            dimension_sql.append(f"{column} AS {dimension}")
+
+    measure_sql = ['COUNT(*) AS flight_count']
+    for measure in MEASURES:
+        measure_sql.extend([
+            f"COUNT({measure}) AS {measure}_n",
+            f"TOTAL({measure}) AS {measure}_sum",
+            f"TOTAL({measure} * {measure}) AS {measure}_sumsq"
+        ])
+
+    group_by = ', '.join(str(position) for position in range(1, len(DIMENSIONS) + 1))
+    return f"SELECT {', '.join(dimension_sql + measure_sql)} FROM {source_table} GROUP BY {group_by}"
+
+def build_cube_sql(source_table=SOURCE_TABLE, cube_table=CUBE_TABLE):
+    return f"CREATE TABLE {cube_table} AS {cube_select_sql(source_table)}"
+
+class RollupCube:
+    def __init__(self, cells, source_fingerprint=None):
+        self.cells = cells
+        # table_fingerprint() of the source table the cells were aggregated from
+        self.source_fingerprint = source_fingerprint
+
+    @classmethod
+    def build_sqlite(cls, conn, source_table=SOURCE_TABLE, cube_table=CUBE_TABLE):
+        conn.execute(f"DROP TABLE IF EXISTS {cube_table}")
+        conn.execute(build_cube_sql(source_table, cube_table))
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {CUBE_STATE_TABLE} (cube_table TEXT PRIMARY KEY, source_fingerprint TEXT)")
+        conn.execute(
+            f"INSERT OR REPLACE INTO {CUBE_STATE_TABLE} VALUES (?, ?)",
+            (cube_table, table_fingerprint(conn, source_table))
+        )
+        conn.commit()
+        return cls.from_sqlite(conn, cube_table)
+
+    @classmethod
+    def from_sqlite(cls, conn, cube_table=CUBE_TABLE):
+        try:
+            cells = pd.read_sql_query(f"SELECT * FROM {cube_table}", conn)
+        except (sqlite3.Error, pd.errors.DatabaseError) as e:
+            print(f"Rollup cube unavailable: {e}")
+            return None
+        try:
+            row = conn.execute(
+                f"SELECT source_fingerprint FROM {CUBE_STATE_TABLE} WHERE cube_table = ?", (cube_table,)
+            ).fetchone()
+        except sqlite3.Error:
+            row = None
+        return cls(cells, row[0] if row else None)
+
+    @classmethod
+    def from_source(cls, conn, source_table=SOURCE_TABLE):
+        # Aggregate the live table without persisting anything
+        try:
+            cells = pd.read_sql_query(cube_select_sql(source_table), conn)
+        except (sqlite3.Error, pd.errors.DatabaseError) as e:
+            print(f"Rollup cube unavailable: {e}")
+            return None
+        return cls(cells, table_fingerprint(conn, source_table))
+
+    @classmethod
+    def from_dataframe(cls, df):
+        frame = pd.DataFrame(index=df.index)
+        for dimension, column in DIMENSION_COLUMNS.items():
+            if column in df.columns:
+                frame[dimension] = df[column]
+            elif dimension == 'departure_hour':
+                frame[dimension] = pd.to_datetime(df['scheduled_departure_datetime_local'], errors='coerce').dt.hour
+            else:
+                frame[dimension] = None
+
+        frame['flight_count'] = 1
+        for measure in MEASURES:
+            values = df[measure].astype(float) if measure in df.columns else pd.Series(np.nan, index=df.index)
+            frame[f'{measure}_n'] = values.notna().astype(int)
+            frame[f'{measure}_sum'] = values.fillna(0)
+            frame[f'{measure}_sumsq'] = values.fillna(0) ** 2
+
+        cells = frame.groupby(DIMENSIONS, dropna=False, sort=False)[_aggregate_columns()].sum().reset_index()
+        return cls(cells)
+
+    def _filter(self, filters=None, date_from=None, date_to=None):
+        cells = self.cells
+        mask = np.ones(len(cells), dtype=bool)
+
+        for dimension, values in (filters or {}).items():
+            if dimension not in DIMENSION_COLUMNS:
+                raise ValueError(f"Unknown rollup dimension '{dimension}'")
+            if not isinstance(values, (list, tuple, set)):
+                values = [values]
+            mask &= cells[dimension].isin(list(values)).to_numpy()
+
+        if date_from:
+            mask &= (cells['date'] >= date_from).to_numpy()
+        if date_to:
+            mask &= (cells['date'] <= date_to).to_numpy()
+
+        return cells[mask]
+
+    def rollup(self, group_by=(), filters=None, date_from=None, date_to=None, measures=MEASURES):
+        group_by = list(group_by)
+        unknown = [dimension for dimension in group_by if dimension not in DIMENSION_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown rollup dimension(s): {', '.join(unknown)}")
+
+        cells = self._filter(filters, date_from, date_to)
+        columns = _aggregate_columns(measures)
+
+        if group_by:
+            grouped = cells.groupby(group_by)[columns].sum().reset_index()
+        else:
+            grouped = cells[columns].sum().to_frame().T.reset_index(drop=True)
+
+        result = grouped[group_by + ['flight_count']].copy()
+        for measure in measures:
+            n = grouped[f'{measure}_n'].astype(float)
+            total = grouped[f'{measure}_sum'].astype(float)
+            sumsq = grouped[f'{measure}_sumsq'].astype(float)
+            mean = total / n.where(n > 0)
+            variance = (sumsq - total * mean) / (n - 1).where(n > 1)
+            result[f'{measure}_mean'] = mean
+            result[f'{measure}_std'] = np.sqrt(variance.clip(lower=0))
+        return result
+
+    def count(self, filters=None, date_from=None, date_to=None):
+        return int(self._filter(filters, date_from, date_to)['flight_count'].sum())
+
+    def difficulty_breakdown(self, dimension, measures, limit=15, sort=True):
+        totals = self.rollup([dimension], measures=measures)
+        difficult = self.rollup([dimension], filters={'classification': 'Difficult'}, measures=[])
+
+        breakdown = totals.merge(
+            difficult.rename(columns={'flight_count': 'difficult_count'}),
+            on=dimension, how='left'
+        )
+        breakdown['difficult_count'] = breakdown['difficult_count'].fillna(0).astype(int)
+
+        output = pd.DataFrame({
+            DIMENSION_COLUMNS[dimension]: breakdown[dimension],
+            'difficulty_classification': breakdown['difficult_count']
+        })
+        for measure in measures:
+            output[measure] = breakdown[f'{measure}_mean']
+
+        if sort:
+            output = output.sort_values('difficulty_classification', ascending=False, kind='stable')
+        else:
+            output = output.sort_values(DIMENSION_COLUMNS[dimension])
+        if limit:
+            output = output.head(limit)
+        return output.reset_index(drop=True)
+
+    def dashboard_stats(self):
+        totals = self.rollup(measures=['departure_delay_minutes', 'difficulty_score']).iloc[0]
+        distribution = self.rollup(['classification'], measures=[]).sort_values('flight_count', ascending=False)
+        # Flights with no is_delayed value count as on time, as the original
+        # per-row (is_delayed == 1).mean() did, so divide by every flight
+        delayed = float(self.cells['is_delayed_sum'].sum())
+        return {
+            'total_flights': int(totals['flight_count']),
+            'avg_delay': float(totals['departure_delay_minutes_mean']),
+            'delayed_pct': float(delayed / totals['flight_count'] * 100),
+            'avg_difficulty': float(totals['difficulty_score_mean']),
+            'difficulty_distribution': {
+                row['classification']: int(row['flight_count'])
+                for row in distribution.to_dict('records')
+            }
+        }
+
+if __name__ == "__main__":
+    db_path = sys.argv[1] if len(sys.argv) > 1 else 'skyhack.db'
+    print(f"🧊 Building {CUBE_TABLE} in {db_path}...")
+    conn = sqlite3.connect(db_path)
+    try:
+        cube = RollupCube.build_sqlite(conn)
+    except sqlite3.Error as e:
+        print(f"❌ Failed to build rollup cube: {e}")
+        sys.exit(1)
+    finally:
+        conn.close()
+    print(f"✅ {len(cube.cells):,} cells covering {int(cube.cells['flight_count'].sum()):,} flights")
@@ -93,6 +93,14 @@ SELECT
 
 FROM FinalFlightScores;
 
+CREATE INDEX IF NOT EXISTS idx_classified_score ON ClassifiedFlights(difficulty_score);
+CREATE INDEX IF NOT EXISTS idx_classified_departure ON ClassifiedFlights(scheduled_departure_datetime_local);
+CREATE INDEX IF NOT EXISTS idx_classified_date_score ON ClassifiedFlights(scheduled_departure_date_local, difficulty_score);
+CREATE INDEX IF NOT EXISTS idx_classified_dest_score ON ClassifiedFlights(scheduled_arrival_station_code, difficulty_score);
+CREATE INDEX IF NOT EXISTS idx_classified_fleet_score ON ClassifiedFlights(fleet_type, difficulty_score);
+CREATE INDEX IF NOT EXISTS idx_classified_carrier_score ON ClassifiedFlights(carrier, difficulty_score);
+CREATE INDEX IF NOT EXISTS idx_classified_class_score ON ClassifiedFlights(difficulty_classification, difficulty_score);
+
 SELECT
     difficulty_classification,
     COUNT(*) as flight_count,
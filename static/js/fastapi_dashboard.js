@@ -7,16 +7,11 @@ class FlightDashboard {
 
     init() {
         console.log('Initializing Flight Dashboard...');
-        this.loadDashboardData();
         this.setupEventListeners();
+        this.connectStream();
     }
 
     setupEventListeners() {
-        setInterval(() => {
-            this.loadDashboardData();
-            this.updateLastRefreshTime();
-        }, 30000);
-
         const refreshBtn = document.querySelector('#refreshBtn');
         if (refreshBtn) {
             refreshBtn.addEventListener('click', () => {
@@ -26,6 +21,96 @@ class FlightDashboard {
         }
     }
 
+    connectStream() {
+        if (!window.EventSource) {
+            this.loadDashboardData();
+            this.startPolling();
+            return;
+        }
+
+        this.showLoading();
+        this.dataVersion = null;
+        this.stream = new EventSource('/api/stream');
+
+        this.stream.addEventListener('snapshot', (event) => {
+            const message = JSON.parse(event.data);
+            this.dataVersion = message.version;
+            this.applySections(message.sections);
+            this.dataLoaded = true;
+            this.hideLoading();
+            this.updateLastRefreshTime();
+        });
+
+        this.stream.addEventListener('diff', (event) => {
+            const message = JSON.parse(event.data);
+            if (message.base !== this.dataVersion) {
+                this.reconnectStream();
+                return;
+            }
+            this.dataVersion = message.version;
+            this.applySections(message.changed);
+            this.updateLastRefreshTime();
+        });
+
+        this.stream.onerror = () => {
+            if (this.stream.readyState === EventSource.CLOSED) {
+                console.warn('Update stream closed, falling back to polling');
+                this.loadDashboardData();
+                this.startPolling();
+            }
+        };
+    }
+
+    reconnectStream() {
+        if (this.stream) {
+            this.stream.close();
+        }
+        this.connectStream();
+    }
+
+    startPolling() {
+        if (this.pollTimer) {
+            return;
+        }
+        this.pollTimer = setInterval(() => {
+            this.loadDashboardData();
+            this.updateLastRefreshTime();
+        }, 30000);
+    }
+
+    applySections(sections) {
+        const renderers = {
+            stats: (stats) => this.updateStats(stats),
+            destinations: (rows) => this.renderDestinationRows(rows),
+            fleet: (rows) => this.renderFleetRows(rows),
+            classification_chart: (figure) => this.renderChart('classificationChart', figure),
+            destination_chart: (figure) => this.renderChart('destinationChart', figure),
+            time_chart: (figure) => this.renderChart('timeChart', figure)
+        };
+
+        Object.entries(sections || {}).forEach(([name, value]) => {
+            if (!renderers[name]) {
+                return;
+            }
+            try {
+                renderers[name](value);
+            } catch (error) {
+                console.error(`Error rendering ${name}:`, error);
+            }
+        });
+    }
+
+    renderChart(containerId, figure) {
+        const chartContainer = document.getElementById(containerId);
+        if (!chartContainer || typeof Plotly === 'undefined') {
+            return;
+        }
+        Plotly.react(chartContainer, figure.data, figure.layout, {
+            responsive: true,
+            displayModeBar: false
+        });
+    }
+
     async loadDashboardData() {
         try {
             this.showLoading();
@@ -206,19 +291,7 @@ class FlightDashboard {
                 throw new Error(data.error);
             }
             
-            const tbody = document.querySelector('#destinationTable tbody');
-            tbody.innerHTML = '';
-            
-            data.slice(0, 10).forEach(row => {
-                const tr = document.createElement('tr');
-                tr.innerHTML = `
-                    <td><strong>${row.scheduled_arrival_station_code}</strong></td>
-                    <td><span class="badge bg-danger">${row.difficulty_classification}</span></td>
-                    <td>${row.difficulty_score.toFixed(3)}</td>
-                    <td>${row.departure_delay_minutes.toFixed(1)} min</td>
-                `;
-                tbody.appendChild(tr);
-            });
+            this.renderDestinationRows(data);
             
         } catch (error) {
             console.error('Error loading destination table:', error);
@@ -226,6 +299,22 @@ class FlightDashboard {
         }
     }
 
+    renderDestinationRows(data) {
+        const tbody = document.querySelector('#destinationTable tbody');
+        tbody.innerHTML = '';
+        
+        data.slice(0, 10).forEach(row => {
+            const tr = document.createElement('tr');
+            tr.innerHTML = `
+                <td><strong>${row.scheduled_arrival_station_code}</strong></td>
+                <td><span class="badge bg-danger">${row.difficulty_classification}</span></td>
+                <td>${row.difficulty_score.toFixed(3)}</td>
+                <td>${row.departure_delay_minutes.toFixed(1)} min</td>
+            `;
+            tbody.appendChild(tr);
+        });
+    }
+
     async loadFleetTable() {
         try {
             const response = await fetch('/api/fleet');
@@ -235,19 +324,7 @@ class FlightDashboard {
                 throw new Error(data.error);
             }
             
-            const tbody = document.querySelector('#fleetTable tbody');
-            tbody.innerHTML = '';
-            
-            data.slice(0, 10).forEach(row => {
-                const tr = document.createElement('tr');
-                tr.innerHTML = `
-                    <td><strong>${row.fleet_type}</strong></td>
-                    <td><span class="badge bg-warning">${row.difficulty_classification}</span></td>
-                    <td>${row.difficulty_score.toFixed(3)}</td>
-                    <td>${row.total_passengers.toFixed(0)}</td>
-                `;
-                tbody.appendChild(tr);
-            });
+            this.renderFleetRows(data);
             
         } catch (error) {
             console.error('Error loading fleet table:', error);
@@ -255,6 +332,22 @@ class FlightDashboard {
         }
     }
 
+    renderFleetRows(data) {
+        const tbody = document.querySelector('#fleetTable tbody');
+        tbody.innerHTML = '';
+        
+        data.slice(0, 10).forEach(row => {
+            const tr = document.createElement('tr');
+            tr.innerHTML = `
+                <td><strong>${row.fleet_type}</strong></td>
+                <td><span class="badge bg-warning">${row.difficulty_classification}</span></td>
+                <td>${row.difficulty_score.toFixed(3)}</td>
+                <td>${row.total_passengers.toFixed(0)}</td>
+            `;
+            tbody.appendChild(tr);
+        });
+    }
+
     showChartError(containerId) {
         const container = document.getElementById(containerId);
         container.innerHTML = `
@@ -0,0 +1,46 @@
+import sys
+import time
+
+from dashboard_stream import DashboardStreamHub
+
+def make_hub(**limits):
+    state = {'version': 1}
+    hub = DashboardStreamHub(
+        lambda: {'stats': state['version']}, lambda: state['version'],
+        poll_interval=60, heartbeat_interval=0.05, **limits
+    )
+    return hub, state
+
+def test_streams_are_capped():
+    hub, _ = make_hub(max_streams=2)
+    streams = [hub.stream(), hub.stream()]
+    for stream in streams:
+        assert 'event: snapshot' in next(stream)
+    assert not hub.has_capacity()
+
+    # A stream that loses the race for the last slot ends straight away
+    assert list(hub.stream()) == ['retry: 5000\n\n']
+
+    streams[0].close()
+    assert hub.has_capacity()
+    assert hub.get_status()['open_streams'] == 1
+    print("✅ open streams are capped and slots are released on disconnect")
+
+def test_streams_end_after_lifetime():
+    hub, state = make_hub(max_stream_seconds=0.3)
+    stream = hub.stream()
+    started = time.monotonic()
+    assert next(stream).startswith('retry: 5000\n')
+
+    state['version'] = 2
+    hub.check_for_updates()
+    messages = list(stream)
+    assert any('event: diff' in message for message in messages)
+    assert 0.3 <= time.monotonic() - started < 1.0
+    assert hub.get_status()['open_streams'] == 0 and hub.get_status()['subscribers'] == 0
+    print("✅ streams deliver updates and close once their lifetime is up")
+
+if __name__ == '__main__':
+    test_streams_are_capped()
+    test_streams_end_after_lifetime()
+    sys.exit(0)
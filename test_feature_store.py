@@ -0,0 +1,70 @@
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from ml_features import DERIVED_FEATURE_COLUMNS, compute_advanced_features, open_feature_store
+
+def make_flights(rows=3000):
+    rng = np.random.default_rng(5)
+    dates = pd.Timestamp('2025-08-01') + pd.to_timedelta(rng.integers(0, 10, rows), unit='D')
+    departures = dates + pd.to_timedelta(rng.integers(0, 24 * 60, rows), unit='min')
+    return pd.DataFrame({
+        'scheduled_departure_date_local': dates.strftime('%Y-%m-%d'),
+        'scheduled_departure_datetime_local': departures.strftime('%Y-%m-%d %H:%M:%S'),
+        'total_seats': rng.integers(50, 300, rows),
+        'total_passengers': rng.integers(20, 300, rows),
+        'total_bags': rng.integers(0, 300, rows),
+        'unique_special_requests': rng.integers(0, 4, rows),
+        'load_factor': rng.uniform(0.3, 1.2, rows),
+        'ground_time_pressure': rng.uniform(0.2, 3.0, rows),
+        'transfer_bag_ratio': rng.uniform(0, 1, rows),
+        'ssr_intensity': rng.uniform(0, 0.3, rows)
+    })
+
+def assert_same_features(actual, data):
+    expected = compute_advanced_features(data)
+    pd.testing.assert_frame_equal(actual[DERIVED_FEATURE_COLUMNS], expected, check_dtype=True)
+
+def test_lookup_serves_stored_rows_and_computes_the_rest():
+    flights = make_flights()
+    with tempfile.TemporaryDirectory() as directory:
+        store = open_feature_store(directory)
+        assert_same_features(store.features_for(flights), flights)
+        reader = open_feature_store(directory)
+
+        # Shuffled subset spanning every day, as a drill-down page would ask
+        subset = flights.sample(400, random_state=1)
+        assert_same_features(reader.lookup(subset), subset)
+        assert reader.stats['rows_served'] == 400 and reader.stats['rows_computed'] == 0
+
+        # A chunk read from SQLite: a NULL elsewhere turns integer columns into floats
+        chunk = flights.iloc[1000:1500].astype({'total_seats': float, 'total_bags': float})
+        assert_same_features(reader.lookup(chunk), chunk)
+        assert reader.stats['rows_served'] == 900
+
+        # Edited flights and a day the store has never seen are computed, not served
+        changed = flights.iloc[:50].copy()
+        changed.loc[changed.index[:10], 'total_bags'] += 1
+        changed.loc[changed.index[10:20], 'scheduled_departure_date_local'] = '2025-09-30'
+        assert_same_features(reader.lookup(changed), changed)
+        assert reader.stats['rows_served'] == 930 and reader.stats['rows_computed'] == 20
+
+        # Lookups never write: the stored partitions are unchanged
+        assert store.load_manifest() == reader.load_manifest()
+        assert_same_features(reader.lookup(flights.iloc[:0]), flights.iloc[:0])
+    print("✅ feature store lookups match in-memory features for stored, edited and unseen flights")
+
+def test_lookup_without_store_computes_everything():
+    flights = make_flights(200)
+    with tempfile.TemporaryDirectory() as directory:
+        reader = open_feature_store(directory)
+        assert_same_features(reader.lookup(flights), flights)
+        assert reader.stats['rows_computed'] == 200
+    print("✅ an empty feature store falls back to computing features")
+
+if __name__ == '__main__':
+    test_lookup_serves_stored_rows_and_computes_the_rest()
+    test_lookup_without_store_computes_everything()
+    sys.exit(0)
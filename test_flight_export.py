@@ -0,0 +1,76 @@
+import io
+import os
+import sqlite3
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from flight_export import DataFrameChunkSource, SQLiteChunkSource, main, stream_flight_export
+from flight_queries import parse_flight_query
+
+def make_database(path, rows=300):
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE ClassifiedFlights (flight_number INTEGER, gate, difficulty_score REAL, "
+        "scheduled_arrival_station_code TEXT, note)"
+    )
+    records = []
+    for row in range(rows):
+        # Later chunks hold values the first chunk's types cannot take
+        late = row >= 250
+        records.append((
+            f"UA{row}" if late else row,
+            2.5 if late else row % 40,
+            row / rows,
+            'São Paulo' if late else 'ORD',
+            None
+        ))
+    conn.executemany("INSERT INTO ClassifiedFlights VALUES (?, ?, ?, ?, ?)", records)
+    conn.commit()
+    conn.close()
+
+def export_bytes(source, export_format):
+    body, _, _ = stream_flight_export(source, export_format)
+    return b''.join(part.encode('utf-8') if isinstance(part, str) else part for part in body)
+
+def test_parquet_schema_covers_later_chunks():
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, 'flights.db')
+        make_database(db_path)
+        source = SQLiteChunkSource(db_path, parse_flight_query({}), chunk_size=100)
+        table = pq.read_table(io.BytesIO(export_bytes(source, 'parquet')))
+
+    assert table.num_rows == 300
+    assert [str(field.type) for field in table.schema] == ['string', 'double', 'double', 'string', 'string']
+    assert table.column('flight_number')[0].as_py() == '0' and table.column('flight_number')[299].as_py() == 'UA299'
+    assert table.column('gate')[299].as_py() == 2.5
+    print("✅ Parquet export keeps streaming when later chunks change a column's type")
+
+def test_dataframe_parquet_with_mixed_objects():
+    df = pd.DataFrame({'flight_number': [101, 'UA102', None, 104], 'difficulty_score': [0.1, 0.2, np.nan, 0.4]})
+    source = DataFrameChunkSource(df, np.ones(len(df), dtype=bool), chunk_size=2)
+    table = pq.read_table(io.BytesIO(export_bytes(source, 'parquet')))
+    assert table.column('flight_number').to_pylist() == ['101', 'UA102', None, '104']
+    assert table.column('difficulty_score').to_pylist()[3] == 0.4
+    print("✅ mixed object columns export as strings")
+
+def test_cli_reports_bytes_written():
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, 'flights.db')
+        output = os.path.join(directory, 'flights.csv')
+        make_database(db_path)
+        assert main(['--db', db_path, '--output', output]) == 0
+        with open(output, 'rb') as f:
+            content = f.read()
+    assert len(content) > len(content.decode('utf-8'))
+    assert content.count(b'\r\n') == 301
+    print(f"✅ CSV export wrote {len(content):,} bytes of UTF-8")
+
+if __name__ == '__main__':
+    test_parquet_schema_covers_later_chunks()
+    test_dataframe_parquet_with_mixed_objects()
+    test_cli_reports_bytes_written()
+    sys.exit(0)
@@ -0,0 +1,90 @@
+import base64
+import json
+import sqlite3
+import sys
+
+import numpy as np
+import pandas as pd
+
+from flight_queries import SORT_COLUMNS, DataFrameFlightRepository, SQLiteFlightRepository, parse_flight_query
+
+def make_flights(rows=300):
+    # Few distinct values and plenty of NULLs so every page boundary lands on ties
+    rng = np.random.default_rng(1)
+    return pd.DataFrame({
+        'difficulty_score': rng.choice([0.1, 0.2, 0.3, 0.5, np.nan], rows),
+        'scheduled_departure_date_local': '2025-08-01',
+        'scheduled_departure_datetime_local': rng.choice(['2025-08-01 06:00', '2025-08-01 07:00', None], rows),
+        'scheduled_arrival_station_code': rng.choice(['ORD', 'LAX'], rows),
+        'fleet_type': rng.choice(['B737', 'B787'], rows),
+        'carrier': 'Mainline',
+        'difficulty_classification': 'Medium'
+    })
+
+def make_repositories():
+    df = make_flights()
+    conn = sqlite3.connect(':memory:')
+    df.to_sql('ClassifiedFlights', conn, index=False)
+    return conn, SQLiteFlightRepository(lambda: conn), DataFrameFlightRepository(df)
+
+def walk(repository, params):
+    positions, cursor = [], None
+    while True:
+        query = dict(params, cursor=cursor) if cursor else params
+        page = repository.list_flights(parse_flight_query(query))
+        positions += [flight['flight_id'] for flight in page['flights']]
+        cursor = page['next_cursor']
+        if not cursor:
+            return positions
+
+def expected_order(conn, sort, order, destination=None):
+    where = 'WHERE scheduled_arrival_station_code = ?' if destination else ''
+    sql = f"SELECT rowid FROM ClassifiedFlights {where} ORDER BY {SORT_COLUMNS[sort]} {order}, rowid {order}"
+    return [row[0] for row in conn.execute(sql, [destination] if destination else [])]
+
+def test_keyset_pages_match_order_by():
+    conn, sqlite_repository, frame_repository = make_repositories()
+
+    for sort in SORT_COLUMNS:
+        for order in ['asc', 'desc']:
+            for destination in [None, 'ORD']:
+                params = {'sort': sort, 'order': order, 'limit': '7'}
+                if destination:
+                    params['destination'] = destination
+                expected = expected_order(conn, sort, order, destination)
+
+                # SQLite flight ids are rowids, DataFrame ids are 0-based positions
+                assert walk(sqlite_repository, params) == expected, f"sqlite {params}"
+                assert [position + 1 for position in walk(frame_repository, params)] == expected, f"dataframe {params}"
+                print(f"✅ {sort} {order} {destination or 'all'}: {len(expected)} flights, no gaps or repeats")
+
+def test_cursor_rejected_for_other_sort():
+    _, _, frame_repository = make_repositories()
+    cursor = frame_repository.list_flights(parse_flight_query({'sort': 'score', 'limit': '5'}))['next_cursor']
+
+    for params in [{'sort': 'departure'}, {'sort': 'score', 'order': 'asc'}]:
+        try:
+            parse_flight_query(dict(params, cursor=cursor))
+        except ValueError:
+            continue
+        raise AssertionError(f"cursor from a score/desc page accepted for {params}")
+    print("✅ cursors from another sort or order are rejected")
+
+def test_forged_cursor_values_rejected():
+    _, sqlite_repository, _ = make_repositories()
+
+    for sort_value in [{'a': 1}, [1, 2], True]:
+        raw = json.dumps([sort_value, 3, 'score', 'desc']).encode('utf-8')
+        cursor = base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+        try:
+            sqlite_repository.list_flights(parse_flight_query({'cursor': cursor}))
+        except ValueError:
+            continue
+        raise AssertionError(f"cursor with sort value {sort_value!r} accepted")
+    print("✅ cursors carrying non-scalar sort values are rejected as bad requests")
+
+if __name__ == '__main__':
+    test_keyset_pages_match_order_by()
+    test_cursor_rejected_for_other_sort()
+    test_forged_cursor_values_rejected()
+    sys.exit(0)
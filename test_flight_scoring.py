@@ -0,0 +1,69 @@
+import sys
+
+import numpy as np
+
+from flight_scoring import NORMALIZED_FEATURES, FlightScorer, MicroBatcher, derive_features
+
+def make_flight(departure, **fields):
+    flight = {
+        'scheduled_departure_datetime_local': departure,
+        'scheduled_departure_station_code': 'ORD',
+        'scheduled_arrival_station_code': 'LAX',
+        'fleet_type': 'B737-800',
+        'total_seats': 166,
+        'total_passengers': 150,
+        'total_bags': 120
+    }
+    flight.update(fields)
+    return flight
+
+def make_scorer():
+    stats = {}
+    for feature in NORMALIZED_FEATURES:
+        stats[f'min_{feature}'] = 0.0
+        stats[f'max_{feature}'] = 2.0
+    return FlightScorer({}, stats, {'2024-10-01': np.linspace(0, 1, 50)})
+
+def test_mixed_formats_keep_local_hour():
+    departures = ['2024-10-01 08:00', '2024-10-01T08:00:00-05:00', '2024-10-01T08:00:00Z', '10/01/2024 08:00']
+    features = derive_features([make_flight(departure) for departure in departures], {})
+
+    assert list(features['scheduled_departure_datetime_local']) == ['2024-10-01 08:00:00'] * len(departures)
+    assert list(features['scheduled_departure_date_local']) == ['2024-10-01'] * len(departures)
+    assert list(features['time_complexity']) == [2] * len(departures)
+
+    # Batched together or alone, every record scores the same
+    scorer = make_scorer()
+    together = scorer.score([make_flight(departure) for departure in departures])
+    alone = [scorer.score([make_flight(departure)])[0] for departure in departures]
+    assert together == alone
+    print("✅ mixed departure formats in one batch keep their local wall-clock hour")
+
+def test_bad_request_fails_alone():
+    scorer = make_scorer()
+
+    def score(records):
+        if any(record.get('flight_number') == 'BAD' for record in records):
+            raise ValueError('unscorable flight')
+        return scorer.score(records)
+
+    batcher = MicroBatcher(score, max_wait=0.2)
+    requests = [
+        [make_flight('2024-10-01 08:00')],
+        [make_flight('2024-10-01T08:00:00-05:00'), make_flight('2024-10-01 17:00', flight_number='BAD')],
+        [make_flight('2024-10-01 06:00')]
+    ]
+    futures = [batcher.submit(records) for records in requests]
+
+    assert isinstance(futures[1].exception(timeout=5), ValueError)
+    for records, future in zip(requests, futures):
+        if future is not futures[1]:
+            assert future.result(timeout=5) == scorer.score(records)
+    status = batcher.get_status()
+    assert status['requests'] == len(requests) and status['flights'] == 4
+    print("✅ a failing record only fails the request that sent it")
+
+if __name__ == '__main__':
+    test_mixed_formats_keep_local_hour()
+    test_bad_request_fails_alone()
+    sys.exit(0)
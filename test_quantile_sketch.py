@@ -0,0 +1,177 @@
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+
+from quantile_sketch import UNKNOWN_DESTINATION, UNKNOWN_HOUR, QuantileSketchStore, TDigest, build_or_update
+
+QUANTILES = (0.01, 0.5, 0.9, 0.99)
+MAX_RANK_ERROR = 0.005
+
+def rank_error(values, estimate, q):
+    # Distance between q and the fraction of values at or below the estimate
+    values = np.sort(values)
+    below = np.searchsorted(values, estimate, side='left') / len(values)
+    at_or_below = np.searchsorted(values, estimate, side='right') / len(values)
+    return max(0.0, below - q, q - at_or_below)
+
+def make_flights(rows=40000):
+    rng = np.random.default_rng(7)
+    hours = rng.integers(5, 23, rows)
+    return pd.DataFrame({
+        'scheduled_arrival_station_code': rng.choice(['ORD', 'LAX', 'DEN', 'SFO'], rows),
+        'scheduled_departure_datetime_local': [f"2025-08-01 {hour:02d}:30:00" for hour in hours],
+        'departure_delay_minutes': np.where(rng.random(rows) < 0.02, np.nan, rng.exponential(20, rows)),
+        'arrival_delay_minutes': rng.normal(5, 15, rows),
+        'difficulty_score': rng.beta(2, 5, rows)
+    })
+
+def assert_accurate(values, row, label):
+    values = values[~np.isnan(values)]
+    assert row['count'] == len(values), f"{label}: count {row['count']} != {len(values)}"
+    for q in QUANTILES:
+        error = rank_error(values, row[f'p{q * 100:g}'], q)
+        assert error <= MAX_RANK_ERROR, f"{label}: p{q * 100:g} off by {error:.4f} in rank"
+
+def test_digest_quantiles_match_exact():
+    values = np.random.default_rng(1).exponential(20, 50000)
+    digest = TDigest()
+    for chunk in np.array_split(values, 37):
+        digest.update(chunk)
+
+    for q in QUANTILES:
+        assert rank_error(values, digest.quantile(q), q) <= MAX_RANK_ERROR
+    assert digest.quantile(0.0) == values.min() and digest.quantile(1.0) == values.max()
+    print(f"✅ digest quantiles within {MAX_RANK_ERROR} rank of exact over {len(values)} values")
+
+def test_merge_leaves_other_digest_untouched():
+    rng = np.random.default_rng(2)
+    left, right = TDigest().update(rng.normal(0, 1, 5000)), TDigest().update(rng.normal(3, 1, 200))
+    right_means, right_weights = right.centroids()
+    right_buffer = list(right.buffer)
+    assert right_buffer, "fixture should leave values buffered"
+
+    left.merge(right)
+    assert len(right.buffer) == len(right_buffer)
+    assert np.array_equal(right.centroids()[0], right_means)
+    assert np.array_equal(right.centroids()[1], right_weights)
+    assert left.count == 5200
+    print("✅ merge reads the other digest without flushing it")
+
+def test_store_percentiles_match_exact():
+    df = make_flights()
+    hours = pd.to_datetime(df['scheduled_departure_datetime_local']).dt.hour
+    store = QuantileSketchStore.from_dataframe(df)
+    metric = 'departure_delay_minutes'
+
+    assert_accurate(df[metric].to_numpy(), store.percentiles(metric, QUANTILES)[0], 'all')
+    for row in store.percentiles(metric, QUANTILES, group_by='destination'):
+        values = df.loc[df['scheduled_arrival_station_code'] == row['destination'], metric].to_numpy()
+        assert_accurate(values, row, row['destination'])
+
+    mask = df['scheduled_arrival_station_code'].isin(['ORD', 'DEN']) & hours.between(6, 9)
+    row = store.percentiles(metric, QUANTILES, destinations={'ORD', 'DEN'}, hours={6, 7, 8, 9})[0]
+    assert_accurate(df.loc[mask, metric].to_numpy(), row, 'ORD/DEN 06-09')
+    print("✅ merged store percentiles within tolerance for totals, groups and filters")
+
+def test_incremental_sqlite_store_matches_full_build():
+    df = make_flights()
+    conn = sqlite3.connect(':memory:')
+    df.iloc[:25000].to_sql('ClassifiedFlights', conn, index=False)
+
+    store = QuantileSketchStore()
+    assert store.update_from_sqlite(conn) == 25000
+    store.save_sqlite(conn)
+    df.iloc[25000:].to_sql('ClassifiedFlights', conn, index=False, if_exists='append')
+
+    store = QuantileSketchStore.from_sqlite(conn)
+    assert store.update_from_sqlite(conn) == len(df) - 25000
+    store.save_sqlite(conn)
+    reloaded = QuantileSketchStore.from_sqlite(conn)
+
+    for metric in ['departure_delay_minutes', 'arrival_delay_minutes', 'difficulty_score']:
+        assert reloaded.percentiles(metric, QUANTILES) == store.percentiles(metric, QUANTILES)
+        assert_accurate(df[metric].to_numpy(), reloaded.percentiles(metric, QUANTILES)[0], metric)
+    print("✅ incremental SQLite store is accurate and survives a save/load round trip")
+
+def test_flights_without_groups_stay_in_totals():
+    df = make_flights(5000)
+    df.loc[df.index[:300], 'scheduled_arrival_station_code'] = None
+    df.loc[df.index[200:500], 'scheduled_departure_datetime_local'] = 'not a time'
+    store = QuantileSketchStore.from_dataframe(df)
+    metric = 'difficulty_score'
+
+    assert_accurate(df[metric].to_numpy(), store.percentiles(metric, QUANTILES)[0], 'all')
+    by_destination = {row['destination']: row['count'] for row in store.percentiles(metric, group_by='destination')}
+    by_hour = {row['departure_hour']: row['count'] for row in store.percentiles(metric, group_by='departure_hour')}
+    assert by_destination[UNKNOWN_DESTINATION] == 300 and by_hour[UNKNOWN_HOUR] == 300
+    print("✅ flights with no destination or departure hour are kept under placeholder groups")
+
+def test_rebuilds_when_source_table_is_recreated():
+    df = make_flights(20000)
+    metric = 'departure_delay_minutes'
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, 'flights.db')
+
+        def recreate(frame):
+            with sqlite3.connect(db_path) as conn:
+                frame.to_sql('ClassifiedFlights', conn, index=False, if_exists='replace')
+
+        recreate(df)
+        assert build_or_update(db_path)[1] == len(df)
+
+        # Same rows again (as complete_analysis.sql produces): nothing to redo
+        recreate(df)
+        assert build_or_update(db_path)[1] == 0
+
+        # Same row count, different delays: the sketches must not be reused
+        changed = df.assign(**{metric: df[metric] * 3})
+        recreate(changed)
+        store, added = build_or_update(db_path)
+        assert added == len(df)
+        assert_accurate(changed[metric].to_numpy(), store.percentiles(metric, QUANTILES)[0], 'recreated')
+
+        # Appended flights are still picked up incrementally
+        with sqlite3.connect(db_path) as conn:
+            df.iloc[:1000].to_sql('ClassifiedFlights', conn, index=False, if_exists='append')
+        store, added = build_or_update(db_path)
+        assert added == 1000
+        combined = pd.concat([changed, df.iloc[:1000]])
+        assert_accurate(combined[metric].to_numpy(), store.percentiles(metric, QUANTILES)[0], 'appended')
+    print("✅ a recreated source table triggers a rebuild; identical or appended data stays incremental")
+
+def test_concurrent_percentiles_are_consistent():
+    store = QuantileSketchStore.from_dataframe(make_flights())
+    expected = store.percentiles('arrival_delay_minutes', QUANTILES, group_by='departure_hour')
+    results, errors = [], []
+
+    def query():
+        try:
+            for _ in range(20):
+                results.append(store.percentiles('arrival_delay_minutes', QUANTILES, group_by='departure_hour'))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=query) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors, errors
+    assert all(result == expected for result in results)
+    print(f"✅ {len(results)} concurrent percentile queries returned identical results")
+
+if __name__ == '__main__':
+    test_digest_quantiles_match_exact()
+    test_merge_leaves_other_digest_untouched()
+    test_store_percentiles_match_exact()
+    test_incremental_sqlite_store_matches_full_build()
+    test_flights_without_groups_stay_in_totals()
+    test_rebuilds_when_source_table_is_recreated()
+    test_concurrent_percentiles_are_consistent()
+    sys.exit(0)
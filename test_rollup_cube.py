@@ -0,0 +1,60 @@
+import sqlite3
+import sys
+
+import numpy as np
+import pandas as pd
+
+from rollup_cube import RollupCube
+
+def make_flights(rows=2000):
+    rng = np.random.default_rng(3)
+    delayed = rng.choice([0.0, 1.0], rows, p=[0.6, 0.4])
+    delayed[:200] = np.nan
+    return pd.DataFrame({
+        'scheduled_departure_date_local': rng.choice(['2025-08-01', '2025-08-02'], rows),
+        'scheduled_departure_datetime_local': [f"2025-08-01 {hour:02d}:15:00" for hour in rng.integers(5, 23, rows)],
+        'scheduled_arrival_station_code': rng.choice(['ORD', 'LAX', 'DEN'], rows),
+        'fleet_type': rng.choice(['B737-800', 'A320'], rows),
+        'carrier': 'UA',
+        'difficulty_classification': rng.choice(['Easy', 'Medium', 'Difficult'], rows),
+        'difficulty_score': rng.beta(2, 5, rows),
+        'departure_delay_minutes': rng.exponential(20, rows),
+        'load_factor': rng.uniform(0.3, 1.0, rows),
+        'total_passengers': rng.integers(20, 300, rows),
+        'is_delayed': delayed
+    })
+
+def test_delayed_pct_counts_missing_as_on_time():
+    df = make_flights()
+    conn = sqlite3.connect(':memory:')
+    df.to_sql('ClassifiedFlights', conn, index=False)
+    expected = (df['is_delayed'] == 1).mean() * 100
+
+    for cube in (RollupCube.build_sqlite(conn), RollupCube.from_dataframe(df)):
+        stats = cube.dashboard_stats()
+        assert stats['total_flights'] == len(df)
+        assert abs(stats['delayed_pct'] - expected) < 1e-9
+    print("✅ delayed share divides by every flight, in SQLite and in-memory cubes")
+
+def test_cube_records_source_fingerprint():
+    df = make_flights()
+    conn = sqlite3.connect(':memory:')
+    df.to_sql('ClassifiedFlights', conn, index=False)
+    built = RollupCube.build_sqlite(conn)
+    assert RollupCube.from_sqlite(conn).source_fingerprint == built.source_fingerprint
+
+    # Same row count, reclassified flights: the persisted cube no longer matches
+    conn.execute("UPDATE ClassifiedFlights SET difficulty_classification = 'Difficult' WHERE rowid <= 500")
+    stale = RollupCube.from_sqlite(conn)
+    live = RollupCube.from_source(conn)
+    assert stale.source_fingerprint != live.source_fingerprint
+    assert live.dashboard_stats()['difficulty_distribution'] == (
+        pd.read_sql_query("SELECT * FROM ClassifiedFlights", conn)['difficulty_classification'].value_counts().to_dict()
+    )
+    assert RollupCube.build_sqlite(conn).source_fingerprint == live.source_fingerprint
+    print("✅ persisted cubes carry the fingerprint of the flights they were built from")
+
+if __name__ == '__main__':
+    test_delayed_pct_counts_missing_as_on_time()
+    test_cube_records_source_fingerprint()
+    sys.exit(0)
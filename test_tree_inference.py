@@ -0,0 +1,142 @@
+import os
+import sys
+import tempfile
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+from advanced_ml_models import make_base_learners
+from ensemble_cache import PrefitStackingClassifier, PrefitVotingClassifier
+from sklearn.linear_model import LogisticRegression
+from tree_inference import CompiledModel, export_estimator
+
+TOLERANCE = 1e-5
+NUMERIC_COLUMNS = ['load_factor', 'ground_time_pressure', 'total_bags', 'is_international']
+CATEGORICAL_COLUMNS = ['fleet_type', 'scheduled_arrival_station_code']
+FEATURE_COLUMNS = NUMERIC_COLUMNS + CATEGORICAL_COLUMNS
+
+# 80 stations so LightGBM category bitsets span several 32-bit words;
+# the last few are in the category list but never appear in training
+STATIONS = [f"S{number:02d}" for number in range(80)]
+FLEETS = ['A319', 'B737', 'B738', 'B757', 'B767', 'B787']
+UNSEEN_STATIONS = STATIONS[-5:]
+
+def make_frame(rows, seed, stations=STATIONS[:-5]):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'load_factor': rng.uniform(0.3, 1.2, rows),
+        'ground_time_pressure': rng.uniform(0.2, 3.0, rows),
+        'total_bags': rng.integers(0, 250, rows).astype(float),
+        'is_international': rng.integers(0, 2, rows).astype(float),
+        'fleet_type': rng.choice(FLEETS, rows),
+        'scheduled_arrival_station_code': rng.choice(stations, rows)
+    })
+    station_effect = df['scheduled_arrival_station_code'].str[1:].astype(int) % 7 / 6
+    score = (
+        df['load_factor'] + 0.4 * df['ground_time_pressure'] + 0.5 * station_effect
+        + 0.3 * df['fleet_type'].isin(['B767', 'B787']) + rng.normal(0, 0.15, rows)
+    )
+    labels = np.digitize(score, np.quantile(score, [0.5, 0.8]))
+
+    for column in NUMERIC_COLUMNS:
+        df.loc[rng.random(rows) < 0.05, column] = np.nan
+    return df, labels
+
+def as_matrix(df, categories):
+    X = df[FEATURE_COLUMNS].copy()
+    for column in CATEGORICAL_COLUMNS:
+        X[column] = pd.Categorical(X[column], categories=categories[column])
+    return X
+
+def make_fixtures():
+    categories = {'fleet_type': FLEETS, 'scheduled_arrival_station_code': STATIONS}
+    train, y_train = make_frame(2000, seed=1)
+    test, _ = make_frame(600, seed=2, stations=STATIONS)
+
+    rng = np.random.default_rng(3)
+    test.loc[rng.random(len(test)) < 0.05, 'fleet_type'] = None
+    test.loc[rng.random(len(test)) < 0.05, 'scheduled_arrival_station_code'] = None
+    test.loc[:19, 'scheduled_arrival_station_code'] = 'NEW'
+    return as_matrix(train, categories), y_train, as_matrix(test, categories), categories
+
+def make_learners():
+    # The random forest plus boosters configured like the search's estimators
+    return make_base_learners(n_jobs=1) + [
+        ('xgb', xgb.XGBClassifier(
+            random_state=42, eval_metric='mlogloss', tree_method='hist', enable_categorical=True, n_jobs=1
+        )),
+        ('lgb', lgb.LGBMClassifier(random_state=42, verbose=-1, n_jobs=1))
+    ]
+
+def fit_models(X_train, y_train):
+    models = {name: learner.fit(X_train, y_train) for name, learner in make_learners()}
+    members = list(models.items())
+    meta_features = np.hstack([model.predict_proba(X_train) for _, model in members])
+    models['voting'] = PrefitVotingClassifier(members)
+    models['stacking'] = PrefitStackingClassifier(members, LogisticRegression(max_iter=1000).fit(meta_features, y_train))
+    return models
+
+def assert_matches_native(name, native, compiled, X):
+    expected = native.predict_proba(X)
+    actual = compiled.predict_proba(X)
+    difference = np.abs(expected - actual).max()
+    assert actual.shape == expected.shape, f"{name}: shape {actual.shape} != {expected.shape}"
+    assert difference < TOLERANCE, f"{name}: max probability difference {difference:.2e}"
+    return difference
+
+def test_compiled_matches_native():
+    X_train, y_train, X_test, categories = make_fixtures()
+    assert X_test['scheduled_arrival_station_code'].isin(UNSEEN_STATIONS).any()
+    assert X_test['scheduled_arrival_station_code'].isna().sum() >= 20
+    assert X_test[NUMERIC_COLUMNS].isna().any().all()
+
+    for name, native in fit_models(X_train, y_train).items():
+        compiled = CompiledModel(export_estimator(native), name, FEATURE_COLUMNS, categories)
+        difference = assert_matches_native(name, native, compiled, X_test)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'model.npz')
+            compiled.save(path)
+            assert_matches_native(f"{name} (reloaded)", native, CompiledModel.load(path), X_test)
+        print(f"✅ {name}: compiled probabilities within {difference:.1e} of native")
+
+def test_compiled_recodes_foreign_categories():
+    X_train, y_train, X_test, categories = make_fixtures()
+    native = dict(make_learners())['lgb'].fit(X_train, y_train)
+    compiled = CompiledModel(export_estimator(native), 'lgb', FEATURE_COLUMNS, categories)
+
+    raw = X_test.copy()
+    for column in CATEGORICAL_COLUMNS:
+        raw[column] = raw[column].astype(object)
+    assert np.abs(compiled.predict_proba(raw) - native.predict_proba(X_test)).max() < TOLERANCE
+    print("✅ lgb: plain string categories are recoded to the training categories")
+
+def test_xgboost_stops_at_recorded_best_iteration():
+    X_train, y_train, X_test, categories = make_fixtures()
+    native = dict(make_learners())['xgb'].set_params(n_estimators=300, early_stopping_rounds=5)
+    native.fit(X_train.iloc[:1500], y_train[:1500], eval_set=[(X_train.iloc[1500:], y_train[1500:])], verbose=False)
+    assert native.best_iteration + 1 < 300
+
+    # Cleared after training, as incremental updates do: predict still stops early
+    native.set_params(early_stopping_rounds=None)
+    compiled = CompiledModel(export_estimator(native), 'xgb', FEATURE_COLUMNS, categories)
+    assert_matches_native('xgb (early stopped)', native, compiled, X_test)
+    print(f"✅ xgb: compiled model stops at best_iteration {native.best_iteration}")
+
+def test_lightgbm_zero_as_missing():
+    X_train, y_train, X_test, categories = make_fixtures()
+    X_test = X_test.copy()
+    X_test.loc[X_test.index[:150], 'total_bags'] = 0.0
+    native = dict(make_learners())['lgb'].set_params(zero_as_missing=True).fit(X_train, y_train)
+    compiled = CompiledModel(export_estimator(native), 'lgb', FEATURE_COLUMNS, categories)
+    difference = assert_matches_native('lgb (zero_as_missing)', native, compiled, X_test)
+    print(f"✅ lgb: zero_as_missing splits compile within {difference:.1e} of native")
+
+if __name__ == '__main__':
+    test_compiled_matches_native()
+    test_compiled_recodes_foreign_categories()
+    test_xgboost_stops_at_recorded_best_iteration()
+    test_lightgbm_zero_as_missing()
+    sys.exit(0)
@@ -0,0 +1,200 @@
+import bisect
+import heapq
+import re
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from flight_queries import FLIGHTS_TABLE
+
+DEFAULT_WINDOW = '3h'
+MAX_WINDOW = timedelta(days=31)
+DEFAULT_TOP_K = 25
+MAX_TOP_K = 500
+BUCKET_MINUTES = 60
+START_ROUNDING_MINUTES = 5
+
+WINDOW_UNITS = {'m': 'minutes', 'h': 'hours', 'd': 'days'}
+_EPOCH = datetime(1970, 1, 1)
+
+def parse_window(value):
+    match = re.fullmatch(r'\s*(\d+)\s*([mhd])\s*', value or DEFAULT_WINDOW)
+    if not match:
+        raise ValueError("'window' must look like 90m, 3h or 1d")
+
+    window = timedelta(**{WINDOW_UNITS[match.group(2)]: int(match.group(1))})
+    if not timedelta(0) < window <= MAX_WINDOW:
+        raise ValueError(f"'window' must be between 1m and {MAX_WINDOW.days}d")
+    return window
+
+def parse_top_query(params):
+    window = parse_window(params.get('window'))
+
+    try:
+        k = int(params.get('k') or DEFAULT_TOP_K)
+    except ValueError as e:
+        raise ValueError("'k' must be an integer") from e
+    k = max(1, min(k, MAX_TOP_K))
+
+    start = params.get('start')
+    if start:
+        try:
+            start = datetime.fromisoformat(start).replace(tzinfo=None)
+        except ValueError as e:
+            raise ValueError("'start' must be an ISO datetime such as 2024-08-01T06:00") from e
+    else:
+        now = datetime.now()
+        start = now.replace(minute=now.minute - now.minute % START_ROUNDING_MINUTES, second=0, microsecond=0)
+
+    return {'start': start, 'end': start + window, 'k': k}
+
+class TopDifficultIndex:
+    def __init__(self, bucket_minutes=BUCKET_MINUTES):
+        self.bucket_size = timedelta(minutes=bucket_minutes)
+        self.buckets = {}
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def _bucket(self, departure):
+        return (departure - _EPOCH) // self.bucket_size
+
+    @staticmethod
+    def _normalize(flight_ids, departures, scores):
+        departures = pd.to_datetime(pd.Series(departures), errors='coerce')
+        if departures.dt.tz is not None:
+            departures = departures.dt.tz_localize(None)
+        scores = pd.to_numeric(pd.Series(scores), errors='coerce').to_numpy(dtype=float)
+        flight_ids = np.asarray(flight_ids)
+        valid = departures.notna().to_numpy() & ~np.isnan(scores)
+        return flight_ids, departures, scores, valid
+
+    @classmethod
+    def from_arrays(cls, flight_ids, departures, scores, bucket_minutes=BUCKET_MINUTES):
+        index = cls(bucket_minutes)
+
+        flight_ids, departures, scores, valid = cls._normalize(flight_ids, departures, scores)
+        flight_ids = flight_ids[valid]
+        scores = scores[valid]
+        departures = departures[valid].dt.to_pydatetime()
+
+        for position in np.lexsort((flight_ids, -scores)):
+            departure = departures[position]
+            entry = (-float(scores[position]), int(flight_ids[position]), departure)
+            bucket = index._bucket(departure)
+            index.buckets.setdefault(bucket, []).append(entry)
+            index.entries[entry[1]] = (bucket, entry)
+        return index
+
+    @classmethod
+    def from_dataframe(cls, df, bucket_minutes=BUCKET_MINUTES):
+        return cls.from_arrays(
+            np.arange(len(df)), df['scheduled_departure_datetime_local'], df['difficulty_score'], bucket_minutes
+        )
+
+    @classmethod
+    def from_sqlite(cls, conn, table=FLIGHTS_TABLE, bucket_minutes=BUCKET_MINUTES):
+        try:
+            rows = conn.execute(
+                f"SELECT rowid, scheduled_departure_datetime_local, difficulty_score FROM {table}"
+            ).fetchall()
+        except sqlite3.Error as e:
+            print(f"Top difficult index unavailable: {e}")
+            return None
+
+        if not rows:
+            return cls(bucket_minutes)
+        flight_ids, departures, scores = zip(*rows)
+        return cls.from_arrays(flight_ids, departures, scores, bucket_minutes)
+
+    def update_from_sqlite(self, conn, table=FLIGHTS_TABLE, chunk_size=50000):
+        try:
+            cursor = conn.execute(
+                f"SELECT rowid, scheduled_departure_datetime_local, difficulty_score FROM {table} ORDER BY rowid"
+            )
+            seen = []
+            changed = 0
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                flight_ids, departures, scores, valid = self._normalize(*zip(*rows))
+                departures = departures.dt.to_pydatetime()
+                seen.append(flight_ids)
+
+                for flight_id, departure, score, is_valid in zip(flight_ids.tolist(), departures, scores.tolist(), valid):
+                    current = self.entries.get(flight_id)
+                    if not is_valid:
+                        if current is not None:
+                            self.remove(flight_id)
+                            changed += 1
+                    elif current is None or current[1][0] != -score or current[1][2] != departure:
+                        self.upsert(flight_id, departure, score)
+                        changed += 1
+        except sqlite3.Error as e:
+            print(f"Top difficult index refresh failed: {e}")
+            return None
+
+        seen = np.concatenate(seen) if seen else np.array([], dtype=np.int64)
+        removed = np.setdiff1d(np.fromiter(list(self.entries), dtype=np.int64, count=len(self.entries)), seen)
+        for flight_id in removed.tolist():
+            self.remove(flight_id)
+        return changed + len(removed)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _remove(self, flight_id):
+        bucket, entry = self.entries.pop(flight_id)
+        entries = self.buckets[bucket]
+        del entries[bisect.bisect_left(entries, entry)]
+        if not entries:
+            del self.buckets[bucket]
+
+    def upsert(self, flight_id, departure, score):
+        if isinstance(departure, str):
+            departure = datetime.fromisoformat(departure)
+        departure = departure.replace(tzinfo=None)
+        entry = (-float(score), int(flight_id), departure)
+        bucket = self._bucket(departure)
+
+        with self.lock:
+            if flight_id in self.entries:
+                self._remove(flight_id)
+            bisect.insort(self.buckets.setdefault(bucket, []), entry)
+            self.entries[entry[1]] = (bucket, entry)
+
+    def remove(self, flight_id):
+        with self.lock:
+            if flight_id in self.entries:
+                self._remove(flight_id)
+
+    def top(self, start, end, k=DEFAULT_TOP_K):
+        with self.lock:
+            lists = [
+                self.buckets[bucket]
+                for bucket in range(self._bucket(start), self._bucket(end) + 1)
+                if bucket in self.buckets
+            ]
+
+            results = []
+            for negative_score, flight_id, departure in heapq.merge(*lists):
+                if start <= departure < end:
+                    results.append((flight_id, -negative_score))
+                    if len(results) == k:
+                        break
+        return results
+
+def top_difficult_response(index, repository, query):
+    ranked = index.top(query['start'], query['end'], query['k'])
+    flights = repository.get_flights([flight_id for flight_id, _ in ranked])
+
+    return {
+        'window_start': query['start'].isoformat(),
+        'window_end': query['end'].isoformat(),
+        'k': query['k'],
+        'count': len(flights),
+        'flights': flights
+    }
@@ -0,0 +1,87 @@
+import multiprocessing
+import os
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from threadpoolctl import threadpool_limits
+
+def physical_cores():
+    try:
+        cores = set()
+        physical_id = None
+        with open('/proc/cpuinfo') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                key = key.strip()
+                if key == 'physical id':
+                    physical_id = value.strip()
+                elif key == 'core id':
+                    cores.add((physical_id, value.strip()))
+        if cores:
+            available = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()
+            return max(1, min(len(cores), available))
+    except OSError:
+        pass
+    return max(1, (os.cpu_count() or 2) // 2)
+
+def thread_budgets(task_count, cores=None):
+    cores = cores or physical_cores()
+    workers = max(1, min(task_count, cores))
+    budgets = []
+    for position in range(task_count):
+        slot = position % workers
+        budgets.append(cores // workers + (1 if slot < cores % workers else 0))
+    return workers, budgets
+
+def _cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+def _run_task(name, fn, args, threads):
+    started = time.perf_counter()
+    cpu_started = _cpu_seconds()
+    with threadpool_limits(limits=threads):
+        result = fn(*args, n_jobs=threads)
+    wall = time.perf_counter() - started
+    cpu = _cpu_seconds() - cpu_started
+    return result, {
+        'threads': threads,
+        'wall_seconds': round(wall, 3),
+        'cpu_seconds': round(cpu, 3),
+        'cpu_utilization': round(cpu / (wall * threads), 3) if wall else None,
+        'pid': os.getpid()
+    }
+
+class TrainingScheduler:
+    def __init__(self, cores=None, parallel=True):
+        self.cores = cores or physical_cores()
+        self.parallel = parallel
+        self.report = {}
+
+    def run(self, tasks):
+        started = time.perf_counter()
+        workers, budgets = thread_budgets(len(tasks), self.cores)
+        results = {}
+
+        if not self.parallel or workers == 1:
+            for (name, fn, args), _ in zip(tasks, budgets):
+                results[name], self.report[name] = _run_task(name, fn, args, self.cores)
+        else:
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+                futures = {
+                    name: executor.submit(_run_task, name, fn, args, threads)
+                    for (name, fn, args), threads in zip(tasks, budgets)
+                }
+                for name, future in futures.items():
+                    results[name], self.report[name] = future.result()
+
+        wall = time.perf_counter() - started
+        self.report['_total'] = {
+            'cores': self.cores,
+            'workers': workers if self.parallel else 1,
+            'wall_seconds': round(wall, 3),
+            'task_seconds': round(sum(report['wall_seconds'] for name, report in self.report.items() if name != '_total'), 3)
+        }
+        return results
@@ -0,0 +1,505 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+COMPILED_MODEL_FILE = 'best_model.npz'
+CHUNK_ROWS = 2048
+# LightGBM treats |x| <= kZeroThreshold as zero for zero_as_missing splits
+LIGHTGBM_ZERO_THRESHOLD = 1e-35
+
+def _softmax(scores):
+    scores = scores - scores.max(axis=1, keepdims=True)
+    np.exp(scores, out=scores)
+    return scores / scores.sum(axis=1, keepdims=True)
+
+class CompiledForest:
+    ARRAYS = [
+        'feature', 'threshold', 'left', 'right', 'default_left', 'zero_missing',
+        'category_row', 'category_sets', 'value', 'roots', 'base_score', 'classes'
+    ]
+
+    def __init__(self, arrays, max_depth, transform, category_left):
+        for name in self.ARRAYS:
+            setattr(self, name, arrays.get(name))
+        if self.zero_missing is None:
+            # Files compiled before zero_as_missing support have no such splits
+            self.zero_missing = np.zeros(len(self.feature), dtype=bool)
+        self.max_depth = max_depth
+        self.transform = transform
+        self.category_left = category_left
+        self.classes_ = self.classes
+        self.children = np.column_stack([self.right, self.left]).ravel()
+
+    def leaves(self, X):
+        n_rows, n_columns = X.shape
+        node = np.tile(self.roots, n_rows)
+        offset = np.repeat(np.arange(n_rows) * n_columns, len(self.roots))
+        values = X.ravel()
+        active = np.flatnonzero(self.feature[node] >= 0)
+        width = self.category_sets.shape[1]
+
+        while active.size:
+            current = node[active]
+            x = values[offset[active] + self.feature[current]]
+            go_left = x <= self.threshold[current]
+            missing = np.isnan(x)
+            if missing.any():
+                go_left |= missing & self.default_left[current]
+            zero_missing = self.zero_missing[current]
+            if zero_missing.any():
+                zero = zero_missing & (np.abs(x) <= LIGHTGBM_ZERO_THRESHOLD)
+                go_left[zero] = self.default_left[current[zero]]
+
+            if len(self.category_sets):
+                categorical = np.flatnonzero(self.category_row[current] >= 0)
+                if categorical.size:
+                    codes = np.nan_to_num(x[categorical], nan=-1).astype(np.int64)
+                    member = (codes >= 0) & (codes < width) & self.category_sets[
+                        self.category_row[current[categorical]], np.clip(codes, 0, width - 1)
+                    ]
+                    go_left[categorical] = np.where(
+                        codes < 0, self.default_left[current[categorical]], member == self.category_left
+                    )
+
+            current = self.children[2 * current + go_left]
+            node[active] = current
+            active = active[self.feature[current] >= 0]
+        return node.reshape(n_rows, len(self.roots))
+
+    def predict_proba(self, X):
+        scores = self.value[self.leaves(X)].sum(axis=1)
+        if self.transform == 'mean':
+            return scores / len(self.roots)
+        return _softmax(scores + self.base_score)
+
+    def spec(self, prefix, arrays):
+        for name in self.ARRAYS:
+            arrays[prefix + name] = getattr(self, name)
+        return {
+            'kind': 'forest', 'prefix': prefix, 'max_depth': self.max_depth,
+            'transform': self.transform, 'category_left': self.category_left
+        }
+
+class CompiledVoting:
+    def __init__(self, members, weights=None):
+        self.members = members
+        self.weights = weights
+        self.classes_ = members[0].classes_
+
+    def predict_proba(self, X):
+        return np.average([member.predict_proba(X) for member in self.members], axis=0, weights=self.weights)
+
+    def spec(self, prefix, arrays):
+        return {
+            'kind': 'voting', 'weights': self.weights,
+            'members': [member.spec(f"{prefix}{position}.", arrays) for position, member in enumerate(self.members)]
+        }
+
+class CompiledStacking:
+    def __init__(self, members, coef, intercept, classes):
+        self.members = members
+        self.coef = coef
+        self.intercept = intercept
+        self.classes_ = classes
+
+    def predict_proba(self, X):
+        meta = np.hstack([member.predict_proba(X) for member in self.members])
+        scores = meta @ self.coef.T + self.intercept
+        if len(self.classes_) == 2:
+            positive = 1.0 / (1.0 + np.exp(-scores[:, 0]))
+            return np.column_stack([1.0 - positive, positive])
+        return _softmax(scores)
+
+    def spec(self, prefix, arrays):
+        arrays[prefix + 'coef'] = self.coef
+        arrays[prefix + 'intercept'] = self.intercept
+        arrays[prefix + 'classes'] = self.classes_
+        return {
+            'kind': 'stacking', 'prefix': prefix,
+            'members': [member.spec(f"{prefix}{position}.", arrays) for position, member in enumerate(self.members)]
+        }
+
+def _from_spec(spec, arrays):
+    if spec['kind'] == 'forest':
+        prefix = spec['prefix']
+        return CompiledForest(
+            {name: arrays[prefix + name] for name in CompiledForest.ARRAYS if prefix + name in arrays},
+            spec['max_depth'], spec['transform'], spec['category_left']
+        )
+    members = [_from_spec(member, arrays) for member in spec['members']]
+    if spec['kind'] == 'voting':
+        return CompiledVoting(members, spec['weights'])
+    prefix = spec['prefix']
+    return CompiledStacking(members, arrays[prefix + 'coef'], arrays[prefix + 'intercept'], arrays[prefix + 'classes'])
+
+class CompiledModel:
+    def __init__(self, estimator, name, feature_columns, categories, feature_set_version=None):
+        self.estimator = estimator
+        self.name = name
+        self.feature_columns = list(feature_columns)
+        self.categories = categories
+        self.feature_set_version = feature_set_version
+        self.classes_ = estimator.classes_
+        self.version = None
+
+    def encode(self, X):
+        if isinstance(X, np.ndarray):
+            return X.astype(np.float64, copy=False)
+        import pandas as pd
+
+        encoded = np.empty((len(X), len(self.feature_columns)), dtype=np.float64)
+        for position, column in enumerate(self.feature_columns):
+            values = X[column]
+            if column in self.categories:
+                if not isinstance(values.dtype, pd.CategoricalDtype) or list(values.cat.categories) != self.categories[column]:
+                    values = pd.Categorical(values.astype(str).where(values.notna()), categories=self.categories[column])
+                    encoded[:, position] = values.codes
+                else:
+                    encoded[:, position] = values.cat.codes.to_numpy()
+            else:
+                encoded[:, position] = values.to_numpy(dtype=np.float32, na_value=np.nan)
+        return encoded
+
+    def predict_proba(self, X):
+        X = self.encode(X)
+        if len(X) <= CHUNK_ROWS:
+            return self.estimator.predict_proba(X)
+        return np.vstack([
+            self.estimator.predict_proba(X[start:start + CHUNK_ROWS])
+            for start in range(0, len(X), CHUNK_ROWS)
+        ])
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    def save(self, path):
+        arrays = {}
+        header = {
+            'name': self.name,
+            'feature_columns': self.feature_columns,
+            'categories': self.categories,
+            'feature_set_version': self.feature_set_version,
+            'estimator': self.estimator.spec('', arrays)
+        }
+        arrays['header'] = np.frombuffer(json.dumps(header).encode(), dtype=np.uint8)
+        temp_path = path + '.tmp.npz'
+        np.savez(temp_path, **arrays)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as archive:
+            arrays = {key: archive[key] for key in archive.files}
+        header = json.loads(arrays.pop('header').tobytes().decode())
+        return cls(
+            _from_spec(header['estimator'], arrays), header['name'], header['feature_columns'],
+            header['categories'], header['feature_set_version']
+        )
+
+def _tree_depth(left, right, root=0):
+    depth = 0
+    level = [root]
+    while level:
+        level = [child for node in level for child in (left[node], right[node]) if child >= 0]
+        depth += 1 if level else 0
+    return depth
+
+def _build_forest(trees, n_outputs, classes, transform, category_left, base_score=None):
+    offsets = np.cumsum([0] + [len(tree['feature']) for tree in trees])
+    category_width = max([0] + [
+        max(categories) + 1 for tree in trees for categories in tree['categories'] if categories
+    ])
+
+    feature, threshold, left, right, default_left, zero_missing, category_row, value = [], [], [], [], [], [], [], []
+    category_sets = []
+    for offset, tree in zip(offsets, trees):
+        for position in range(len(tree['feature'])):
+            feature.append(tree['feature'][position])
+            threshold.append(tree['threshold'][position])
+            left.append(tree['left'][position] + offset if tree['left'][position] >= 0 else -1)
+            right.append(tree['right'][position] + offset if tree['right'][position] >= 0 else -1)
+            default_left.append(tree['default_left'][position])
+            zero_missing.append(tree['zero_missing'][position] if 'zero_missing' in tree else False)
+            categories = tree['categories'][position]
+            if categories is None:
+                category_row.append(-1)
+            else:
+                row = np.zeros(category_width, dtype=bool)
+                row[list(categories)] = True
+                category_row.append(len(category_sets))
+                category_sets.append(row)
+        value.append(tree['value'])
+
+    arrays = {
+        'feature': np.asarray(feature, dtype=np.int32),
+        'threshold': np.asarray(threshold, dtype=np.float64),
+        'left': np.asarray(left, dtype=np.int32),
+        'right': np.asarray(right, dtype=np.int32),
+        'default_left': np.asarray(default_left, dtype=bool),
+        'zero_missing': np.asarray(zero_missing, dtype=bool),
+        'category_row': np.asarray(category_row, dtype=np.int32),
+        'category_sets': np.asarray(category_sets, dtype=bool).reshape(len(category_sets), category_width),
+        'value': np.vstack(value).astype(np.float64),
+        'roots': offsets[:-1].astype(np.int32),
+        'base_score': np.zeros(n_outputs) if base_score is None else np.asarray(base_score, dtype=np.float64),
+        'classes': np.asarray(classes)
+    }
+    max_depth = max(_tree_depth(tree['left'], tree['right']) for tree in trees)
+    return CompiledForest(arrays, max_depth, transform, category_left)
+
+def _export_sklearn_forest(model):
+    n_classes = len(model.classes_)
+    trees = []
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        leaf_value = tree.value[:, 0, :n_classes].astype(np.float64)
+        leaf_value /= np.maximum(leaf_value.sum(axis=1, keepdims=True), 1e-300)
+        missing_left = getattr(tree, 'missing_go_to_left', None)
+        trees.append({
+            'feature': np.where(tree.children_left >= 0, tree.feature, -1),
+            'threshold': tree.threshold,
+            'left': tree.children_left,
+            'right': tree.children_right,
+            'default_left': missing_left.astype(bool) if missing_left is not None else np.ones(tree.node_count, dtype=bool),
+            'categories': [None] * tree.node_count,
+            'value': leaf_value
+        })
+    return _build_forest(trees, n_classes, model.classes_, 'mean', category_left=True)
+
+def _export_xgboost(model):
+    learner = json.loads(model.get_booster().save_raw('json'))['learner']
+    booster = learner['gradient_booster']
+    if learner['objective']['name'] != 'multi:softprob' or booster.get('name', 'gbtree') != 'gbtree':
+        raise ValueError(f"Cannot compile XGBoost objective {learner['objective']['name']}")
+
+    n_classes = int(learner['learner_model_param']['num_class'])
+    base_score = learner['learner_model_param']['base_score']
+    base_score = json.loads(base_score) if base_score.startswith('[') else [float(base_score)] * n_classes
+
+    tree_info = booster['model']['tree_info']
+    raw_trees = booster['model']['trees']
+    # XGBClassifier.predict stops at the booster's best_iteration whenever one
+    # was recorded, whatever early_stopping_rounds is set to now
+    best_iteration = model.get_booster().attr('best_iteration')
+    if best_iteration is not None:
+        raw_trees = raw_trees[:(int(best_iteration) + 1) * n_classes]
+
+    trees = []
+    for tree, output in zip(raw_trees, tree_info):
+        left = np.asarray(tree['left_children'])
+        leaf = left < 0
+        conditions = np.asarray(tree['split_conditions'], dtype=np.float32)
+        categories = [None] * len(left)
+        for node, segment, size in zip(tree.get('categories_nodes', []), tree.get('categories_segments', []), tree.get('categories_sizes', [])):
+            categories[node] = tree['categories'][segment:segment + size]
+        value = np.zeros((len(left), n_classes))
+        value[leaf, output] = conditions[leaf]
+        trees.append({
+            'feature': np.where(leaf, -1, tree['split_indices']),
+            'threshold': np.nextafter(conditions, np.float32(-np.inf)).astype(np.float64),
+            'left': left,
+            'right': np.asarray(tree['right_children']),
+            'default_left': np.asarray(tree['default_left'], dtype=bool),
+            'categories': categories,
+            'value': value
+        })
+    return _build_forest(trees, n_classes, model.classes_, 'softmax', category_left=False, base_score=base_score)
+
+def _flatten_lightgbm_tree(structure, output, n_classes):
+    nodes = []
+
+    def visit(node):
+        position = len(nodes)
+        nodes.append(None)
+        if 'leaf_value' in node:
+            nodes[position] = (-1, 0.0, -1, -1, False, None, node['leaf_value'], False)
+            return position
+
+        left = visit(node['left_child'])
+        right = visit(node['right_child'])
+        if node['decision_type'] == '==':
+            categories = [int(category) for category in str(node['threshold']).split('||')]
+            nodes[position] = (node['split_feature'], 0.0, left, right, False, categories, 0.0, False)
+        else:
+            threshold = float(node['threshold'])
+            # NaN follows default_left for 'NaN' splits; for 'Zero' splits NaN
+            # and zero both do, otherwise NaN is compared as 0.0
+            missing_type = node.get('missing_type')
+            default_left = node['default_left'] if missing_type in ('NaN', 'Zero') else 0.0 <= threshold
+            nodes[position] = (
+                node['split_feature'], threshold, left, right, default_left, None, 0.0, missing_type == 'Zero'
+            )
+        return position
+
+    visit(structure)
+    value = np.zeros((len(nodes), n_classes))
+    value[:, output] = [node[6] for node in nodes]
+    return {
+        'feature': np.asarray([node[0] for node in nodes]),
+        'threshold': np.asarray([node[1] for node in nodes]),
+        'left': np.asarray([node[2] for node in nodes]),
+        'right': np.asarray([node[3] for node in nodes]),
+        'default_left': np.asarray([node[4] for node in nodes], dtype=bool),
+        'zero_missing': np.asarray([node[7] for node in nodes], dtype=bool),
+        'categories': [node[5] for node in nodes],
+        'value': value
+    }
+
+def _export_lightgbm(model):
+    best_iteration = getattr(model, 'best_iteration_', None) or -1
+    dump = model.booster_.dump_model(num_iteration=best_iteration)
+    if not dump['objective'].startswith('multiclass') or dump.get('average_output'):
+        raise ValueError(f"Cannot compile LightGBM objective {dump['objective']}")
+
+    n_classes = dump['num_class']
+    trees = [
+        _flatten_lightgbm_tree(tree['tree_structure'], position % n_classes, n_classes)
+        for position, tree in enumerate(dump['tree_info'])
+    ]
+    return _build_forest(trees, n_classes, model.classes_, 'softmax', category_left=True)
+
+def export_estimator(model):
+    if hasattr(model, 'final_estimator'):
+        final = model.final_estimator
+        return CompiledStacking(
+            [export_estimator(estimator) for _, estimator in model.estimators],
+            np.asarray(final.coef_, dtype=np.float64), np.asarray(final.intercept_, dtype=np.float64), final.classes_
+        )
+    if hasattr(model, 'estimators') and hasattr(model, 'weights'):
+        return CompiledVoting([export_estimator(estimator) for _, estimator in model.estimators], model.weights)
+    if hasattr(model, 'get_booster'):
+        return _export_xgboost(model)
+    if hasattr(model, 'booster_'):
+        return _export_lightgbm(model)
+    if hasattr(model, 'steps'):
+        for _, step in model.steps[:-1]:
+            if getattr(getattr(step, 'func', None), '__name__', None) != 'category_codes':
+                raise ValueError(f"Cannot compile pipeline step {type(step).__name__}")
+        return export_estimator(model.steps[-1][1])
+    if hasattr(model, 'estimators_') and hasattr(model.estimators_[0], 'tree_'):
+        return _export_sklearn_forest(model)
+    raise ValueError(f"Cannot compile {type(model).__name__}")
+
+def compile_model(ml_models):
+    from ml_features import FEATURE_COLUMNS, FEATURE_SET_VERSION
+
+    if ml_models.best_model is None:
+        raise ValueError("No trained model to compile")
+    return CompiledModel(
+        export_estimator(ml_models.best_model), ml_models.best_model_name,
+        FEATURE_COLUMNS, ml_models.categories, FEATURE_SET_VERSION
+    )
+
+def compiled_model_path(models_dir, version=None):
+    from model_registry import ModelRegistry
+
+    registry = ModelRegistry(models_dir)
+    version = version or registry.current_version()
+    if version is None:
+        return None, None
+    return registry.path(version, COMPILED_MODEL_FILE), version
+
+def load_compiled_model(models_dir, version=None):
+    path, version = compiled_model_path(models_dir, version)
+    if path is None or not os.path.exists(path):
+        return None
+    from ml_features import FEATURE_SET_VERSION
+
+    compiled = CompiledModel.load(path)
+    if compiled.feature_set_version != FEATURE_SET_VERSION:
+        print(f"Compiled model {path} was built for feature set {compiled.feature_set_version}, expected {FEATURE_SET_VERSION}")
+        return None
+    compiled.version = version
+    return compiled
+
+def _cold_load_seconds(code):
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+def benchmark(models_dir='models/', db_path='skyhack.db', rounds=5):
+    import sqlite3
+    import pandas as pd
+    from advanced_ml_models import AdvancedMLModels
+    from ml_features import build_feature_matrix, open_feature_store, served_features
+
+    ml_models = AdvancedMLModels(feature_store_dir=None)
+    if not ml_models.load_models(models_dir) or ml_models.best_model is None:
+        raise ValueError(f"No trained models in {models_dir}")
+    compiled = load_compiled_model(models_dir) or compile_model(ml_models)
+
+    with sqlite3.connect(db_path) as conn:
+        data = pd.read_sql_query("SELECT * FROM ClassifiedFlights", conn)
+    X = build_feature_matrix(served_features(data, open_feature_store()), ml_models.categories)
+
+    native = ml_models.best_model.predict_proba(X)
+    difference = float(np.abs(native - compiled.predict_proba(X)).max())
+    agreement = float((native.argmax(axis=1) == compiled.predict_proba(X).argmax(axis=1)).mean())
+
+    pickle_path = ml_models.model_paths[ml_models.best_model_name]
+    compiled_path, _ = compiled_model_path(models_dir, ml_models.model_version)
+    if not os.path.exists(compiled_path):
+        compiled.save(compiled_path)
+    timer = "import time; started = time.perf_counter(); "
+    report = {
+        'model': ml_models.best_model_name,
+        'version': ml_models.model_version,
+        'rows': len(X),
+        'max_abs_difference': difference,
+        'class_agreement': agreement,
+        'pickle_load_seconds': _cold_load_seconds(
+            timer + f"import joblib; joblib.load({pickle_path!r}); print(time.perf_counter() - started)"
+        ),
+        'compiled_load_seconds': _cold_load_seconds(
+            timer + f"from tree_inference import CompiledModel; CompiledModel.load({compiled_path!r}); "
+            "print(time.perf_counter() - started)"
+        ),
+        'pickle_bytes': os.path.getsize(pickle_path),
+        'compiled_bytes': os.path.getsize(compiled_path)
+    }
+
+    for label, predict in (('native', ml_models.best_model.predict_proba), ('compiled', compiled.predict_proba)):
+        for batch, rows in (('batch', X), ('single', X.iloc[:1])):
+            started = time.perf_counter()
+            for _ in range(rounds):
+                predict(rows)
+            seconds = (time.perf_counter() - started) / rounds
+            report[f'{label}_{batch}_rows_per_second'] = round(len(rows) / seconds, 1)
+    return report
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compile trained tree models to a NumPy-only predictor")
+    parser.add_argument('command', choices=['export', 'benchmark'])
+    parser.add_argument('--models-dir', default='models/')
+    parser.add_argument('--db', default='skyhack.db')
+    args = parser.parse_args(argv)
+
+    if args.command == 'export':
+        from advanced_ml_models import AdvancedMLModels
+
+        ml_models = AdvancedMLModels(feature_store_dir=None)
+        if not ml_models.load_models(args.models_dir) or ml_models.best_model is None:
+            print(f"❌ No trained models in {args.models_dir}")
+            return 1
+        path, _ = compiled_model_path(args.models_dir, ml_models.model_version)
+        compile_model(ml_models).save(path)
+        print(f"✅ Compiled {ml_models.best_model_name} ({ml_models.model_version}) to {path}")
+        return 0
+
+    report = benchmark(args.models_dir, args.db)
+    print(f"📊 {report['model']} ({report['version']}): {report['rows']} rows, max |Δp| {report['max_abs_difference']:.2e}, "
+          f"class agreement {report['class_agreement']:.2%}")
+    print(f"   Cold load: pickle {report['pickle_load_seconds']:.3f}s ({report['pickle_bytes']} bytes), "
+          f"compiled {report['compiled_load_seconds']:.3f}s ({report['compiled_bytes']} bytes)")
+    for batch in ('batch', 'single'):
+        print(f"   {batch.title()} rows/sec: native {report[f'native_{batch}_rows_per_second']:,.0f}, "
+              f"compiled {report[f'compiled_{batch}_rows_per_second']:,.0f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+import threading
+import time
+from datetime import datetime
+
+class WarmupState:
+    def __init__(self):
+        self.ready = threading.Event()
+        self.lock = threading.Lock()
+        self.thread = None
+        self.started_at = None
+        self.finished_at = None
+        self.duration = None
+        self.current_step = None
+        self.steps = {}
+        self.errors = {}
+
+    def run(self, steps, on_ready=None):
+        started = time.perf_counter()
+        with self.lock:
+            self.started_at = datetime.now().isoformat()
+
+        for name, step in steps:
+            with self.lock:
+                self.current_step = name
+            step_started = time.perf_counter()
+            try:
+                step()
+            except Exception as e:
+                print(f"Warm-up step {name} failed: {e}")
+                with self.lock:
+                    self.errors[name] = str(e)
+            with self.lock:
+                self.steps[name] = round(time.perf_counter() - step_started, 3)
+
+        with self.lock:
+            self.current_step = None
+            self.finished_at = datetime.now().isoformat()
+            self.duration = round(time.perf_counter() - started, 3)
+        self.ready.set()
+
+        if on_ready is not None:
+            on_ready()
+
+    def start(self, steps, on_ready=None):
+        if self.thread is not None:
+            return
+        self.thread = threading.Thread(target=self.run, args=(steps, on_ready), name='warmup', daemon=True)
+        self.thread.start()
+
+    def get_status(self):
+        with self.lock:
+            return {
+                'ready': self.ready.is_set(),
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+                'duration_seconds': self.duration,
+                'current_step': self.current_step,
+                'steps': dict(self.steps),
+                'errors': dict(self.errors)
+            }